@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Agrupa las llamadas concurrentes a ``predict_fn`` en una sola.
+
+    Cada llamador encola su matriz y espera su Future; un hilo despachador
+    junta lo que llegue durante ``window_ms`` (o hasta ``max_batch``
+    peticiones), predice una vez sobre la matriz apilada y reparte los
+    resultados. El hilo termina tras ``idle_s`` sin trabajo y se relanza
+    con la siguiente peticion. Tras ``close`` cada llamada predice sola.
+    """
+
+    def __init__(self, predict_fn, window_ms: float = 2.0, max_batch: int = 32,
+                 idle_s: float = 1.0):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_batch = max(1, int(max_batch))
+        self.idle_s = idle_s
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((X, future))
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch, name="micro-batcher",
+                                                    daemon=True)
+                    self._thread.start()
+        if closed:
+            return self.predict_fn(X)
+        return future.result()
+
+    def close(self):
+        """Despacha lo encolado y deja terminar al hilo sin esperar a ``idle_s``."""
+        with self._lock:
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=self.idle_s)
+        except queue.Empty:
+            return None
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+
+            sizes = [len(X) for X, _ in batch]
+            try:
+                probs = self.predict_fn(np.concatenate([X for X, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), p in zip(batch, np.split(probs, np.cumsum(sizes)[:-1])):
+                future.set_result(p)
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += sum(sizes)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "mean_rows": round(self.rows / self.batches, 1) if self.batches else 0.0,
+        }
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class CandidateBudget:
+    """Elige cuantos candidatos puntuar para cumplir un presupuesto de latencia.
+
+    Ajusta ``t = fijo + por_candidato * n`` por minimos cuadrados sobre las
+    ultimas recomendaciones calculadas y despeja ``n`` para el tiempo restante.
+    Las muestras caducan a los ``max_age`` segundos y, mientras se cae al
+    fallback, una de cada ``probe_every`` peticiones puntua ``min_candidates``
+    como sonda: si el coste baja, el modelo se entera y el numero vuelve a crecer.
+    """
+
+    def __init__(self, min_candidates: int = 50, window: int = 64, safety: float = 0.8,
+                 max_age: float = 60.0, probe_every: int = 16, clock=time.monotonic):
+        self.min_candidates = min_candidates
+        self.safety = safety
+        self.max_age = max_age
+        self.probe_every = probe_every
+        self._clock = clock
+        self._samples: deque = deque(maxlen=window)
+        self._fallbacks = 0
+        self._lock = threading.Lock()
+
+    def observe(self, n_candidates: int, seconds: float):
+        if n_candidates > 0:
+            with self._lock:
+                self._samples.append((n_candidates, seconds, self._clock()))
+
+    def _fresh_samples(self) -> np.ndarray:
+        with self._lock:
+            cutoff = self._clock() - self.max_age
+            while self._samples and self._samples[0][2] < cutoff:
+                self._samples.popleft()
+            return np.array([(n, t) for n, t, _ in self._samples], dtype=np.float64)
+
+    def cost_model(self) -> tuple[float, float]:
+        samples = self._fresh_samples()
+        if len(samples) == 0:
+            return 0.0, 0.0
+        n, t = samples[:, 0], samples[:, 1]
+        if len(samples) >= 4 and np.ptp(n) > 0:
+            per_candidate, fixed = np.polyfit(n, t, 1)
+            if per_candidate > 0 and fixed >= 0:
+                return float(fixed), float(per_candidate)
+        return 0.0, float(np.median(t / n))
+
+    def choose(self, requested: int, remaining: float | None) -> int:
+        """Candidatos a puntuar; 0 si ni el minimo cabe en el tiempo restante."""
+        if remaining is None:
+            return requested
+        if remaining <= 0:
+            return 0
+        fixed, per_candidate = self.cost_model()
+        if per_candidate == 0.0:
+            return requested
+        n = int((remaining * self.safety - fixed) / per_candidate)
+        floor = min(self.min_candidates, requested)
+        with self._lock:
+            if n >= floor:
+                self._fallbacks = 0
+                return min(n, requested)
+            self._fallbacks += 1
+            # Sonda: sin ella no llegarian muestras nuevas y el fallback seria permanente.
+            return floor if self._fallbacks % self.probe_every == 0 else 0
+
+    def stats(self) -> dict:
+        fixed, per_candidate = self.cost_model()
+        return {
+            "samples": len(self._samples),
+            "fallback_streak": self._fallbacks,
+            "fixed_ms": round(fixed * 1000, 3),
+            "per_candidate_us": round(per_candidate * 1e6, 3),
+        }
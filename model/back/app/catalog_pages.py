@@ -0,0 +1,161 @@
+import base64
+import json
+
+import numpy as np
+import pyarrow as pa
+
+from app.cache import TTLCache
+
+# Clave de orden de /movies -> columna del catalogo (siempre descendente).
+SORT_KEYS = {
+    "popularity": "log_popularity",
+    "vote_average": "vote_average",
+    "year": "movie_year",
+    "vote_count": "log_vote_count",
+}
+
+
+# Campos de /movies/export: tipo Arrow y conversion de la columna del catalogo.
+EXPORT_FIELDS = {
+    "movie_id": (pa.int64(), lambda rows: [int(m) for m in rows.index]),
+    "title": (pa.large_string(), lambda rows: [str(t) for t in rows["title"]]),
+    "genres": (pa.list_(pa.string()), lambda rows: [list(g) for g in rows["_genres_list"]]),
+    "year": (pa.int64(), lambda rows: np.nan_to_num(
+        rows["movie_year"].to_numpy(dtype=np.float64)).astype(int).tolist()),
+    "vote_average": (pa.float64(), lambda rows: _floats(rows["vote_average"], 1)),
+    "popularity": (pa.float64(), lambda rows: _floats(
+        np.expm1(rows["log_popularity"].to_numpy(dtype=np.float64)), 2)),
+    "log_popularity": (pa.float64(), lambda rows: _floats(rows["log_popularity"])),
+    "log_vote_count": (pa.float64(), lambda rows: _floats(rows["log_vote_count"])),
+    "runtime": (pa.float64(), lambda rows: _floats(rows["runtime"])),
+    "is_cold": (pa.bool_(), lambda rows: rows["is_cold"].to_numpy().astype(bool).tolist()),
+}
+DEFAULT_EXPORT_FIELDS = ["movie_id", "title", "genres", "year", "vote_average", "popularity"]
+# json.dumps con argumentos crea un encoder por llamada; se reutiliza uno.
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _floats(values, ndigits=None):
+    # NaN -> None (null en JSON y en Arrow).
+    out = []
+    for v in np.asarray(values, dtype=np.float64).tolist():
+        out.append(None if v != v else (round(v, ndigits) if ndigits is not None else v))
+    return out
+
+
+class _Sink:
+    """Fichero de escritura que acumula lo que produce el writer Arrow entre yields."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def export_chunks(catalog, positions, fields, fmt="ndjson", chunk_size=2000):
+    """Genera la exportacion por bloques de ``chunk_size`` filas.
+
+    Solo se materializa un bloque a la vez, asi la memoria no crece con el
+    catalogo. ``fmt`` es "ndjson" (una pelicula por linea) o "arrow"
+    (formato IPC de streaming, un record batch por bloque).
+    """
+    if fmt == "arrow":
+        schema = pa.schema([(f, EXPORT_FIELDS[f][0]) for f in fields])
+        sink = _Sink()
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    for start in range(0, len(positions), chunk_size):
+        rows = catalog.iloc[positions[start:start + chunk_size]]
+        columns = [EXPORT_FIELDS[f][1](rows) for f in fields]
+        if fmt == "arrow":
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.drain()
+        else:
+            yield "".join(
+                _encode_json(dict(zip(fields, values))) + "\n" for values in zip(*columns)
+            ).encode("utf-8")
+    if fmt == "arrow":
+        writer.close()
+        yield sink.drain()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CatalogPager:
+    """Ordenes del catalogo precalculados y cache de paginas ya serializadas.
+
+    Cada orden se guarda como array de posiciones (desc. por valor, empate por
+    movie_id asc.) junto con sus claves ordenadas, de modo que una pagina por
+    offset es un slice y una por cursor (keyset) un ``searchsorted``: ambas
+    O(page_size) sin importar la profundidad. Se construye en cada ``load()``,
+    asi la cache queda invalidada con la recarga del motor.
+    """
+
+    def __init__(self, catalog, cache_size: int = 256):
+        self.total = len(catalog)
+        self.ids = catalog.index.to_numpy()
+        self.orders = {}
+        for name, column in SORT_KEYS.items():
+            values = catalog[column].to_numpy(dtype=np.float64)
+            keys = -np.nan_to_num(values, nan=-np.inf)
+            positions = np.lexsort((self.ids, keys))
+            self.orders[name] = (positions, keys[positions], self.ids[positions])
+        self.cache = TTLCache(maxsize=cache_size, ttl=0)
+
+    def positions(self, sort: str, page: int, page_size: int, cursor: str | None = None,
+                  mask=None):
+        """Posiciones de la pagina y cursor de la siguiente (None si es la ultima).
+
+        ``mask`` (booleano por posicion del catalogo) restringe el orden a las
+        peliculas filtradas; el cursor keyset sigue valiendo igual.
+        """
+        if sort not in self.orders:
+            raise ValueError(f"Orden no soportado: {sort}. Opciones: {sorted(SORT_KEYS)}")
+        order, keys, ids = self.orders[sort]
+        if mask is not None:
+            keep = mask[order]
+            order, keys, ids = order[keep], keys[keep], ids[keep]
+        total = len(order)
+        if cursor:
+            start = self._seek(keys, ids, *self.decode_cursor(cursor, sort))
+        else:
+            start = (page - 1) * page_size
+        end = min(start + page_size, total)
+        next_cursor = None
+        if end < total and end > start:
+            next_cursor = self.encode_cursor(sort, keys[end - 1], ids[end - 1])
+        return order[start:end], next_cursor
+
+    @staticmethod
+    def _seek(keys, ids, key, movie_id) -> int:
+        lo = int(np.searchsorted(keys, key, side="left"))
+        hi = int(np.searchsorted(keys, key, side="right"))
+        return lo + int(np.searchsorted(ids[lo:hi], movie_id, side="right"))
+
+    @staticmethod
+    def encode_cursor(sort, key, movie_id) -> str:
+        raw = json.dumps([sort, float(key), int(movie_id)]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, key, movie_id = json.loads(raw)
+            key, movie_id = float(key), int(movie_id)
+        except (ValueError, TypeError):
+            raise InvalidCursor("Cursor invalido.")
+        if cursor_sort != sort:
+            raise InvalidCursor("El cursor pertenece a otro orden.")
+        return key, movie_id
@@ -0,0 +1,231 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_LGB_MISSING = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+# kZeroThreshold de LightGBM (1e-35f promovido a double).
+_LGB_ZERO_THRESHOLD = float(np.float32(1e-35))
+# Limite de celdas (filas x arboles) por bloque para acotar la memoria del recorrido.
+_MAX_CELLS = 1 << 20
+
+# El margen es identico bit a bit al nativo; la sigmoide usa np.exp vectorizado, cuyas
+# ramas SIMD pueden diferir en el ultimo ulp de expf/std::exp de la libreria. Tolerancia
+# relativa sobre la probabilidad final, por origen (float32 / float64):
+PARITY_RTOL = {"xgboost": 1e-6, "lightgbm": 1e-12}
+
+
+class CompiledEnsemble:
+    """Ensamble de arboles aplanado en arrays de nodos y evaluado con NumPy.
+
+    Reproduce la aritmetica de la libreria de origen: XGBoost compara y acumula
+    en float32 (``x < umbral``), LightGBM en float64 (``x <= umbral``).
+    """
+
+    _ARRAYS = ["feature", "threshold", "left", "right", "default_left",
+               "missing_type", "value", "roots"]
+
+    def __init__(self, source, feature, threshold, left, right, default_left,
+                 missing_type, value, roots, base_margin=0.0, sigmoid=1.0):
+        self.source = source
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing_type = np.asarray(missing_type, dtype=np.uint8)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = base_margin
+        self.sigmoid = sigmoid
+
+        self._dtype = self.value.dtype.type
+        self._strict = source == "xgboost"
+        self._has_zero_missing = bool((self.missing_type == MISSING_ZERO).any())
+        self._children = np.column_stack([self.left, self.right]).ravel()
+        self.max_depth = self._max_depth()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _max_depth(self):
+        depth = 0
+        frontier = self.roots
+        while True:
+            nxt = np.concatenate([self.left[frontier], self.right[frontier]])
+            nxt = np.unique(nxt[~np.isin(nxt, frontier)])
+            if len(nxt) == 0:
+                return depth
+            depth += 1
+            frontier = nxt
+
+    def _leaf_values(self, X):
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        node = np.repeat(self.roots[None, :], n, axis=0)
+        for _ in range(self.max_depth):
+            x = np.take(flat, row_base + np.take(self.feature, node))
+            thr = np.take(self.threshold, node)
+            nan = np.isnan(x)
+            if self._has_zero_missing or nan.any():
+                mt = np.take(self.missing_type, node)
+                x = np.where(nan & (mt != MISSING_NAN), 0, x)
+                missing = (nan & (mt == MISSING_NAN)) | (
+                    (mt == MISSING_ZERO) & (np.abs(x) <= _LGB_ZERO_THRESHOLD)
+                )
+                go_left = (x < thr) if self._strict else (x <= thr)
+                go_left = np.where(missing, np.take(self.default_left, node), go_left)
+            else:
+                go_left = (x < thr) if self._strict else (x <= thr)
+            node = np.take(self._children, node * 2 + ~go_left)
+        return np.take(self.value, node)
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=self._dtype)
+        out = np.empty(len(X), dtype=self._dtype)
+        chunk = max(1, _MAX_CELLS // max(1, self.n_trees))
+        for start in range(0, len(X), chunk):
+            leaves = self._leaf_values(X[start:start + chunk])
+            # Suma secuencial arbol a arbol partiendo del margen base, como la libreria nativa.
+            acc = np.empty((len(leaves), self.n_trees + 1), dtype=self._dtype)
+            acc[:, 0] = self.base_margin
+            acc[:, 1:] = leaves
+            out[start:start + chunk] = np.cumsum(acc, axis=1, dtype=self._dtype)[:, -1]
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.source == "xgboost":
+            # common::Sigmoid de XGBoost: 1 / (expf(min(-x, 88.7)) + 1 + 1e-16) en float32.
+            z = np.minimum(-margin, np.float32(88.7))
+            denom = np.exp(z) + np.float32(1.0)
+            denom += np.float32(1e-16)
+            return np.float32(1.0) / denom
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * margin))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "source": self.source,
+            "base_margin": float(self.base_margin),
+            "sigmoid": float(self.sigmoid),
+            "n_trees": self.n_trees,
+        }
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)),
+                     **{k: getattr(self, k) for k in self._ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {k: data[k] for k in cls._ARRAYS}
+        dtype = np.float32 if meta["source"] == "xgboost" else np.float64
+        return cls(meta["source"], base_margin=dtype(meta["base_margin"]),
+                   sigmoid=meta["sigmoid"], **arrays)
+
+
+class _NodeBuffer:
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.cols = {k: [] for k in ["feature", "threshold", "left", "right",
+                                     "default_left", "missing_type", "value"]}
+        self.roots = []
+
+    def __len__(self):
+        return len(self.cols["feature"])
+
+    def add(self, feature=0, threshold=0.0, left=-1, right=-1, default_left=False,
+            missing_type=MISSING_NAN, value=0.0):
+        idx = len(self)
+        # Las hojas apuntan a si mismas para que el recorrido pueda iterar max_depth veces.
+        left = idx if left < 0 else left
+        right = idx if right < 0 else right
+        for k, v in zip(self.cols, [feature, threshold, left, right,
+                                    default_left, missing_type, value]):
+            self.cols[k].append(v)
+        return idx
+
+    def build(self, source, **kwargs):
+        arrays = {k: np.asarray(v) for k, v in self.cols.items()}
+        arrays["threshold"] = arrays["threshold"].astype(self.dtype)
+        arrays["value"] = arrays["value"].astype(self.dtype)
+        return CompiledEnsemble(source, roots=self.roots, **arrays, **kwargs)
+
+
+def from_xgboost(booster) -> CompiledEnsemble:
+    model = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    objective = model["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Objetivo XGBoost no soportado: {objective}")
+    gbm = model["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Booster XGBoost no soportado: {gbm['name']}")
+
+    trees = gbm["model"]["trees"]
+    best = booster.attr("best_iteration")
+    if best is not None:
+        indptr = gbm["model"].get("iteration_indptr")
+        n_used = indptr[int(best) + 1] if indptr else int(best) + 1
+        trees = trees[:n_used]
+
+    base_score = np.float32(model["learner_model_param"]["base_score"].strip("[]"))
+    # ProbToMargin de binary:logistic: -logf(1/base_score - 1).
+    base_margin = np.float32(-np.log(np.float32(1.0) / base_score - np.float32(1.0)))
+
+    buf = _NodeBuffer(np.float32)
+    for tree in trees:
+        if tree.get("categories_nodes"):
+            raise ValueError("Splits categoricos de XGBoost no soportados.")
+        offset = len(buf)
+        buf.roots.append(offset)
+        left, right = tree["left_children"], tree["right_children"]
+        for i in range(int(tree["tree_param"]["num_nodes"])):
+            is_leaf = left[i] == -1
+            buf.add(
+                feature=0 if is_leaf else tree["split_indices"][i],
+                threshold=0.0 if is_leaf else tree["split_conditions"][i],
+                left=-1 if is_leaf else offset + left[i],
+                right=-1 if is_leaf else offset + right[i],
+                default_left=bool(tree["default_left"][i]),
+                value=tree["split_conditions"][i] if is_leaf else 0.0,
+            )
+    return buf.build("xgboost", base_margin=base_margin)
+
+
+def from_lightgbm(booster) -> CompiledEnsemble:
+    num_iteration = booster.best_iteration if booster.best_iteration > 0 else None
+    model = booster.dump_model(num_iteration=num_iteration)
+    objective = model["objective"].split()
+    if objective[0] != "binary" or model["num_tree_per_iteration"] != 1:
+        raise ValueError(f"Objetivo LightGBM no soportado: {model['objective']}")
+    sigmoid = 1.0
+    for param in objective[1:]:
+        if param.startswith("sigmoid:"):
+            sigmoid = float(param.split(":", 1)[1])
+
+    buf = _NodeBuffer(np.float64)
+
+    def visit(node):
+        if "leaf_value" in node:
+            return buf.add(value=node["leaf_value"])
+        if node["decision_type"] != "<=":
+            raise ValueError("Splits categoricos de LightGBM no soportados.")
+        idx = buf.add(
+            feature=node["split_feature"],
+            threshold=node["threshold"],
+            default_left=node["default_left"],
+            missing_type=_LGB_MISSING[node["missing_type"]],
+        )
+        buf.cols["left"][idx] = visit(node["left_child"])
+        buf.cols["right"][idx] = visit(node["right_child"])
+        return idx
+
+    for info in model["tree_info"]:
+        buf.roots.append(visit(info["tree_structure"]))
+    return buf.build("lightgbm", base_margin=0.0, sigmoid=sigmoid)
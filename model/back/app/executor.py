@@ -0,0 +1,93 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ExecutorSaturated(Exception):
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Cola de inferencia llena; reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Pool dedicado para el motor con cola acotada.
+
+    Sustituye al threadpool por defecto de Starlette para el trabajo de
+    inferencia: como mucho ``max_workers`` llamadas corren a la vez y
+    ``max_queue`` esperan; el resto se rechaza al instante.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, window: int = 1024):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.completed = 0
+        self.rejected = 0
+        self._queued = 0
+        self._running = 0
+        self._waits: deque = deque(maxlen=window)
+        self._runs: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix="inference")
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self._retry_after())
+            self._queued += 1
+        return self._pool.submit(self._call, time.perf_counter(), fn, args, kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _call(self, submitted, fn, args, kwargs):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._waits.append(started - submitted)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self._runs.append(time.perf_counter() - started)
+
+    def _retry_after(self) -> int:
+        mean_run = float(np.mean(self._runs)) if self._runs else 0.0
+        return max(1, math.ceil(mean_run * (self._queued + 1) / self.max_workers))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            runs = np.array(self._runs) * 1000
+            out = {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+        for name, ms in [("wait_ms", waits), ("run_ms", runs)]:
+            out[name] = {
+                "mean": round(float(ms.mean()), 3) if len(ms) else 0.0,
+                "p50": round(float(np.percentile(ms, 50)), 3) if len(ms) else 0.0,
+                "p99": round(float(np.percentile(ms, 99)), 3) if len(ms) else 0.0,
+            }
+        return out
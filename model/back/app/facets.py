@@ -0,0 +1,157 @@
+import numpy as np
+
+from app.cache import TTLCache
+
+# Umbrales de nota minima con conteo precalculado en la respuesta.
+VOTE_THRESHOLDS = (5, 6, 7, 8)
+
+# numpy >= 2.0 trae popcount vectorizado; antes, tabla de bits por byte.
+_popcount = getattr(np, "bitwise_count", None)
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _count(bits: np.ndarray) -> int:
+    if _popcount is not None:
+        return int(_popcount(bits).sum())
+    return int(_BYTE_BITS[bits.view(np.uint8)].sum())
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Bitmap de un array booleano: 1 bit por pelicula, en palabras uint64."""
+    padded = np.zeros(-(-len(mask) // 64) * 64, dtype=bool)
+    padded[:len(mask)] = mask
+    return np.packbits(padded, bitorder="little").view(np.uint64)
+
+
+def clean_filters(genre=None, lang=None, year_min=None, year_max=None, min_vote=None,
+                  exclude_cold=False) -> dict:
+    """Filtros en forma canonica (sin vacios, listas ordenadas) para claves de cache y cursores."""
+    filters = {}
+    if genre:
+        filters["genre"] = sorted(set(genre))
+    if lang:
+        filters["lang"] = sorted(set(lang))
+    if year_min is not None:
+        filters["year_min"] = int(year_min)
+    if year_max is not None:
+        filters["year_max"] = int(year_max)
+    if min_vote is not None:
+        filters["min_vote"] = float(min_vote)
+    if exclude_cold:
+        filters["exclude_cold"] = True
+    return filters
+
+
+def filters_key(filters: dict | None) -> tuple:
+    return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in sorted((filters or {}).items()))
+
+
+class FacetIndex:
+    """Bitmaps por valor de faceta sobre las posiciones del catalogo.
+
+    Generos, idiomas, decadas, umbrales de nota e is_cold son bitmaps (14 KB
+    por valor con 110k peliculas); year y nota ademas se guardan como
+    posiciones ordenadas por valor, asi un rango cualquiera es un
+    ``searchsorted``. Filtrar es un AND de bitmaps y cada conteo un popcount:
+    nada recorre columnas de pandas por peticion.
+    """
+
+    def __init__(self, catalog, cache_size: int = 256):
+        self.size = len(catalog)
+        self.all = _pack(np.ones(self.size, dtype=bool))
+        self.genre = {c[len("genre_"):]: _pack(catalog[c].to_numpy() > 0)
+                      for c in catalog.columns if c.startswith("genre_")}
+        self.lang = {c[len("lang_"):]: _pack(catalog[c].to_numpy() > 0)
+                     for c in catalog.columns if c.startswith("lang_")}
+        self.cold = _pack(catalog["is_cold"].to_numpy().astype(bool))
+
+        years = catalog["movie_year"].to_numpy(dtype=np.float64)
+        votes = catalog["vote_average"].to_numpy(dtype=np.float64)
+        decades = np.floor(years / 10) * 10
+        self.decade = {str(int(d)): _pack(decades == d) for d in np.unique(decades[~np.isnan(decades)])}
+        self.min_vote = {str(t): _pack(votes >= t) for t in VOTE_THRESHOLDS}
+        # Posiciones ordenadas por valor (sin NaN) para los rangos.
+        self._ranges = {}
+        for name, values in (("year", years), ("vote", votes)):
+            order = np.argsort(values, kind="stable")
+            order = order[~np.isnan(values[order])]
+            self._ranges[name] = (order.astype(np.int32), values[order])
+        # Filtros sobre el catalogo completo -> (mascara, conteos, total).
+        self.cache = TTLCache(maxsize=cache_size, ttl=0)
+
+    def bitmap(self, positions) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return _pack(mask)
+
+    def _range(self, name, lo=None, hi=None) -> np.ndarray:
+        positions, values = self._ranges[name]
+        start = 0 if lo is None else int(np.searchsorted(values, lo, side="left"))
+        end = len(values) if hi is None else int(np.searchsorted(values, hi, side="right"))
+        return self.bitmap(positions[start:end])
+
+    def _parts(self, filters: dict) -> dict:
+        """Bitmap de cada faceta filtrada: AND entre generos, OR entre idiomas."""
+        parts = {}
+        for facet, combine in (("genre", np.bitwise_and), ("lang", np.bitwise_or)):
+            values = filters.get(facet)
+            if not values:
+                continue
+            bitmaps = getattr(self, facet)
+            unknown = [v for v in values if v not in bitmaps]
+            if unknown:
+                raise ValueError(f"{facet} no soportado: {unknown}. Opciones: {sorted(bitmaps)}")
+            parts[facet] = combine.reduce([bitmaps[v] for v in values])
+        if "year_min" in filters or "year_max" in filters:
+            parts["year"] = self._range("year", filters.get("year_min"), filters.get("year_max"))
+        if "min_vote" in filters:
+            parts["min_vote"] = self._range("vote", lo=filters["min_vote"])
+        if filters.get("exclude_cold"):
+            parts["is_cold"] = self.all & ~self.cold
+        return parts
+
+    def select(self, filters: dict | None, within=None):
+        """Mascara booleana (None si no hay filtros), conteos por faceta y total.
+
+        ``within`` (posiciones, p. ej. los resultados de una busqueda) acota
+        todo. El conteo de cada faceta aplica los demas filtros pero no el
+        suyo, salvo genero, que se combina con AND y refina la seleccion.
+        """
+        if within is None:
+            key = filters_key(filters)
+            cached = self.cache.get(key)
+            if cached is None:
+                cached = self._select(filters or {}, self.all)
+                self.cache.put(key, cached)
+            return cached
+        return self._select(filters or {}, self.bitmap(within))
+
+    def _select(self, filters: dict, base: np.ndarray):
+        parts = self._parts(filters)
+
+        def without(skip=None):
+            bits = base
+            for name, part in parts.items():
+                if name != skip:
+                    bits = bits & part
+            return bits
+
+        selected = without()
+        langs, years, votes, colds = (without(f) for f in ("lang", "year", "min_vote", "is_cold"))
+        counts = {
+            "genre": {g: _count(selected & b) for g, b in self.genre.items()},
+            "lang": {lang: _count(langs & b) for lang, b in self.lang.items()},
+            "decade": {d: n for d, b in self.decade.items() if (n := _count(years & b))},
+            "min_vote": {t: _count(votes & b) for t, b in self.min_vote.items()},
+            "is_cold": {"true": _count(colds & self.cold), "false": _count(colds & ~self.cold)},
+        }
+        if not parts:
+            return None, counts, _count(selected)
+        mask = np.unpackbits(selected.view(np.uint8), count=self.size, bitorder="little").view(bool)
+        return mask, counts, _count(selected)
+
+    def stats(self) -> dict:
+        bitmaps = [self.all, self.cold, *self.genre.values(), *self.lang.values(),
+                   *self.decade.values(), *self.min_vote.values()]
+        ranges = [a for pair in self._ranges.values() for a in pair]
+        return {"bitmaps": len(bitmaps), "bytes": int(sum(a.nbytes for a in bitmaps + ranges))}
@@ -0,0 +1,19 @@
+import hashlib
+
+
+def make_etag(version: str, *parts) -> str:
+    """ETag debil: version del contenido mas, opcionalmente, lo que distingue la respuesta."""
+    if parts:
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
+        return f'W/"{version}-{digest}"'
+    return f'W/"{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Comparacion debil (RFC 9110 13.1.2): se ignora el prefijo W/.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
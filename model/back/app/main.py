@@ -1,34 +1,146 @@
+import hmac
 import os
+import threading
+import time
+import weakref
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool
 
 from app.schemas import (
     RecommendRequest,
     RecommendResponse,
+    RecommendBatchRequest,
+    RecommendBatchResponse,
     MovieRecommendation,
     MovieListResponse,
     MovieItem,
     HealthResponse,
     ModelInfoResponse,
+    ReloadStatusResponse,
+    ReadinessResponse,
+    AutocompleteResponse,
 )
+from app.catalog_pages import SORT_KEYS
+from app.executor import ExecutorSaturated, InferenceExecutor
+from app.facets import clean_filters
+from app.http_cache import etag_matches, make_etag
+from app.metrics import HTTP_REQUESTS, HTTP_SECONDS, REGISTRY
 from app.recommender import RecommenderEngine
+from app.reloader import EngineReloader
+from app.search_index import AUTOCOMPLETE_MAX
+from app.startup import EngineStartup
+from app.tracing import Trace, TraceLog
 
 ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", "artifacts")
 MODEL_TYPE = os.getenv("MODEL_TYPE", "xgboost")
-engine = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, model_type=MODEL_TYPE)
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "1024"))
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "600"))
+CANDIDATE_RETRIEVER = os.getenv("CANDIDATE_RETRIEVER", "genre")
+RECOMMEND_LATENCY_BUDGET_MS = float(os.getenv("RECOMMEND_LATENCY_BUDGET_MS", "0"))
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# MODEL_TYPE=ensemble: "xgboost=0.5,lightgbm=0.3,random_forest=0.2" (vacio = pesos iguales).
+ENSEMBLE_WEIGHTS = os.getenv("ENSEMBLE_WEIGHTS", "")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE = int(os.getenv("INFERENCE_QUEUE", "64"))
+# Exportaciones simultaneas: cada una recorre el catalogo entero fuera del pool de inferencia.
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "2"))
+# Hilos internos de xgboost/lightgbm/sklearn por llamada (0 = valor de la libreria).
+MODEL_THREADS = int(os.getenv("MODEL_THREADS", "0"))
+# Ventana de micro-batching en ms (0 = desactivado) y maximo de peticiones por lote.
+# Cada peticion del lote ocupa un hilo del pool: lote real = min(MICRO_BATCH_MAX, INFERENCE_WORKERS).
+MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", "0"))
+MICRO_BATCH_MAX = int(os.getenv("MICRO_BATCH_MAX", "32"))
+# Con --workers N: almacen de catalogo mapeado en memoria y compartido (p. ej. /dev/shm/movia).
+CATALOG_STORE_DIR = os.getenv("CATALOG_STORE_DIR", "")
+# Paginas de /movies guardadas ya serializadas (0 = sin cache).
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "256"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "128"))
+# max-age (s) de las respuestas de catalogo; despues el cliente revalida con If-None-Match.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# Sets sinteticos de calentamiento antes de marcar /ready (y antes de cada recarga).
+WARMUP_SETS = int(os.getenv("WARMUP_SETS", "3"))
+# Log JSONL rotativo de peticiones mas lentas que TRACE_SLOW_MS (vacio = desactivado).
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "250"))
+
+# Rutas GET que solo cambian con los artefactos: ETag y 304 sin pasar por el motor.
+# /model/info no esta: sus contadores en vivo cambian sin que cambie content_version.
+CONDITIONAL_PATHS = {
+    "/movies": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+    "/movies/search": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+    "/movies/export": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+    "/movies/autocomplete": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+    "/movies/text-search": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+}
+
+
+def _parse_weights(raw: str) -> dict:
+    weights = {}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, value = part.partition("=")
+        weights[name.strip().lower()] = float(value) if value else 1.0
+    return weights
+
+
+def build_engine() -> RecommenderEngine:
+    return RecommenderEngine(
+        artifacts_dir=ARTIFACTS_DIR,
+        model_type=MODEL_TYPE,
+        cache_size=RECOMMEND_CACHE_SIZE,
+        cache_ttl=RECOMMEND_CACHE_TTL,
+        retriever=CANDIDATE_RETRIEVER,
+        latency_budget_ms=RECOMMEND_LATENCY_BUDGET_MS,
+        ensemble_weights=_parse_weights(ENSEMBLE_WEIGHTS),
+        model_threads=MODEL_THREADS,
+        micro_batch_window_ms=MICRO_BATCH_WINDOW_MS,
+        micro_batch_max=MICRO_BATCH_MAX,
+        catalog_store_dir=CATALOG_STORE_DIR,
+        page_cache_size=PAGE_CACHE_SIZE,
+        search_cache_size=SEARCH_CACHE_SIZE,
+    )
+
+
+engine = build_engine()
+
+
+def _build_replacement() -> RecommenderEngine:
+    new = build_engine()
+    new.tmdb = engine.tmdb
+    return new
+
+
+def _swap_engine(new: RecommenderEngine) -> RecommenderEngine:
+    # Reasignar el global es atomico; cada endpoint toma su referencia una sola vez.
+    global engine
+    old, engine = engine, new
+    return old
+
+
+reloader = EngineReloader(_build_replacement, lambda: engine, _swap_engine,
+                          warmup_sets=WARMUP_SETS, ready=lambda: startup.is_ready)
+startup = EngineStartup(lambda: engine, warmup_sets=WARMUP_SETS,
+                        on_ready=lambda: reloader.start_watch(MODEL_WATCH_INTERVAL))
+executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_queue=INFERENCE_QUEUE)
+export_slots = threading.BoundedSemaphore(max(1, EXPORT_CONCURRENCY))
+trace_log = TraceLog(TRACE_LOG_PATH, slow_ms=TRACE_SLOW_MS) if TRACE_LOG_PATH else None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    engine.load()
-    catalog_size = len(engine.transformer.movie_catalog)
-    tmdb_status = "configurado" if engine.tmdb.is_configured else "no configurado (set TMDB_API_KEY)"
-    print(
-        f"Modelo cargado ({engine.model_type}) - Catalogo: {catalog_size:,} peliculas | TMDb: {tmdb_status}"
-    )
+    # La carga y el calentamiento corren en segundo plano: /health y /ready responden ya.
+    startup.start()
     yield
+    reloader.stop_watch()
+    executor.shutdown()
+    if trace_log is not None:
+        trace_log.close()
     engine.tmdb.flush_cache()
 
 
@@ -38,6 +150,81 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+
+# Rutas que necesitan el motor cargado; mientras tanto 503 en lugar de un error interno.
+ENGINE_PATHS = ("/recommend", "/movies", "/model/")
+
+
+@app.middleware("http")
+async def require_loaded(request: Request, call_next):
+    if not engine.is_loaded and request.url.path.startswith(ENGINE_PATHS):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Modelo cargando, reintenta en unos segundos."},
+            headers={"Retry-After": "5"},
+        )
+    return await call_next(request)
+
+
+def _request_trace(request: Request) -> Trace:
+    trace = request.state.trace = Trace()
+    return trace
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    trace = getattr(request.state, "trace", None)
+    if trace is None:
+        return response
+    elapsed = time.perf_counter() - started
+    response.headers["Server-Timing"] = trace.server_timing(elapsed)
+    if trace_log is not None:
+        trace_log.record(elapsed * 1000, {
+            "method": request.method,
+            "path": request.url.path,
+            "query": request.url.query,
+            "status": response.status_code,
+            **trace.to_dict(),
+        })
+    return response
+
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    cache_control = CONDITIONAL_PATHS.get(request.url.path)
+    version = engine.content_version
+    if request.method not in ("GET", "HEAD") or cache_control is None or version is None:
+        return await call_next(request)
+
+    headers = {"ETag": make_etag(version), "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Plantilla de la ruta (/movies/search), no la URL concreta, para acotar las series.
+    route = request.scope.get("route")
+    if route is not None:
+        path = route.path
+    else:
+        # Los 304 de conditional_get no llegan al router.
+        path = request.url.path if request.url.path in CONDITIONAL_PATHS else "unmatched"
+    HTTP_REQUESTS.inc(method=request.method, path=path, status=response.status_code)
+    HTTP_SECONDS.observe(time.perf_counter() - started, method=request.method, path=path)
+    return response
+
+
+# Starlette ejecuta primero el ultimo middleware anadido: CORS queda por fuera de
+# conditional_get y tambien los 304 llevan sus cabeceras.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -46,43 +233,261 @@ app.add_middleware(
 )
 
 
+@REGISTRY.collector
+def _engine_metrics():
+    current = engine
+    loaded = current.is_loaded
+    cache = current.result_cache.stats()
+    budget = current.candidate_budget.stats()
+    pool = executor.stats()
+    metrics = [
+        ("movia_model_loaded", "gauge", "1 si el modelo esta cargado.", [({}, int(loaded))]),
+        ("movia_catalog_size", "gauge", "Peliculas en el catalogo.",
+         [({}, len(current.transformer.movie_catalog) if loaded else 0)]),
+        ("movia_recommend_cache_entries", "gauge", "Entradas en la cache de recomendaciones.",
+         [({}, cache["size"])]),
+        ("movia_recommend_cache_hits_total", "counter", "Aciertos de la cache de recomendaciones.",
+         [({}, cache["hits"])]),
+        ("movia_recommend_cache_misses_total", "counter", "Fallos de la cache de recomendaciones.",
+         [({}, cache["misses"])]),
+        ("movia_recommend_cache_hit_ratio", "gauge", "Ratio de aciertos de la cache.",
+         [({}, cache["hit_ratio"])]),
+        ("movia_tmdb_poster_cache_entries", "gauge", "Posters en la cache local de TMDb.",
+         [({}, current.tmdb.cache_size)]),
+        ("movia_executor_queued", "gauge", "Llamadas esperando en el executor.",
+         [({}, pool["queued"])]),
+        ("movia_executor_running", "gauge", "Llamadas ejecutandose en el executor.",
+         [({}, pool["running"])]),
+        ("movia_executor_rejected_total", "counter", "Llamadas rechazadas por cola llena.",
+         [({}, pool["rejected"])]),
+        ("movia_budget_cost_fixed_ms", "gauge", "Coste fijo estimado de una recomendacion.",
+         [({}, budget["fixed_ms"])]),
+        ("movia_budget_cost_per_candidate_us", "gauge", "Coste estimado por candidato.",
+         [({}, budget["per_candidate_us"])]),
+        ("movia_model_reloads_total", "counter", "Recargas de modelo completadas.",
+         [({}, reloader.reloads)]),
+    ]
+    if trace_log is not None:
+        metrics += [
+            ("movia_trace_log_written_total", "counter", "Trazas lentas escritas.",
+             [({}, trace_log.written)]),
+            ("movia_trace_log_dropped_total", "counter", "Trazas descartadas por cola llena.",
+             [({}, trace_log.dropped)]),
+        ]
+    if loaded:
+        metrics.append(("movia_model_info", "gauge", "Modelo servido.",
+                        [({"model_type": current.model_type,
+                           "version": current.model_version}, 1)]))
+    return metrics
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor saturado, reintenta mas tarde."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _recommend_response(result: dict) -> RecommendResponse:
+    return RecommendResponse(
+        recommendations=[MovieRecommendation(**r) for r in result["recommendations"]],
+        seed_movies=result["seed_movies"],
+        user_profile_summary=result["user_profile_summary"],
+        n_candidates=result["n_candidates"],
+        fallback=result["fallback"],
+    )
+
+
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend(req: RecommendRequest):
+async def recommend(req: RecommendRequest, request: Request, response: Response):
+    started = time.perf_counter()
+    current = engine
+    trace = _request_trace(request)
     try:
-        result = engine.recommend(req.movie_ids, top_n=3)
+        result = await executor.run(
+            current.recommend, req.movie_ids, top_n=req.top_n, n_candidates=req.n_candidates,
+            retriever=req.retriever, latency_budget_ms=req.latency_budget_ms,
+            started_at=started, trace=trace,
+        )
+    except ExecutorSaturated:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
-    return RecommendResponse(
-        recommendations=[MovieRecommendation(**r) for r in result["recommendations"]],
-        seed_movies=result["seed_movies"],
-        user_profile_summary=result["user_profile_summary"],
-    )
+    # Mismo contenido mientras no cambien los artefactos, salvo el fallback o el recorte
+    # de candidatos por presupuesto.
+    if not result["fallback"] and result["n_candidates"] == req.n_candidates:
+        response.headers["ETag"] = make_etag(
+            current.content_version, sorted(req.movie_ids), req.top_n, req.n_candidates,
+            req.retriever or current.retriever,
+        )
+    return _recommend_response(result)
+
+
+@app.post("/recommend/batch", response_model=RecommendBatchResponse)
+async def recommend_batch(req: RecommendBatchRequest):
+    try:
+        results = await executor.run(
+            engine.recommend_batch, req.seed_sets, top_n=req.top_n,
+            n_candidates=req.n_candidates, retriever=req.retriever,
+        )
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+    return RecommendBatchResponse(results=[_recommend_response(r) for r in results])
+
+
+def facet_filters(
+    genre: list[str] | None = Query(None, description="Generos (todos a la vez); repetible."),
+    lang: list[str] | None = Query(None, description="Idiomas originales (cualquiera); repetible."),
+    year_min: int | None = Query(None),
+    year_max: int | None = Query(None),
+    min_vote: float | None = Query(None, ge=0, le=10),
+    exclude_cold: bool = Query(False),
+) -> dict:
+    return clean_filters(genre, lang, year_min, year_max, min_vote, exclude_cold)
 
 
 @app.get("/movies", response_model=MovieListResponse)
-def list_movies(
+async def list_movies(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    sort: str = Query("popularity", pattern="^(" + "|".join(SORT_KEYS) + ")$"),
+    cursor: str | None = Query(None, description="next_cursor de la pagina anterior; ignora page."),
+    filters: dict = Depends(facet_filters),
+):
+    try:
+        body = await executor.run(
+            engine.list_movies_json, page=page, page_size=page_size, sort=sort, cursor=cursor,
+            filters=filters, trace=_request_trace(request),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Bytes ya serializados: se evita validar cada MovieItem en cada peticion.
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/movies/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=AUTOCOMPLETE_MAX),
 ):
-    data = engine.list_movies(page=page, page_size=page_size)
+    # Unos microsegundos sin I/O: se resuelve en el event loop, sin pasar por el executor.
+    return AutocompleteResponse(prefix=prefix, suggestions=engine.autocomplete(prefix, limit))
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "arrow": "application/vnd.apache.arrow.stream"}
+
+
+@app.get("/movies/export")
+def export_movies(
+    fields: str | None = Query(None, description="Campos separados por comas."),
+    min_log_popularity: float | None = Query(None),
+    max_log_popularity: float | None = Query(None),
+    is_cold: bool | None = Query(None),
+    format: str = Query("ndjson", pattern="^(ndjson|arrow)$"),
+):
+    current = engine
+    if not current.is_loaded:
+        raise HTTPException(status_code=503, detail="Modelo aun no cargado.")
+    # Un stream dura lo que tarde el cliente: no ocupa el pool de inferencia, tiene su cupo.
+    if not export_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Demasiadas exportaciones en curso.",
+                            headers={"Retry-After": "5"})
+    try:
+        chunks = current.export_movies(
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            min_log_popularity=min_log_popularity, max_log_popularity=max_log_popularity,
+            is_cold=is_cold, fmt=format,
+        )
+    except ValueError as e:
+        export_slots.release()
+        raise HTTPException(status_code=400, detail=str(e))
+    slot = _ExportSlot(export_slots)
+    # El generador produce un bloque de filas cada vez: memoria constante.
+    body = _stream_export(chunks, slot)
+    # Si el cliente corta antes de que empiece la iteracion, el finally del generador no corre:
+    # la tarea de fondo o, en ultimo caso, el finalizador del cuerpo devuelven el cupo.
+    weakref.finalize(body, slot.release)
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[format],
+                             background=BackgroundTask(slot.release))
+
+
+class _ExportSlot:
+    """Cupo de exportacion tomado; se devuelve una sola vez, lo libere quien lo libere."""
+
+    def __init__(self, slots: threading.BoundedSemaphore):
+        self._slots = slots
+        self._lock = threading.Lock()
+        self._held = True
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self._slots.release()
+
+
+async def _stream_export(chunks, slot: _ExportSlot):
+    # El finally corre tambien si el cliente corta la descarga (cancelacion del stream).
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        slot.release()
+
+
+@app.get("/movies/search", response_model=MovieListResponse)
+async def search_movies(
+    request: Request,
+    q: str | None = Query(None, min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    fuzzy: bool = Query(False),
+    cursor: str | None = Query(None, description="next_cursor de la pagina anterior; ignora page."),
+    filters: dict = Depends(facet_filters),
+):
+    if q is None and not cursor:
+        raise HTTPException(status_code=422, detail="Falta q (o cursor).")
+    try:
+        data = await executor.run(engine.search_movies, q, page=page, page_size=page_size,
+                                  fuzzy=fuzzy, cursor=cursor, filters=filters,
+                                  trace=_request_trace(request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return MovieListResponse(
         movies=[MovieItem(**m) for m in data["movies"]],
         total=data["total"],
         page=data["page"],
         page_size=data["page_size"],
+        next_cursor=data["next_cursor"],
+        facets=data["facets"],
     )
 
 
-@app.get("/movies/search", response_model=MovieListResponse)
-def search_movies(
-    q: str = Query(..., min_length=1),
+@app.get("/movies/text-search", response_model=MovieListResponse)
+async def text_search(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Texto libre sobre sinopsis y keywords."),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
 ):
-    data = engine.search_movies(q, page=page, page_size=page_size)
+    current = engine
+    if current.transformer.text_index is None:
+        raise HTTPException(status_code=503,
+                            detail="Indice de texto no disponible: ejecuta build_text_index.py.")
+    data = await executor.run(current.text_search, q, page=page, page_size=page_size,
+                              trace=_request_trace(request))
     return MovieListResponse(
         movies=[MovieItem(**m) for m in data["movies"]],
         total=data["total"],
@@ -93,24 +498,81 @@ def search_movies(
 
 @app.get("/health", response_model=HealthResponse)
 def health():
-    return HealthResponse(
-        status="ok" if engine.is_loaded else "loading",
-        model_loaded=engine.is_loaded,
-        catalog_size=len(engine.transformer.movie_catalog) if engine.is_loaded else 0,
+    """Liveness: 200 mientras carga o sirve; 503 si el arranque fallo (hay que reiniciar)."""
+    current = engine
+    failed = startup.phase == "failed"
+    body = HealthResponse(
+        status="failed" if failed else "ok" if current.is_loaded else "loading",
+        model_loaded=current.is_loaded,
+        catalog_size=len(current.transformer.movie_catalog) if current.is_loaded else 0,
+        ready=startup.is_ready,
     )
+    if failed:
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
+
+
+@app.get("/ready", response_model=ReadinessResponse)
+def ready():
+    """Readiness: 200 solo cuando el motor esta cargado y caliente; si no, 503."""
+    body = ReadinessResponse(ready=startup.is_ready, **startup.status())
+    if not body.ready:
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
 
 
 @app.get("/model/info", response_model=ModelInfoResponse)
 def model_info():
-    if not engine.is_loaded:
+    current = engine
+    if not current.is_loaded:
         raise HTTPException(status_code=503, detail="Modelo aun no cargado.")
-    meta = engine.metadata
+    meta = current.metadata
     return ModelInfoResponse(
-        model_type=meta.get("model_type", engine.model_type),
+        model_type=meta.get("model_type", current.model_type),
         training_date=meta.get("training_date", "unknown"),
         n_features=meta.get("n_features", 0),
         test_auc_roc=meta.get("metrics", {}).get("test", {}).get("auc_roc", 0),
         test_f1=meta.get("metrics", {}).get("test", {}).get("f1", 0),
         best_hyperparams=meta.get("best_hyperparams", {}),
-        catalog_size=len(engine.transformer.movie_catalog),
+        catalog_size=len(current.transformer.movie_catalog),
+        model_version=current.model_version,
+        recommend_cache=current.result_cache.stats(),
+        latency_budget={
+            "default_ms": current.latency_budget_ms,
+            **current.candidate_budget.stats(),
+        },
+        reload=reloader.status(),
+        ensemble=current.ensemble_stats(),
+        executor=executor.stats(),
+        micro_batch=current.batcher.stats() if current.batcher else {},
     )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _check_admin(token: str):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Recarga deshabilitada: define ADMIN_TOKEN.")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administracion invalido.")
+
+
+@app.post("/admin/reload", response_model=ReloadStatusResponse, status_code=202)
+def reload_model(x_admin_token: str = Header("")):
+    _check_admin(x_admin_token)
+    # Recargar durante el arranque cargaria y calentaria dos motores a la vez.
+    if not startup.is_ready:
+        raise HTTPException(status_code=503, detail="Modelo cargando, reintenta en unos segundos.",
+                            headers={"Retry-After": "5"})
+    if not reloader.trigger("admin"):
+        raise HTTPException(status_code=409, detail="Ya hay una recarga en curso.")
+    return ReloadStatusResponse(model_version=engine.model_version, **reloader.status())
+
+
+@app.get("/admin/reload", response_model=ReloadStatusResponse)
+def reload_status(x_admin_token: str = Header("")):
+    _check_admin(x_admin_token)
+    return ReloadStatusResponse(model_version=engine.model_version, **reloader.status())
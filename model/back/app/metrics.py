@@ -0,0 +1,161 @@
+import bisect
+import math
+import threading
+
+# Buckets de latencia (segundos): de 0.1 ms a 10 s.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt(value) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, ([*c], s, n)) for k, (c, s, n) in self._series.items())
+        lines = self.header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip([*self.buckets, math.inf], counts):
+                cumulative += c
+                le = _labels(self.labelnames, key, [("le", _fmt(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    """Registro en proceso con salida en formato de texto de Prometheus 0.0.4.
+
+    Ademas de contadores e histogramas admite colectores: funciones que en
+    cada scrape devuelven ``(nombre, tipo, ayuda, [(labels, valor), ...])``
+    para gauges que se leen del estado actual (motor, executor, caches).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            for name, type_, help, samples in fn():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {type_}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels, labels.values())} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "movia_recommend_stage_seconds", "Duracion de cada etapa de /recommend.", ["stage"],
+)
+RECOMMENDATIONS = REGISTRY.counter(
+    "movia_recommendations_total", "Recomendaciones servidas por origen.", ["source"],
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "movia_http_requests_total", "Peticiones HTTP por ruta y codigo.", ["method", "path", "status"],
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "movia_http_request_seconds", "Latencia HTTP por ruta.", ["method", "path"],
+)
+TMDB_REQUESTS = REGISTRY.counter(
+    "movia_tmdb_requests_total", "Llamadas a la API de TMDb por resultado.", ["outcome"],
+)
+TMDB_SECONDS = REGISTRY.histogram(
+    "movia_tmdb_request_seconds", "Latencia de las llamadas a TMDb.",
+)
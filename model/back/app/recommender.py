@@ -1,3 +1,7 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import xgboost as xgb
 import json
@@ -10,37 +14,114 @@ except Exception:
     lgb = None
 
 from src.feature_engineering import FeatureTransformer
+from src.text_index import TEXT_INDEX_DIR, TEXT_META
+from app.batcher import MicroBatcher
+from app.budget import CandidateBudget
+from app.cache import TTLCache
+from app.catalog_pages import (
+    CatalogPager, DEFAULT_EXPORT_FIELDS, EXPORT_FIELDS, InvalidCursor, export_chunks,
+)
+from app.compiled_model import CompiledEnsemble
+from app.facets import FacetIndex, clean_filters, filters_key
+from app.metrics import RECOMMENDATIONS, STAGE_SECONDS
+from app.search_index import TitleIndex, decode_search_cursor, encode_search_cursor, normalize
 from app.tmdb_service import TMDbService
+from app.tracing import Trace
+
+# Filas candidatas (sets x n_candidates) por llamada al modelo en recommend_batch:
+# acota la matriz de features (~37 MB en float32 con ~92 columnas) sea cual sea n_candidates.
+BATCH_CHUNK_ROWS = 100_000
+# Tamano del ranking de popularidad precalculado para el fallback sin modelo.
+POPULAR_POOL = 1000
+ENSEMBLE_BACKENDS = ("xgboost", "lightgbm", "random_forest")
 
 
 class RecommenderEngine:
 
-    def __init__(self, artifacts_dir: str = "artifacts", model_type: str = "xgboost"):
+    def __init__(self, artifacts_dir: str = "artifacts", model_type: str = "xgboost",
+                 cache_size: int = 1024, cache_ttl: float = 600.0, retriever: str = "genre",
+                 latency_budget_ms: float = 0.0, ensemble_weights: dict | None = None,
+                 model_threads: int = 0, micro_batch_window_ms: float = 0.0,
+                 micro_batch_max: int = 32, catalog_store_dir: str | None = None,
+                 page_cache_size: int = 256, search_cache_size: int = 128):
         self.artifacts_dir = Path(artifacts_dir)
         self.model_type = (model_type or "xgboost").strip().lower()
+        self.retriever = (retriever or "genre").strip().lower()
+        self.ensemble_weights = {b: 1.0 for b in ENSEMBLE_BACKENDS}
+        if ensemble_weights:
+            self.ensemble_weights = {b: float(ensemble_weights.get(b, 0.0)) for b in ENSEMBLE_BACKENDS}
+        self.model_threads = model_threads
+        self.catalog_store_dir = catalog_store_dir or None
+        # Ventana > 0 activa el agrupado de predicciones concurrentes.
+        self.batcher = None
+        if micro_batch_window_ms > 0:
+            self.batcher = MicroBatcher(self._predict_positive_proba,
+                                        window_ms=micro_batch_window_ms,
+                                        max_batch=micro_batch_max)
         self.model = None
+        self.members = {}
+        self.member_metadata = {}
+        self._member_stats = {}
+        self._stats_lock = threading.Lock()
+        self._pool = None
+        self._closed = False
+        # Durante warmup() no se registran metricas: las llamadas son sinteticas.
+        self._warming = False
         self.transformer = None
         self.metadata = None
+        self.model_version = None
         self.tmdb = TMDbService(cache_dir=str(Path(artifacts_dir) / "cache"))
+        self.result_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.page_cache_size = page_cache_size
+        # Ids ordenados de las ultimas consultas: las paginas siguientes son slices.
+        self.search_cache = TTLCache(maxsize=search_cache_size, ttl=0)
+        self.pager = None
+        self.search_index = None
+        self.facets = None
+        self._suggestions = None
+        self.latency_budget_ms = latency_budget_ms
+        self.candidate_budget = CandidateBudget()
+        self._popular_ids = np.empty(0, dtype=np.int64)
+        self.load_timings = {}
         self._loaded = False
 
-    def _resolve_model_path(self) -> Path:
+    def _resolve_model_path(self, model_type: str | None = None) -> Path:
+        model_type = model_type or self.model_type
         model_dir = self.artifacts_dir / "model"
-        if self.model_type == "xgboost":
+        if model_type == "xgboost":
             return model_dir / "xgboost_recommender.ubj"
-        if self.model_type == "lightgbm":
+        if model_type == "lightgbm":
             return model_dir / "lightgbm_recommender.txt"
-        if self.model_type == "random_forest":
+        if model_type == "random_forest":
             return model_dir / "random_forest_recommender.joblib"
+        if model_type == "compiled":
+            return model_dir / "compiled_recommender.npz"
         raise ValueError(
-            f"model_type invalido: {self.model_type}. Usa 'xgboost', 'lightgbm' o 'random_forest'."
+            f"model_type invalido: {model_type}. "
+            "Usa 'xgboost', 'lightgbm', 'random_forest', 'compiled' o 'ensemble'."
         )
 
-    def _resolve_metadata_path(self) -> Path:
+    def _model_paths(self) -> dict[str, Path]:
+        if self.model_type != "ensemble":
+            return {self.model_type: self._resolve_model_path()}
+        paths = {}
+        for backend in ENSEMBLE_BACKENDS:
+            path = self._resolve_model_path(backend)
+            if self.ensemble_weights.get(backend, 0) <= 0 or not path.exists():
+                continue
+            if backend == "lightgbm" and lgb is None:
+                continue
+            paths[backend] = path
+        return paths
+
+    def _resolve_metadata_path(self, backend: str | None = None) -> Path:
         md = self.artifacts_dir / "metadata"
-        if self.model_type == "lightgbm":
+        backend = backend or self.model_type
+        if backend == "compiled":
+            backend = self.model.source
+        if backend == "lightgbm":
             candidates = [md / "training_metadata_lightgbm.json", md / "training_metadata.json"]
-        elif self.model_type == "random_forest":
+        elif backend == "random_forest":
             candidates = [md / "training_metadata_random_forest.json", md / "training_metadata.json"]
         else:
             candidates = [md / "training_metadata_xgboost.json", md / "training_metadata.json"]
@@ -48,45 +129,245 @@ class RecommenderEngine:
         for p in candidates:
             if p.exists():
                 return p
-        raise FileNotFoundError(f"No se encontro metadata para model_type={self.model_type} en {md}")
-
-    def load(self):
-        model_path = self._resolve_model_path()
-        if not model_path.exists():
-            raise FileNotFoundError(f"No se encontro el artefacto del modelo: {model_path}")
-
-        if self.model_type == "xgboost":
-            self.model = xgb.XGBClassifier()
-            self.model.load_model(str(model_path))
-        elif self.model_type == "lightgbm":
+        raise FileNotFoundError(f"No se encontro metadata para model_type={backend} en {md}")
+
+    def _load_metadata(self, backend: str | None = None) -> dict:
+        with open(self._resolve_metadata_path(backend), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_backend(self, model_type: str, model_path: Path):
+        # model_threads > 0 limita los hilos internos de la libreria (0 = su valor por defecto).
+        threads = self.model_threads or None
+        if model_type == "xgboost":
+            model = xgb.XGBClassifier(n_jobs=threads)
+            model.load_model(str(model_path))
+            return model
+        if model_type == "lightgbm":
             if lgb is None:
                 raise RuntimeError(
                     "lightgbm no esta instalado. Instala dependencias o usa MODEL_TYPE=xgboost."
                 )
-            self.model = lgb.Booster(model_file=str(model_path))
-        elif self.model_type == "random_forest":
-            self.model = joblib.load(model_path)
+            return lgb.Booster(model_file=str(model_path))
+        if model_type == "random_forest":
+            model = joblib.load(model_path)
+            if threads:
+                model.set_params(n_jobs=threads)
+            return model
+        return CompiledEnsemble.load(model_path)
+
+    def load(self):
+        # Duracion (s) de cada fase de la carga, para el log de arranque.
+        timings = {}
+        t0 = time.perf_counter()
+        model_paths = self._model_paths()
+        if not model_paths:
+            raise FileNotFoundError(
+                f"No se encontro ningun modelo para el ensamble en {self.artifacts_dir / 'model'}"
+            )
+        for model_path in model_paths.values():
+            if not model_path.exists():
+                raise FileNotFoundError(f"No se encontro el artefacto del modelo: {model_path}")
+
+        if self.model_type == "ensemble":
+            self.members = {b: self._load_backend(b, p) for b, p in model_paths.items()}
+            self.model = self.members
+            self._member_stats = {b: {"calls": 0, "total_ms": 0.0, "last_ms": 0.0}
+                                  for b in self.members}
+            self._pool = ThreadPoolExecutor(max_workers=len(self.members),
+                                            thread_name_prefix="ensemble")
+        else:
+            self.model = self._load_backend(self.model_type, model_paths[self.model_type])
+        timings["model"] = time.perf_counter() - t0
 
+        t0 = time.perf_counter()
         trans_path = self.artifacts_dir / "transformers"
-        self.transformer = FeatureTransformer.load(trans_path)
+        self.transformer = FeatureTransformer.load(trans_path, store_dir=self.catalog_store_dir)
+        if self.retriever == "ann":
+            # Construye el indice al arrancar si no vino en los artefactos.
+            self.transformer.ann_index
+        timings["catalog"] = time.perf_counter() - t0
+
+        if self.model_type == "ensemble":
+            self.member_metadata = {b: self._load_metadata(b) for b in self.members}
+            first = next(iter(self.member_metadata.values()))
+            self.metadata = {
+                "model_type": "ensemble",
+                "training_date": max(m.get("training_date", "") for m in self.member_metadata.values()),
+                "n_features": first.get("n_features", 0),
+            }
+        else:
+            self.metadata = self._load_metadata()
 
-        meta_path = self._resolve_metadata_path()
-        with open(meta_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        t0 = time.perf_counter()
+        cat = self.transformer.movie_catalog
+        top = np.argsort(-cat["log_popularity"].fillna(-np.inf).values, kind="stable")
+        self._popular_ids = cat.index.values[top[:POPULAR_POOL]]
+        self.pager = CatalogPager(cat, cache_size=self.page_cache_size)
+        popular_order = self.pager.orders["popularity"][0]
+        titles = cat["title"].to_numpy()[popular_order]
+        self.search_index = TitleIndex(titles)
+        self.facets = FacetIndex(cat, cache_size=self.page_cache_size)
+        # Campos de las sugerencias en orden de popularidad, como listas para no tocar pandas.
+        rows = cat.iloc[popular_order]
+        self._suggestions = (
+            rows.index.to_numpy().tolist(),
+            [str(t) for t in titles],
+            np.nan_to_num(rows["movie_year"].to_numpy(dtype=np.float64)).astype(int).tolist(),
+            np.round(np.expm1(rows["log_popularity"].to_numpy(dtype=np.float64)), 2).tolist(),
+        )
+        timings["indexes"] = time.perf_counter() - t0
 
+        self.model_version = self._compute_model_version(list(model_paths.values()))
+        self.result_cache.clear()
+        self.search_cache.clear()
+        self.load_timings = timings
         self._loaded = True
 
+    def _compute_model_version(self, model_paths: list[Path]) -> str:
+        trans_path = self.artifacts_dir / "transformers"
+        h = hashlib.sha1(self.model_type.encode())
+        text_meta = trans_path / TEXT_INDEX_DIR / TEXT_META
+        for p in [*model_paths, trans_path / "transformer_meta.json", trans_path / "movie_catalog.parquet",
+                  *([text_meta] if text_meta.exists() else [])]:
+            st = p.stat()
+            h.update(f"{p.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        return h.hexdigest()[:12]
+
+    def artifact_version(self) -> str | None:
+        """Huella de los artefactos en disco; distinta de model_version si cambiaron."""
+        try:
+            return self._compute_model_version(list(self._model_paths().values()))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def warmup(self, n_sets: int = 3) -> dict:
+        """Llamadas sinteticas antes de servir; devuelve la duracion (s) de cada parte.
+
+        Deja las caches llenas pero sin contar sus aciertos/fallos ni las
+        metricas de Prometheus de estas llamadas.
+        """
+        self._warming = True
+        try:
+            return self._warmup(n_sets)
+        finally:
+            self._warming = False
+            for cache in (self.result_cache, self.search_cache, self.pager.cache):
+                cache.reset_stats()
+
+    def _warmup(self, n_sets):
+        timings = {}
+        t0 = time.perf_counter()
+        # Cualquier peticion puede pedir retriever="ann": sin movie_ann.npz el indice se
+        # construye aqui y no en la primera peticion que lo use.
+        self.transformer.ann_index
+        # Sets de peliculas populares: ejercita retriever, transform y modelo antes de servir.
+        for i in range(n_sets):
+            seeds = [int(m) for m in self._popular_ids[i * 5:(i + 1) * 5]]
+            if len(seeds) == 5:
+                self.recommend(seeds)
+        timings["recommend"] = time.perf_counter() - t0
+
+        # Busqueda y primeras paginas: indices de texto, cache de paginas y posters populares.
+        t0 = time.perf_counter()
+        titles = self.transformer.movie_catalog["title"]
+        for mid in self._popular_ids[:n_sets]:
+            words = str(titles.loc[mid]).split()
+            if words:
+                self.search_movies(words[0])
+        timings["search"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for page in range(1, n_sets + 1):
+            self.list_movies_json(page=page)
+        self.tmdb.flush_cache()
+        timings["list"] = time.perf_counter() - t0
+        return timings
+
+    def close(self):
+        """Libera los hilos del ensemble y del micro-batching (motor reemplazado en una recarga).
+
+        No espera: las peticiones que aun usan este motor terminan sin esos hilos.
+        """
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        if self.batcher is not None:
+            self.batcher.close()
+
     @property
     def is_loaded(self) -> bool:
         return self._loaded
 
-    def _predict_positive_proba(self, X_np: np.ndarray) -> np.ndarray:
-        if self.model_type == "xgboost":
-            return self.model.predict_proba(X_np)[:, 1]
-        if self.model_type == "random_forest":
-            return self.model.predict_proba(X_np)[:, 1]
+    @property
+    def content_version(self) -> str | None:
+        """Version de lo que devuelven los endpoints de lectura; base de los ETag."""
+        if not self._loaded:
+            return None
+        # Con TMDb los posters se resuelven poco a poco y tambien cambian las respuestas.
+        if self.tmdb.is_configured:
+            return f"{self.model_version}.{self.tmdb.cache_size}"
+        return self.model_version
 
-        probs = self.model.predict(X_np)
+    def _predict_positive_proba(self, X_np: np.ndarray) -> np.ndarray:
+        if self.model_type == "ensemble":
+            return self._predict_ensemble(X_np)
+        return self._predict_backend(self.model_type, self.model, X_np)
+
+    def _predict_ensemble(self, X_np):
+        # Las librerias nativas liberan el GIL: el coste es el del miembro mas lento.
+        try:
+            futures = {b: self._pool.submit(self._timed_predict, b, m, X_np)
+                       for b, m in self.members.items()}
+            probs = {b: f.result() for b, f in futures.items()}
+        except RuntimeError:
+            if not self._closed:
+                raise
+            # Motor ya reemplazado: las peticiones que seguian en curso predicen en serie.
+            probs = {b: self._timed_predict(b, m, X_np) for b, m in self.members.items()}
+        total = sum(self.ensemble_weights[b] for b in probs)
+        blended = np.zeros(len(X_np), dtype=np.float64)
+        for b, p in probs.items():
+            blended += self.ensemble_weights[b] / total * p
+        return blended.astype(np.float32)
+
+    def _timed_predict(self, backend, model, X_np):
+        t0 = time.perf_counter()
+        probs = self._predict_backend(backend, model, X_np)
+        ms = (time.perf_counter() - t0) * 1000
+        stats = self._member_stats[backend]
+        with self._stats_lock:
+            stats["calls"] += 1
+            stats["total_ms"] += ms
+            stats["last_ms"] = ms
+        return probs
+
+    def ensemble_stats(self) -> dict:
+        if self.model_type != "ensemble" or not self._loaded:
+            return {}
+        total = sum(self.ensemble_weights[b] for b in self.members)
+        out = {}
+        with self._stats_lock:
+            for b, stats in self._member_stats.items():
+                test = self.member_metadata[b].get("metrics", {}).get("test", {})
+                out[b] = {
+                    "weight": round(self.ensemble_weights[b] / total, 4),
+                    "test_auc_roc": test.get("auc_roc", 0),
+                    "calls": stats["calls"],
+                    "last_ms": round(stats["last_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                }
+        return out
+
+    def _predict_backend(self, model_type, model, X_np):
+        if model_type == "xgboost":
+            return model.predict_proba(X_np)[:, 1]
+        if model_type == "random_forest":
+            return model.predict_proba(X_np)[:, 1]
+        if model_type == "compiled":
+            return model.predict_proba(X_np).astype(np.float32, copy=False)
+
+        kwargs = {"num_threads": self.model_threads} if self.model_threads else {}
+        probs = model.predict(X_np, **kwargs)
         probs_np = np.asarray(probs, dtype=np.float32)
         if probs_np.ndim == 2 and probs_np.shape[1] >= 2:
             return probs_np[:, 1]
@@ -118,46 +399,196 @@ class RecommenderEngine:
             d["popularity"] = round(float(np.expm1(cat_row.get("log_popularity", 0))), 2)
         return d
 
-    def recommend(self, movie_ids: list[int], top_n: int = 3,
-                  n_candidates: int = 500) -> dict:
+    def _cache_key(self, movie_ids, top_n, n_candidates, retriever):
+        return (tuple(sorted(movie_ids)), top_n, n_candidates, retriever, self.model_version)
+
+    @staticmethod
+    def _with_seed_order(result, movie_ids):
+        # La clave ignora el orden de las semillas; se respeta el de la peticion.
+        by_id = {s["movie_id"]: s for s in result["seed_movies"]}
+        seeds = [by_id[m] for m in movie_ids if m in by_id]
+        return {**result, "seed_movies": seeds}
+
+    def recommend(self, movie_ids: list[int], top_n: int = 3, n_candidates: int = 500,
+                  retriever: str | None = None, latency_budget_ms: float | None = None,
+                  started_at: float | None = None, trace: Trace | None = None) -> dict:
+        """``trace`` (opcional) recibe la duracion de cada etapa y los candidatos usados."""
         if not self._loaded:
             raise RuntimeError("El motor no esta cargado. Llama a load() primero.")
 
+        # started_at (perf_counter) permite descontar la espera en cola del presupuesto.
+        started = started_at or time.perf_counter()
+        trace = trace or Trace()
+        t0 = time.perf_counter()
+        misses = self.tmdb.thread_misses
+        retriever = retriever or self.retriever
+        budget_ms = self.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        key = self._cache_key(movie_ids, top_n, n_candidates, retriever)
+        with trace.stage("cache_lookup"):
+            cached = self.result_cache.get(key)
+        if cached is not None:
+            self._count_recommendations(source="cache")
+            trace.info["cache"] = "hit"
+            self._observe_stages(trace, t0, misses)
+            return self._with_seed_order(cached, movie_ids)
+
+        trace.info["cache"] = "miss"
+        remaining = budget_ms / 1000 - (time.perf_counter() - started) if budget_ms else None
+        chosen = self.candidate_budget.choose(n_candidates, remaining)
+        if chosen == 0:
+            with trace.stage("enrich"):
+                result = self._popularity_recommendation(movie_ids, top_n)
+            self._count_recommendations(source="popularity")
+        else:
+            t1 = time.perf_counter()
+            [(cand_info, probs)] = self._score_seed_sets([movie_ids], chosen, retriever,
+                                                         timings=trace.stages)
+            # El modelo de coste mide solo el scoring: el enriquecimiento no escala con candidatos.
+            self.candidate_budget.observe(len(probs), time.perf_counter() - t1)
+            with trace.stage("enrich"):
+                result = self._build_recommendation(movie_ids, cand_info, probs, top_n)
+            # Solo se cachean respuestas calculadas con todos los candidatos pedidos.
+            if chosen == n_candidates:
+                self.result_cache.put(key, result)
+            self._count_recommendations(source="model")
+        trace.info["n_candidates"] = result["n_candidates"]
+        with trace.stage("flush_cache"):
+            self.tmdb.flush_cache()
+        self._observe_stages(trace, t0, misses)
+        return result
+
+    def _observe_stages(self, trace, t0, misses):
+        trace.stages["total"] = time.perf_counter() - t0
+        trace.info["tmdb_misses"] = self.tmdb.thread_misses - misses
+        if self._warming:
+            return
+        for stage, seconds in trace.stages.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def _count_recommendations(self, n=1, source="model"):
+        if not self._warming:
+            RECOMMENDATIONS.inc(n, source=source)
+
+    def recommend_batch(self, seed_sets: list[list[int]], top_n: int = 3,
+                        n_candidates: int = 500, retriever: str | None = None,
+                        label_errors: bool = True) -> list[dict]:
+        if not self._loaded:
+            raise RuntimeError("El motor no esta cargado. Llama a load() primero.")
+
+        retriever = retriever or self.retriever
+        results = [None] * len(seed_sets)
+        keys = [self._cache_key(ids, top_n, n_candidates, retriever) for ids in seed_sets]
+        pending = []
+        for i, (movie_ids, key) in enumerate(zip(seed_sets, keys)):
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results[i] = self._with_seed_order(cached, movie_ids)
+            else:
+                pending.append(i)
+
+        chunk_sets = max(1, BATCH_CHUNK_ROWS // n_candidates)
+        for start in range(0, len(pending), chunk_sets):
+            idx = pending[start:start + chunk_sets]
+            scored = self._score_seed_sets(
+                [seed_sets[i] for i in idx], n_candidates, retriever,
+                labels=idx if label_errors else None,
+            )
+            for i, (cand_info, probs) in zip(idx, scored):
+                result = self._build_recommendation(seed_sets[i], cand_info, probs, top_n)
+                self.result_cache.put(keys[i], result)
+                results[i] = result
+
+        self._count_recommendations(len(seed_sets) - len(pending), source="cache")
+        self._count_recommendations(len(pending), source="model")
+        if pending:
+            self.tmdb.flush_cache()
+        return results
+
+    def _score_seed_sets(self, seed_sets, n_candidates, retriever, labels=None, timings=None):
+        prepared = []
+        for i, movie_ids in enumerate(seed_sets):
+            try:
+                prepared.append(self.transformer.prepare_inference(
+                    movie_ids, top_n_candidates=n_candidates, retriever=retriever,
+                    timings=timings,
+                ))
+            except ValueError as e:
+                if labels is None:
+                    raise
+                raise ValueError(f"seed_sets[{labels[i]}]: {e}") from e
+
+        sizes = [len(X) for X, _ in prepared]
+        blocks = [X for X, _ in prepared if len(X) > 0]
+        if not blocks:
+            return [(info, np.empty(0, dtype=np.float32)) for _, info in prepared]
+
+        t0 = time.perf_counter()
+        X = np.concatenate(blocks)
+        probs = self.batcher.predict(X) if self.batcher else self._predict_positive_proba(X)
+        if timings is not None:
+            timings["predict"] = timings.get("predict", 0.0) + time.perf_counter() - t0
+        splits = np.split(probs, np.cumsum(sizes)[:-1])
+        return [(info, p) for (_, info), p in zip(prepared, splits)]
+
+    def _popularity_recommendation(self, movie_ids, top_n):
+        valid_seeds = [m for m in movie_ids if m in self.transformer.movie_catalog.index]
+        if not valid_seeds:
+            raise ValueError("Ninguno de los movie_ids proporcionados esta en el catalogo.")
+        pool = self._popular_ids[~np.isin(self._popular_ids, valid_seeds)][:top_n]
+        recommendations = []
+        for mid in pool:
+            rec_dict = self._movie_dict(int(mid))
+            rec_dict["probability"] = 0.0
+            rec_dict["probability_pct"] = "0.0%"
+            recommendations.append(rec_dict)
+        return {
+            "recommendations": recommendations,
+            "seed_movies": [self._movie_dict(mid) for mid in valid_seeds],
+            "user_profile_summary": self._profile_summary(valid_seeds),
+            "n_candidates": 0,
+            "fallback": True,
+        }
+
+    def _build_recommendation(self, movie_ids, cand_info, probs, top_n):
         seed_info = []
         for mid in movie_ids:
             if mid in self.transformer.movie_catalog.index:
                 seed_info.append(self._movie_dict(mid))
 
-        X_cand, cand_info = self.transformer.prepare_inference(
-            movie_ids, top_n_candidates=n_candidates
-        )
-
-        if len(X_cand) == 0:
+        if len(probs) == 0:
             return {
                 "recommendations": [],
                 "seed_movies": seed_info,
                 "user_profile_summary": {},
+                "n_candidates": 0,
+                "fallback": False,
             }
 
-        X_np = np.nan_to_num(X_cand.values.astype(np.float32), nan=0.0)
-        probs = self._predict_positive_proba(X_np)
-        cand_info = cand_info.copy()
-        cand_info["probability"] = probs
-
-        top = cand_info.nlargest(top_n, "probability")
+        # argsort estable sobre -probs: mismo orden que DataFrame.nlargest(keep="first")
+        top = np.argsort(-probs, kind="stable")[:top_n]
+        cand_ids = cand_info["movie_id"].values
 
         recommendations = []
-        for _, r in top.iterrows():
-            mid = int(r["movie_id"])
-            rec_dict = self._movie_dict(mid)
-            rec_dict["probability"] = round(float(r["probability"]), 4)
-            rec_dict["probability_pct"] = f"{float(r['probability'])*100:.1f}%"
+        for i in top:
+            prob = float(probs[i])
+            rec_dict = self._movie_dict(int(cand_ids[i]))
+            rec_dict["probability"] = round(prob, 4)
+            rec_dict["probability_pct"] = f"{prob*100:.1f}%"
             recommendations.append(rec_dict)
 
         valid_seeds = [m for m in movie_ids
                        if m in self.transformer.movie_catalog.index]
+        return {
+            "recommendations": recommendations,
+            "seed_movies": seed_info,
+            "user_profile_summary": self._profile_summary(valid_seeds),
+            "n_candidates": len(probs),
+            "fallback": False,
+        }
+
+    def _profile_summary(self, valid_seeds):
         seed_movies_df = self.transformer.movie_catalog.loc[valid_seeds]
-        profile_summary = {
+        return {
             "avg_vote_average": round(float(seed_movies_df["vote_average"].mean()), 2),
             "avg_popularity": round(float(np.expm1(seed_movies_df["log_popularity"].mean())), 2),
             "avg_runtime": round(float(seed_movies_df["runtime"].mean()), 1),
@@ -167,39 +598,176 @@ class RecommenderEngine:
             )),
         }
 
-        self.tmdb.flush_cache()
+    def _movie_dicts(self, positions) -> list[dict]:
+        """Equivalente a ``_movie_dict(include_popularity=True)`` por columnas, sin iterrows."""
+        if len(positions) == 0:
+            return []
+        # Se toman primero las filas: convertir la columna entera (texto Arrow) es O(catalogo).
+        rows = self.transformer.movie_catalog.iloc[positions]
+        ids = rows.index.to_numpy()
+        titles = rows["title"].to_numpy()
+        genres = rows["_genres_list"].to_numpy()
+        years = np.nan_to_num(rows["movie_year"].to_numpy(dtype=np.float64)).astype(int)
+        votes = rows["vote_average"].to_numpy(dtype=np.float64)
+        pops = np.expm1(rows["log_popularity"].to_numpy(dtype=np.float64))
+        overviews = rows["overview"].to_numpy() if "overview" in rows.columns else [""] * len(rows)
+        return [
+            {
+                "movie_id": int(mid),
+                "title": str(title),
+                "genres": list(g),
+                "year": int(year),
+                "vote_average": round(float(vote), 1),
+                "popularity": round(float(pop), 2),
+                "overview": str(ov) if ov and str(ov) != "nan" else "",
+                "poster": self.tmdb.get_poster_url(int(mid)),
+            }
+            for mid, title, g, year, vote, pop, ov
+            in zip(ids, titles, genres, years, votes, pops, overviews)
+        ]
 
+    def _enrich(self, positions, trace: Trace) -> list[dict]:
+        misses = self.tmdb.thread_misses
+        with trace.stage("enrich"):
+            movies = self._movie_dicts(positions)
+        trace.info["tmdb_misses"] = self.tmdb.thread_misses - misses
+        return movies
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list[dict]:
+        ids, titles, years, pops = self._suggestions
+        return [
+            {"movie_id": ids[r], "title": titles[r], "year": years[r], "popularity": pops[r]}
+            for r in self.search_index.autocomplete(prefix, limit).tolist()
+        ]
+
+    def search_movies(self, query: str | None = None, page: int = 1, page_size: int = 20,
+                      fuzzy: bool = False, cursor: str | None = None, filters: dict | None = None,
+                      trace: Trace | None = None) -> dict:
+        """Pagina de resultados por offset (``page``) o por ``cursor`` (lleva consulta y filtros)."""
+        trace = trace or Trace()
+        q = normalize(query) if query is not None else None
+        filters = clean_filters(**(filters or {}))
+        if cursor:
+            cursor_q, fuzzy, start, version, cursor_filters = decode_search_cursor(cursor)
+            if version != self.model_version:
+                raise InvalidCursor("El cursor pertenece a otra version del catalogo.")
+            if q is not None and q != cursor_q:
+                raise InvalidCursor("El cursor pertenece a otra consulta.")
+            if filters and filters != cursor_filters:
+                raise InvalidCursor("El cursor pertenece a otros filtros.")
+            q, filters = cursor_q, cursor_filters
+        else:
+            start = (page - 1) * page_size
+        q = q or ""
+
+        key = (q, fuzzy, filters_key(filters), self.model_version)
+        with trace.stage("cache_lookup"):
+            cached = self.search_cache.get(key)
+        trace.info["cache"] = "miss" if cached is None else "hit"
+        if cached is None:
+            with trace.stage("match"):
+                # Subcadena literal sin distinguir mayusculas ni acentos: exacto, prefijo y resto
+                # por popularidad. Con ``fuzzy`` se anaden detras los titulos con erratas.
+                ranks = self.search_index.search(q)
+                if fuzzy:
+                    extra = self.search_index.fuzzy_search(q)
+                    ranks = np.concatenate([ranks, extra[~np.isin(extra, ranks)]])
+                matches = self.pager.orders["popularity"][0][ranks]
+            with trace.stage("facets"):
+                mask, facets, _ = self.facets.select(filters, within=matches)
+                if mask is not None:
+                    matches = matches[mask[matches]]
+            cached = (matches, facets)
+            self.search_cache.put(key, cached)
+        matches, facets = cached
+        total = len(matches)
+        trace.info["matches"] = total
+        trace.info["mode"] = "fuzzy" if fuzzy else "literal"
+        end = min(start + page_size, total)
+        next_cursor = None
+        if end < total and end > start:
+            next_cursor = encode_search_cursor(q, fuzzy, end, self.model_version, filters)
         return {
-            "recommendations": recommendations,
-            "seed_movies": seed_info,
-            "user_profile_summary": profile_summary,
+            "movies": self._enrich(matches[start:end], trace),
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "facets": facets,
         }
 
-    def search_movies(self, query: str, page: int = 1, page_size: int = 20) -> dict:
-        cat = self.transformer.movie_catalog
-        mask = cat["title"].str.contains(query, case=False, na=False)
-        results = cat[mask]
-        total = len(results)
+    def text_search(self, query: str, page: int = 1, page_size: int = 20,
+                    trace: Trace | None = None) -> dict:
+        """BM25 sobre overview + keywords; requiere ``transformer.text_index``."""
+        trace = trace or Trace()
         start = (page - 1) * page_size
-        end = start + page_size
-        page_data = results.iloc[start:end]
-        movies = [
-            self._movie_dict(int(mid), row, include_popularity=True)
-            for mid, row in page_data.iterrows()
-        ]
-        return {"movies": movies, "total": total, "page": page, "page_size": page_size}
+        with trace.stage("match"):
+            # Solo se ordenan las ``start + page_size`` mejores (argpartition).
+            positions, _, total = self.transformer.text_index.search(query, k=start + page_size)
+        trace.info["matches"] = total
+        return {
+            "movies": self._enrich(positions[start:], trace),
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+        }
 
-    def list_movies(self, page: int = 1, page_size: int = 20) -> dict:
-        cat = self.transformer.movie_catalog.sort_values(
-            "log_popularity", ascending=False
-        )
-        total = len(cat)
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_data = cat.iloc[start:end]
+    def list_movies(self, page: int = 1, page_size: int = 20, sort: str = "popularity",
+                    cursor: str | None = None, filters: dict | None = None,
+                    trace: Trace | None = None) -> dict:
+        """Pagina del catalogo por offset (``page``) o por keyset (``cursor``), con filtros."""
+        trace = trace or Trace()
+        with trace.stage("facets"):
+            mask, facets, total = self.facets.select(clean_filters(**(filters or {})))
+        with trace.stage("positions"):
+            positions, next_cursor = self.pager.positions(sort, page, page_size, cursor, mask=mask)
+        return {
+            "movies": self._enrich(positions, trace),
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "facets": facets,
+        }
 
-        movies = [
-            self._movie_dict(int(mid), row, include_popularity=True)
-            for mid, row in page_data.iterrows()
-        ]
-        return {"movies": movies, "total": total, "page": page, "page_size": page_size}
+    def export_movies(self, fields: list[str] | None = None,
+                      min_log_popularity: float | None = None,
+                      max_log_popularity: float | None = None,
+                      is_cold: bool | None = None, fmt: str = "ndjson"):
+        """Generador de bytes con el catalogo filtrado, en orden de popularidad."""
+        fields = fields or DEFAULT_EXPORT_FIELDS
+        unknown = [f for f in fields if f not in EXPORT_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos no soportados: {unknown}. Opciones: {list(EXPORT_FIELDS)}")
+        cat = self.transformer.movie_catalog
+        mask = np.ones(len(cat), dtype=bool)
+        log_pop = cat["log_popularity"].to_numpy(dtype=np.float64)
+        if min_log_popularity is not None:
+            mask &= log_pop >= min_log_popularity
+        if max_log_popularity is not None:
+            mask &= log_pop <= max_log_popularity
+        if is_cold is not None:
+            mask &= cat["is_cold"].to_numpy().astype(bool) == is_cold
+        order = self.pager.orders["popularity"][0]
+        return export_chunks(cat, order[mask[order]], fields, fmt=fmt)
+
+    def list_movies_json(self, page: int = 1, page_size: int = 20, sort: str = "popularity",
+                         cursor: str | None = None, filters: dict | None = None,
+                         trace: Trace | None = None) -> bytes:
+        """``list_movies`` ya serializado a JSON; las paginas se cachean como bytes."""
+        trace = trace or Trace()
+        filters = clean_filters(**(filters or {}))
+        key = (sort, page, page_size, cursor, filters_key(filters))
+        with trace.stage("cache_lookup"):
+            body = self.pager.cache.get(key)
+        trace.info["cache"] = "miss" if body is None else "hit"
+        if body is not None:
+            return body
+        data = self.list_movies(page=page, page_size=page_size, sort=sort, cursor=cursor,
+                                filters=filters, trace=trace)
+        with trace.stage("serialize"):
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # Con TMDb configurado, una pagina con posters aun sin resolver no se fija en cache.
+        if not self.tmdb.is_configured or all(m["poster"] for m in data["movies"]):
+            self.pager.cache.put(key, body)
+        return body
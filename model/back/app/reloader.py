@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EngineReloader:
+    """Carga un motor nuevo en segundo plano y lo publica con un swap atomico.
+
+    ``build`` crea un motor sin cargar, ``current`` devuelve el motor servido y
+    ``swap`` publica el nuevo y devuelve el anterior. Las peticiones en curso
+    conservan su referencia al motor viejo hasta terminar. Con ``ready`` no
+    se recarga hasta que el arranque haya terminado.
+    """
+
+    def __init__(self, build, current, swap, warmup_sets: int = 3, ready=None):
+        self._build = build
+        self._current = current
+        self._swap = swap
+        self._ready = ready
+        self.warmup_sets = warmup_sets
+        self.state = "idle"
+        self.reloads = 0
+        self.last_reason = None
+        self.last_error = None
+        self.last_reload_at = None
+        self.last_duration_s = None
+        self.previous_version = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watch_thread = None
+        self._stop = threading.Event()
+        self._failed_version = None
+
+    @property
+    def is_reloading(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self, reason: str = "manual") -> bool:
+        with self._lock:
+            if self.is_reloading or (self._ready is not None and not self._ready()):
+                return False
+            self.state = "loading"
+            self.last_reason = reason
+            self._thread = threading.Thread(
+                target=self._run, name="engine-reload", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: float | None = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        t0 = time.perf_counter()
+        new = self._build()
+        try:
+            new.load()
+            new.warmup(self.warmup_sets)
+        except Exception as e:
+            self._failed_version = new.artifact_version()
+            self.last_error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+            logger.exception("Recarga del modelo fallida; se mantiene la version %s",
+                             self._current().model_version)
+            return
+
+        old = self._swap(new)
+        old.tmdb.flush_cache()
+        old.close()
+        self.previous_version = old.model_version
+        self.reloads += 1
+        self.last_error = None
+        self.last_reload_at = time.time()
+        self.last_duration_s = round(time.perf_counter() - t0, 3)
+        self.state = "idle"
+        logger.info("Modelo recargado: %s -> %s en %.2fs",
+                    old.model_version, new.model_version, self.last_duration_s)
+
+    def start_watch(self, interval: float):
+        """Recarga cuando cambian los artefactos y se mantienen estables un intervalo."""
+        if self._watch_thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch, args=(interval,), name="engine-watch", daemon=True
+        )
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        self._stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def _watch(self, interval):
+        seen = None
+        while not self._stop.wait(interval):
+            engine = self._current()
+            version = engine.artifact_version()
+            # Se exige la misma huella en dos sondeos para no cargar ficheros a medio copiar.
+            if (version and version == seen and version != engine.model_version
+                    and version != self._failed_version):
+                self.trigger("watch")
+            seen = version
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "reloads": self.reloads,
+            "last_reason": self.last_reason,
+            "last_error": self.last_error,
+            "last_reload_at": self.last_reload_at,
+            "last_duration_s": self.last_duration_s,
+            "previous_version": self.previous_version,
+            "watching": self._watch_thread is not None,
+        }
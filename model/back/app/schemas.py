@@ -1,17 +1,46 @@
-from pydantic import BaseModel, field_validator
-from typing import List
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Literal, Optional
+
+MAX_BATCH_SEED_SETS = 5000
+MAX_TOP_N = 50
+MAX_CANDIDATES = 5000
+
+
+def _check_seed_set(v):
+    if len(v) != 5:
+        raise ValueError("Se requieren exactamente 5 movie_ids.")
+    if len(set(v)) != 5:
+        raise ValueError("Los movie_ids deben ser unicos.")
+    return v
 
 
 class RecommendRequest(BaseModel):
     movie_ids: List[int]
+    retriever: Optional[Literal["genre", "ann"]] = None
+    top_n: int = Field(3, ge=1, le=MAX_TOP_N)
+    n_candidates: int = Field(500, ge=1, le=MAX_CANDIDATES)
+    latency_budget_ms: Optional[float] = Field(None, gt=0, le=60_000)
 
     @field_validator("movie_ids")
     @classmethod
     def exactly_five(cls, v):
-        if len(v) != 5:
-            raise ValueError("Se requieren exactamente 5 movie_ids.")
-        if len(set(v)) != 5:
-            raise ValueError("Los movie_ids deben ser unicos.")
+        return _check_seed_set(v)
+
+
+class RecommendBatchRequest(BaseModel):
+    seed_sets: List[List[int]] = Field(..., min_length=1, max_length=MAX_BATCH_SEED_SETS)
+    retriever: Optional[Literal["genre", "ann"]] = None
+    top_n: int = Field(3, ge=1, le=MAX_TOP_N)
+    n_candidates: int = Field(500, ge=1, le=MAX_CANDIDATES)
+
+    @field_validator("seed_sets")
+    @classmethod
+    def each_exactly_five(cls, v):
+        for i, movie_ids in enumerate(v):
+            try:
+                _check_seed_set(movie_ids)
+            except ValueError as e:
+                raise ValueError(f"seed_sets[{i}]: {e}")
         return v
 
 
@@ -31,6 +60,12 @@ class RecommendResponse(BaseModel):
     recommendations: List[MovieRecommendation]
     seed_movies: List[dict]
     user_profile_summary: dict
+    n_candidates: int = 0
+    fallback: bool = False
+
+
+class RecommendBatchResponse(BaseModel):
+    results: List[RecommendResponse]
 
 
 class MovieItem(BaseModel):
@@ -49,12 +84,35 @@ class MovieListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+    # Conteo por valor de cada faceta (genre, lang, decade, min_vote, is_cold).
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class Suggestion(BaseModel):
+    movie_id: int
+    title: str
+    year: int
+    popularity: float
+
+
+class AutocompleteResponse(BaseModel):
+    prefix: str
+    suggestions: List[Suggestion]
 
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     catalog_size: int
+    ready: bool = False
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    phase: str
+    error: Optional[str] = None
+    timings: dict = {}
 
 
 class ModelInfoResponse(BaseModel):
@@ -65,3 +123,22 @@ class ModelInfoResponse(BaseModel):
     test_f1: float
     best_hyperparams: dict
     catalog_size: int
+    model_version: str = ""
+    recommend_cache: dict = {}
+    latency_budget: dict = {}
+    reload: dict = {}
+    ensemble: dict = {}
+    executor: dict = {}
+    micro_batch: dict = {}
+
+
+class ReloadStatusResponse(BaseModel):
+    model_version: Optional[str] = None
+    state: str
+    reloads: int
+    last_reason: Optional[str] = None
+    last_error: Optional[str] = None
+    last_reload_at: Optional[float] = None
+    last_duration_s: Optional[float] = None
+    previous_version: Optional[str] = None
+    watching: bool = False
@@ -0,0 +1,256 @@
+import base64
+import bisect
+import json
+import unicodedata
+
+import numpy as np
+
+from app.cache import TTLCache
+from app.catalog_pages import InvalidCursor
+from app.facets import clean_filters
+
+# Maximo de sugerencias por prefijo que se precalculan / cachean.
+AUTOCOMPLETE_MAX = 20
+# Los prefijos de hasta esta longitud se precalculan al construir el indice.
+PRECOMPUTED_PREFIX_LEN = 2
+
+# Busqueda difusa: limites que acotan el coste por consulta sea cual sea el catalogo.
+FUZZY_MAX_QUERY = 64          # caracteres de la consulta que se consideran
+FUZZY_POSTINGS_BUDGET = 200_000  # postings sumados como maximo (de los trigramas mas raros)
+FUZZY_CANDIDATES = 100        # candidatos que pasan a la distancia de edicion
+FUZZY_MIN_SIMILARITY = 0.3    # fraccion minima de trigramas de la consulta compartidos
+
+# Codigo de un n-grama (n <= 3) en un uint64: n en los 2 bits altos y 21 bits por caracter.
+_SHIFTS = (np.uint64(42), np.uint64(21), np.uint64(0))
+
+
+def normalize(text: str) -> str:
+    """Minusculas y sin acentos: "Amélie" y "amelie" se indexan igual."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def substring_distance(pattern: str, text: str) -> int:
+    """Minima distancia de edicion entre ``pattern`` y cualquier subcadena de ``text``.
+
+    Algoritmo bit-paralelo de Myers (1999): una iteracion por caracter de
+    ``text`` con la columna de la matriz de programacion dinamica codificada
+    en enteros de ``len(pattern)`` bits.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    best = m
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # Sin arrastrar el bit 0: la coincidencia puede empezar en cualquier posicion.
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+
+def encode_search_cursor(query: str, fuzzy: bool, offset: int, version: str,
+                         filters: dict | None = None) -> str:
+    """Cursor opaco de /movies/search: consulta normalizada, modo, offset, version y filtros."""
+    raw = json.dumps([query, bool(fuzzy), int(offset), version, filters or {}],
+                     ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        query, fuzzy, offset, version, filters = json.loads(raw)
+        query, fuzzy, offset, version = str(query), bool(fuzzy), int(offset), str(version)
+        filters = clean_filters(**filters)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Cursor invalido.")
+    if offset < 0:
+        raise InvalidCursor("Cursor invalido.")
+    return query, fuzzy, offset, version, filters
+
+
+def _codes(chars: np.ndarray, n: int) -> np.ndarray:
+    """Codigos de todos los n-gramas de ``chars`` (codepoints uint32), incluido el separador."""
+    size = len(chars) - n + 1
+    code = np.full(size, np.uint64(n) << np.uint64(62), dtype=np.uint64)
+    for k in range(n):
+        code |= chars[k:k + size].astype(np.uint64) << _SHIFTS[k]
+    return code
+
+
+def _encode(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+class TitleIndex:
+    """Indice invertido de 1-, 2- y 3-gramas sobre los titulos normalizados.
+
+    Los documentos son posiciones en el orden de popularidad, asi cada
+    posting list ya sale ordenada por popularidad. Una consulta de hasta 3
+    caracteres es exactamente su posting list; una mas larga intersecta las
+    de sus trigramas (de la mas corta a la mas larga) y verifica solo los
+    supervivientes. El coste depende de los resultados, no del catalogo.
+    """
+
+    def __init__(self, titles):
+        self.titles = [normalize(t) for t in titles]
+        n_docs = len(self.titles)
+        # Todos los titulos en un array de codepoints separados por 0.
+        chars = _encode("\0".join(self.titles) + "\0")
+        lengths = np.fromiter((len(t) + 1 for t in self.titles), dtype=np.int64, count=n_docs)
+        doc_of = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+
+        codes, docs = [], []
+        valid = chars != 0
+        for n in (1, 2, 3):
+            ok = valid[:len(valid) - n + 1].copy()
+            for k in range(1, n):
+                ok &= valid[k:len(valid) - n + 1 + k]
+            codes.append(_codes(chars, n)[ok])
+            docs.append(doc_of[:len(ok)][ok])
+        codes = np.concatenate(codes)
+        docs = np.concatenate(docs)
+
+        order = np.lexsort((docs, codes))
+        codes, docs = codes[order], docs[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])
+        codes, self.postings = codes[keep], docs[keep]
+
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        self.keys = codes[starts]
+        self.offsets = np.r_[starts, len(codes)].astype(np.int64)
+
+        # Titulos ordenados alfabeticamente: exactos y prefijos por bisect.
+        alpha = sorted(range(n_docs), key=self.titles.__getitem__)
+        self.sorted_titles = [self.titles[d] for d in alpha]
+        self.sorted_docs = np.array(alpha, dtype=np.int32)
+
+        # Top por popularidad de los prefijos cortos (los de rango mas ancho) y LRU para el resto.
+        self._top_prefix = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LEN + 1):
+            for prefix in {t[:length] for t in self.sorted_titles if len(t) >= length}:
+                self._top_prefix[prefix] = self._top_k(prefix)
+        self._prefix_cache = TTLCache(maxsize=4096, ttl=0)
+
+    def _posting(self, code) -> np.ndarray:
+        i = int(np.searchsorted(self.keys, code))
+        if i == len(self.keys) or self.keys[i] != code:
+            return self.postings[:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def search(self, query: str) -> np.ndarray:
+        """Posiciones (en orden de popularidad) de los titulos que contienen ``query``."""
+        q = normalize(query)
+        if not q:
+            return self.postings[:0]
+        chars = _encode(q)
+        if len(chars) <= 3:
+            matches = self._posting(_codes(chars, len(chars))[0])
+        else:
+            lists = sorted((self._posting(c) for c in np.unique(_codes(chars, 3))), key=len)
+            survivors = lists[0]
+            for posting in lists[1:]:
+                if len(survivors) == 0:
+                    break
+                survivors = np.intersect1d(survivors, posting, assume_unique=True)
+            titles = self.titles
+            matches = survivors[[q in titles[d] for d in survivors]]
+        if len(matches) == 0:
+            return matches
+        # Primero el titulo exacto, luego los que empiezan por la consulta; popularidad dentro.
+        exact, prefixed = self.prefix_range(q)
+        exact = np.sort(self.sorted_docs[exact])
+        prefixed = np.sort(self.sorted_docs[prefixed])
+        head = np.concatenate([exact, prefixed])
+        return np.concatenate([head, matches[~np.isin(matches, head, assume_unique=True)]])
+
+    def fuzzy_search(self, query: str) -> np.ndarray:
+        """Titulos parecidos a ``query`` aunque tenga erratas, del mas al menos parecido.
+
+        1) Candidatos por trigramas compartidos (bincount sobre las posting
+        lists mas raras hasta ``FUZZY_POSTINGS_BUDGET``); 2) los
+        ``FUZZY_CANDIDATES`` con mas trigramas pasan a ``substring_distance``
+        y se quedan los que estan a ``len(query) // 4`` ediciones o menos.
+        Nunca se compara contra todo el catalogo.
+        """
+        q = normalize(query)[:FUZZY_MAX_QUERY]
+        if len(q) < 3:
+            return self.search(q)
+        lists = sorted((self._posting(c) for c in np.unique(_codes(_encode(q), 3))), key=len)
+        used, n_postings = [], 0
+        for posting in lists:
+            if used and n_postings + len(posting) > FUZZY_POSTINGS_BUDGET:
+                break
+            used.append(posting)
+            n_postings += len(posting)
+        if n_postings == 0:
+            return self.postings[:0]
+
+        shared = np.bincount(np.concatenate(used), minlength=len(self.titles))
+        min_shared = min(len(used), max(1, int(np.ceil(len(lists) * FUZZY_MIN_SIMILARITY))))
+        candidates = np.flatnonzero(shared >= min_shared)
+        if len(candidates) > FUZZY_CANDIDATES:
+            # Mas trigramas compartidos primero; a igualdad, el mas popular (posicion menor).
+            key = -shared[candidates].astype(np.int64) * len(self.titles) + candidates
+            candidates = candidates[np.argpartition(key, FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]]
+
+        max_dist = max(1, len(q) // 4)
+        scored = []
+        for d in candidates.tolist():
+            dist = substring_distance(q, self.titles[d])
+            if dist <= max_dist:
+                scored.append((dist, -int(shared[d]), d))
+        scored.sort()
+        return np.array([d for _, _, d in scored], dtype=self.postings.dtype)
+
+    def _top_k(self, prefix: str) -> np.ndarray:
+        exact, prefixed = self.prefix_range(prefix)
+        docs = self.sorted_docs[exact.start:prefixed.stop]
+        if len(docs) > AUTOCOMPLETE_MAX:
+            docs = np.partition(docs, AUTOCOMPLETE_MAX - 1)[:AUTOCOMPLETE_MAX]
+        return np.sort(docs)
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> np.ndarray:
+        """Hasta ``limit`` titulos que empiezan por ``prefix``, de mas a menos populares."""
+        p = normalize(prefix)
+        if not p:
+            return self.sorted_docs[:0]
+        top = self._top_prefix.get(p)
+        if top is None:
+            top = self._prefix_cache.get(p)
+            if top is None:
+                top = self._top_k(p)
+                self._prefix_cache.put(p, top)
+        return top[:limit]
+
+    def prefix_range(self, q: str):
+        """Slices de ``sorted_docs``: titulos iguales a ``q`` y los que solo empiezan por ``q``."""
+        lo = bisect.bisect_left(self.sorted_titles, q)
+        eq = bisect.bisect_right(self.sorted_titles, q, lo)
+        hi = bisect.bisect_left(self.sorted_titles, q + "\U0010ffff", eq)
+        return slice(lo, eq), slice(eq, hi)
+
+    def stats(self) -> dict:
+        arrays = [self.keys, self.offsets, self.postings, self.sorted_docs]
+        return {"grams": len(self.keys), "postings": len(self.postings),
+                "bytes": int(sum(a.nbytes for a in arrays))}
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EngineStartup:
+    """Carga y calienta el motor en segundo plano al arrancar la API.
+
+    Fases: ``loading`` -> ``warming`` -> ``ready`` (o ``failed``). Mientras
+    tanto la API responde /health y /ready; ``on_ready`` se llama una vez
+    el motor esta caliente (p. ej. para arrancar el watcher de recargas).
+    """
+
+    def __init__(self, current, warmup_sets: int = 3, on_ready=None):
+        self._current = current
+        self.warmup_sets = warmup_sets
+        self._on_ready = on_ready
+        self.phase = "idle"
+        self.error = None
+        self.timings = {}
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="engine-startup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.is_ready
+
+    def _run(self):
+        engine = self._current()
+        t0 = time.perf_counter()
+        try:
+            self.phase = "loading"
+            engine.load()
+            self._record("load", engine.load_timings)
+            if self.warmup_sets > 0:
+                self.phase = "warming"
+                self._record("warmup", engine.warmup(self.warmup_sets))
+        except Exception as e:
+            logger.exception("Fallo el arranque del motor en la fase %s", self.phase)
+            self.phase = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            return
+
+        self.timings["total"] = round(time.perf_counter() - t0, 3)
+        self.phase = "ready"
+        self._ready.set()
+        catalog_size = len(engine.transformer.movie_catalog)
+        tmdb_status = "configurado" if engine.tmdb.is_configured else "no configurado (set TMDB_API_KEY)"
+        print(
+            f"Modelo cargado ({engine.model_type}) - Catalogo: {catalog_size:,} peliculas | "
+            f"TMDb: {tmdb_status} | Listo en {self.timings['total']:.2f}s"
+        )
+        if self._on_ready is not None:
+            self._on_ready()
+
+    def _record(self, phase, timings):
+        self.timings[phase] = {k: round(v, 3) for k, v in timings.items()}
+        detail = ", ".join(f"{k}={v:.2f}s" for k, v in timings.items())
+        print(f"Arranque - {phase}: {sum(timings.values()):.2f}s ({detail})")
+
+    def status(self) -> dict:
+        return {"phase": self.phase, "error": self.error, "timings": self.timings}
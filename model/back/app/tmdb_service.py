@@ -1,11 +1,18 @@
 import os
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
 import requests
 
+from app.metrics import REGISTRY, TMDB_REQUESTS, TMDB_SECONDS
+
+POSTER_CACHE = REGISTRY.counter(
+    "movia_tmdb_poster_cache_total", "Consultas a la cache local de posters.", ["result"],
+)
 logger = logging.getLogger(__name__)
 
 TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p"
@@ -20,6 +27,7 @@ class TMDbService:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self._cache_file = self.cache_dir / "poster_cache.json"
         self._cache: dict[int, str] = {}
+        self._local = threading.local()
         self._load_cache()
 
     @property
@@ -42,13 +50,25 @@ class TMDbService:
         except Exception:
             pass
 
+    @property
+    def cache_size(self) -> int:
+        return len(self._cache)
+
+    @property
+    def thread_misses(self) -> int:
+        """Fallos de cache acumulados en el hilo actual (para las trazas por peticion)."""
+        return getattr(self._local, "misses", 0)
+
     def get_poster_url(self, movie_id: int, size: str = DEFAULT_SIZE) -> str:
         if movie_id in self._cache:
+            POSTER_CACHE.inc(result="hit")
             poster_path = self._cache[movie_id]
             if poster_path:
                 return f"{TMDB_IMAGE_BASE}/{size}{poster_path}"
             return ""
 
+        POSTER_CACHE.inc(result="miss")
+        self._local.misses = self.thread_misses + 1
         if not self.is_configured:
             return ""
 
@@ -64,13 +84,19 @@ class TMDbService:
 
     def _fetch_poster_path(self, movie_id: int) -> Optional[str]:
         url = f"https://api.themoviedb.org/3/movie/{movie_id}"
+        t0 = time.perf_counter()
         try:
             resp = requests.get(url, params={"api_key": self.api_key}, timeout=5)
             if resp.status_code == 200:
+                TMDB_REQUESTS.inc(outcome="ok")
                 return resp.json().get("poster_path")
+            TMDB_REQUESTS.inc(outcome=f"http_{resp.status_code}")
             return None
         except Exception:
+            TMDB_REQUESTS.inc(outcome="error")
             return None
+        finally:
+            TMDB_SECONDS.observe(time.perf_counter() - t0)
 
     def get_poster_urls_batch(self, movie_ids: list[int],
                                size: str = DEFAULT_SIZE) -> dict[int, str]:
@@ -0,0 +1,85 @@
+import json
+import logging
+import queue
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueListener, RotatingFileHandler
+
+
+class Trace:
+    """Desglose de una peticion: duracion por etapa (s) y datos sueltos (candidatos, cache...).
+
+    Lo crea el endpoint y lo rellena el motor; ``stages`` es el mismo dict
+    ``timings`` que acepta ``FeatureTransformer.prepare_inference``.
+    """
+
+    __slots__ = ("stages", "info")
+
+    def __init__(self):
+        self.stages = {}
+        self.info = {}
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def server_timing(self, total_s: float | None = None) -> str:
+        """Valor de la cabecera Server-Timing (duraciones en ms)."""
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts += [f'{name};desc="{value}"' for name, value in self.info.items()]
+        if total_s is not None:
+            parts.append(f"app;dur={total_s * 1000:.3f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            **self.info,
+        }
+
+
+class TraceLog:
+    """Log JSONL rotativo de peticiones lentas escrito por un hilo aparte.
+
+    ``record`` solo encola (sin bloquear); si la cola esta llena la traza
+    se descarta y se cuenta en ``dropped``.
+    """
+
+    def __init__(self, path: str, slow_ms: float = 250.0, max_bytes: int = 10_000_000,
+                 backups: int = 5, max_queue: int = 10_000):
+        self.path = path
+        self.slow_ms = slow_ms
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                            encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, self._handler)
+        self._listener.start()
+
+    def record(self, duration_ms: float, entry: dict) -> bool:
+        if duration_ms < self.slow_ms:
+            return False
+        line = json.dumps({"ts": round(time.time(), 3), "duration_ms": round(duration_ms, 3),
+                           **entry}, ensure_ascii=False, default=str)
+        try:
+            self._queue.put_nowait(logging.makeLogRecord({"msg": line}))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.written += 1
+        return True
+
+    def close(self):
+        # stop() vacia la cola antes de terminar el hilo.
+        self._listener.stop()
+        self._handler.close()
+
+    def stats(self) -> dict:
+        return {"path": self.path, "slow_ms": self.slow_ms, "written": self.written,
+                "dropped": self.dropped}
@@ -0,0 +1,633 @@
+#!/usr/bin/env python
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.feature_engineering import FeatureTransformer
+
+W = 70
+
+
+def sec(title, c="="):
+    print(f"\n{c * W}\n  {title}\n{c * W}")
+
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.array(times) * 1000
+
+
+def report(name, ms):
+    print(f"  {name:<28} p50={np.median(ms):9.3f} ms  p99={np.percentile(ms, 99):9.3f} ms  "
+          f"mean={ms.mean():9.3f} ms")
+
+
+def sample_seed_sets(catalog, n_sets, rng):
+    ids = catalog.index.values
+    return [[int(m) for m in rng.choice(ids, 5, replace=False)] for _ in range(n_sets)]
+
+
+def bench_candidates(args):
+    sec("GENERACION DE CANDIDATOS - apply vs bitmask de generos")
+    transformer = FeatureTransformer.load(os.path.join(args.artifacts_dir, "transformers"))
+    cat = transformer.movie_catalog
+    print(f"  Catalogo: {len(cat):,} peliculas | {len(transformer.genre_vocab_)} generos")
+
+    rng = np.random.default_rng(args.seed)
+    profiles = []
+    for seeds in sample_seed_sets(cat, args.n_sets, rng):
+        genres = transformer._aggregate_profile(cat.loc[seeds])["_user_genre_set"]
+        if genres:
+            profiles.append((seeds, genres))
+
+    def legacy():
+        for seeds, genres in profiles:
+            scores = cat["_genres_list"].apply(lambda gl: len(set(gl) & genres))
+            scores = scores.drop(seeds, errors="ignore")
+            scores = scores[scores > 0]
+            scores.nlargest(args.n_candidates).index.tolist()
+
+    def bitmask():
+        for seeds, genres in profiles:
+            transformer._genre_candidates(genres, seeds, args.n_candidates)
+
+    n = len(profiles)
+    report("apply + nlargest", timeit(legacy, args.repeat) / n)
+    report("bitmask + argpartition", timeit(bitmask, args.repeat) / n)
+
+
+def bench_transform(args):
+    sec("TRANSFORM DE INFERENCIA - merge pandas vs perfil unico")
+    transformer = FeatureTransformer.load(os.path.join(args.artifacts_dir, "transformers"))
+    cat = transformer.movie_catalog
+
+    rng = np.random.default_rng(args.seed)
+    cases = []
+    for seeds in sample_seed_sets(cat, args.n_sets, rng):
+        profile = transformer._aggregate_profile(cat.loc[seeds])
+        if profile["_user_genre_set"]:
+            cands = transformer._genre_candidates(profile["_user_genre_set"], seeds, args.n_candidates)
+            cases.append((cands, profile))
+
+    def merge_path():
+        for cands, profile in cases:
+            df = pd.DataFrame({"user_id": ["__inference__"] * len(cands), "movie_id": cands})
+            X, _ = transformer.transform(df, {"__inference__": profile})
+            np.nan_to_num(X.values.astype(np.float32), nan=0.0)
+
+    def profile_path():
+        for cands, profile in cases:
+            transformer.transform_profile(cands, profile)
+
+    n = len(cases)
+    report("transform (merge)", timeit(merge_path, args.repeat) / n)
+    report("transform_profile", timeit(profile_path, args.repeat) / n)
+
+
+def bench_batch(args):
+    sec("THROUGHPUT - /recommend en bucle vs /recommend/batch")
+    os.environ["ARTIFACTS_DIR"] = args.artifacts_dir
+    from fastapi.testclient import TestClient
+    from app.main import app, engine
+
+    engine.load()
+    client = TestClient(app)
+    rng = np.random.default_rng(args.seed)
+    seed_sets = sample_seed_sets(engine.transformer.movie_catalog, args.n_sets, rng)
+
+    t0 = time.perf_counter()
+    for seeds in seed_sets:
+        client.post("/recommend", json={"movie_ids": seeds}).raise_for_status()
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    client.post("/recommend/batch", json={"seed_sets": seed_sets}).raise_for_status()
+    batch_s = time.perf_counter() - t0
+
+    print(f"  {args.n_sets} conjuntos de semillas | modelo={engine.model_type}")
+    print(f"  /recommend (bucle)     {args.n_sets / loop_s:10.1f} sets/s")
+    print(f"  /recommend/batch       {args.n_sets / batch_s:10.1f} sets/s  "
+          f"(x{loop_s / batch_s:.1f})")
+
+
+def bench_compiled(args):
+    sec("LATENCIA DE PREDICCION - librerias nativas vs arboles compilados")
+    import xgboost as xgb
+    from app.compiled_model import from_lightgbm, from_xgboost
+
+    transformer = FeatureTransformer.load(os.path.join(args.artifacts_dir, "transformers"))
+    rng = np.random.default_rng(args.seed)
+    blocks, n_rows = [], 0
+    while n_rows < max(args.sizes):
+        seeds = sample_seed_sets(transformer.movie_catalog, 1, rng)[0]
+        X, _ = transformer.prepare_inference(seeds)
+        blocks.append(X)
+        n_rows += len(X)
+    X_all = np.concatenate(blocks)
+
+    model_dir = os.path.join(args.artifacts_dir, "model")
+    xgb_model = xgb.XGBClassifier()
+    xgb_model.load_model(os.path.join(model_dir, "xgboost_recommender.ubj"))
+    backends = [
+        ("xgboost predict_proba", lambda X: xgb_model.predict_proba(X)[:, 1]),
+        ("compiled (xgboost)", from_xgboost(xgb_model.get_booster()).predict_proba),
+    ]
+    try:
+        import lightgbm as lgb
+        lgb_model = lgb.Booster(model_file=os.path.join(model_dir, "lightgbm_recommender.txt"))
+        backends += [
+            ("lightgbm predict", lgb_model.predict),
+            ("compiled (lightgbm)", from_lightgbm(lgb_model).predict_proba),
+        ]
+    except ImportError:
+        print("  lightgbm no instalado: se omite")
+
+    for size in args.sizes:
+        X = X_all[:size]
+        print(f"\n  batch={size:,}")
+        for name, fn in backends:
+            report(name, timeit(lambda: fn(X), args.repeat))
+
+
+def bench_ann(args):
+    sec("RECUPERACION DE CANDIDATOS - IVF vs busqueda exacta")
+    transformer = FeatureTransformer.load(os.path.join(args.artifacts_dir, "transformers"))
+    index = transformer.ann_index
+    rng = np.random.default_rng(args.seed)
+    queries = []
+    for seeds in sample_seed_sets(transformer.movie_catalog, args.n_sets, rng):
+        pos = transformer.movie_positions(seeds)
+        queries.append((index.query_vector(pos), pos))
+
+    def exact(q, pos):
+        scores = index.vectors @ q
+        scores[pos] = -np.inf
+        top = np.argpartition(-scores, args.n_candidates - 1)[:args.n_candidates]
+        return top
+
+    recalls = [
+        len(np.intersect1d(index.search(q, args.n_candidates, exclude=pos)[0], exact(q, pos)))
+        / args.n_candidates
+        for q, pos in queries
+    ]
+    n = len(queries)
+    print(f"  {index.n_lists} listas | n_probe={index.n_probe} | K={args.n_candidates}")
+    report("exacta (producto completo)",
+           timeit(lambda: [exact(q, p) for q, p in queries], args.repeat) / n)
+    report("IVF", timeit(lambda: [index.search(q, args.n_candidates, exclude=p)
+                                  for q, p in queries], args.repeat) / n)
+    print(f"  recall@{args.n_candidates} medio: {np.mean(recalls):.3f}")
+
+
+def bench_budget(args):
+    sec("PRESUPUESTO DE LATENCIA - n_candidates adaptativo")
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir, cache_size=0)
+    engine.load()
+    rng = np.random.default_rng(args.seed)
+    seed_sets = sample_seed_sets(engine.transformer.movie_catalog, args.n_sets, rng)
+    for seeds in seed_sets:
+        engine.recommend(seeds, n_candidates=int(rng.integers(50, args.n_candidates + 1)))
+    print(f"  Modelo de coste: {engine.candidate_budget.stats()}")
+
+    for budget in [None] + args.budgets_ms:
+        ms, chosen = [], []
+        for seeds in seed_sets:
+            t0 = time.perf_counter()
+            res = engine.recommend(seeds, n_candidates=args.n_candidates, latency_budget_ms=budget)
+            ms.append((time.perf_counter() - t0) * 1000)
+            chosen.append(res["n_candidates"])
+        chosen = np.array(chosen)
+        report(f"budget={budget} ms" if budget else "sin presupuesto", np.array(ms))
+        print(f"  {'':<28} n_candidates medio={chosen.mean():7.1f}  "
+              f"fallback={np.mean(chosen == 0):.0%}")
+
+
+def bench_ensemble(args):
+    sec("ENSAMBLE - miembros en serie vs en paralelo")
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir, model_type="ensemble")
+    engine.load()
+    rng = np.random.default_rng(args.seed)
+    seeds = sample_seed_sets(engine.transformer.movie_catalog, 1, rng)[0]
+    X_base = engine.transformer.prepare_inference(seeds)[0]
+    print(f"  Miembros: {', '.join(engine.members)} | CPUs: {os.cpu_count()}")
+
+    for n_rows in args.sizes:
+        X = X_base[rng.integers(0, len(X_base), n_rows)]
+        print(f"\n  {n_rows:,} filas")
+        for b, m in engine.members.items():
+            report(b, timeit(lambda: engine._predict_backend(b, m, X), args.repeat))
+        report("serie (suma)", timeit(
+            lambda: [engine._predict_backend(b, m, X) for b, m in engine.members.items()],
+            args.repeat))
+        report("paralelo (threadpool)", timeit(lambda: engine._predict_positive_proba(X), args.repeat))
+
+
+def bench_microbatch(args):
+    sec("MICRO-BATCHING - throughput vs p99 con peticiones concurrentes")
+    from concurrent.futures import ThreadPoolExecutor
+    from app.recommender import RecommenderEngine
+
+    rng = np.random.default_rng(args.seed)
+    base = RecommenderEngine(artifacts_dir=args.artifacts_dir, cache_size=0)
+    base.load()
+    seed_sets = sample_seed_sets(base.transformer.movie_catalog, args.n_requests, rng)
+    print(f"  {args.n_requests} peticiones | CPUs: {os.cpu_count()}")
+
+    for window in args.windows_ms:
+        engine = RecommenderEngine(artifacts_dir=args.artifacts_dir, cache_size=0,
+                                   micro_batch_window_ms=window,
+                                   micro_batch_max=args.max_batch)
+        engine.model, engine.transformer, engine.metadata = base.model, base.transformer, base.metadata
+        engine._popular_ids, engine.model_version, engine._loaded = base._popular_ids, "bench", True
+
+        def timed(seeds):
+            t0 = time.perf_counter()
+            engine.recommend(seeds)
+            return (time.perf_counter() - t0) * 1000
+
+        for concurrency in args.concurrency:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                t0 = time.perf_counter()
+                ms = np.array(list(pool.map(timed, seed_sets)))
+                elapsed = time.perf_counter() - t0
+            batch = engine.batcher.stats()["mean_batch_size"] if engine.batcher else 1.0
+            print(f"  ventana={window:4.1f} ms  hilos={concurrency:3d}  "
+                  f"{len(seed_sets) / elapsed:8.1f} req/s  p50={np.median(ms):7.2f} ms  "
+                  f"p99={np.percentile(ms, 99):7.2f} ms  lote medio={batch:5.2f}")
+
+
+def _smaps_rollup():
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f.read().splitlines()[1:])
+    kb = lambda k: int(fields[k].split()[0])
+    return {"rss": kb("Rss"), "pss": kb("Pss"),
+            "uss": kb("Private_Clean") + kb("Private_Dirty")}
+
+
+def _memory_worker(artifacts_dir, store_dir, seed_sets, barrier, out, load=True):
+    from app.recommender import RecommenderEngine
+
+    if load:
+        engine = RecommenderEngine(artifacts_dir=artifacts_dir, cache_size=0,
+                                   catalog_store_dir=store_dir)
+        engine.load()
+        for seeds in seed_sets:
+            engine.recommend(seeds)
+        engine.list_movies(page=1)
+    barrier.wait()
+    out.put(_smaps_rollup())
+    barrier.wait()
+
+
+def bench_memory(args):
+    sec(f"MEMORIA - {args.workers} workers, catalogo privado vs almacen mapeado")
+    import multiprocessing as mp
+    import tempfile
+
+    ctx = mp.get_context("spawn")
+    trans_path = os.path.join(args.artifacts_dir, "transformers")
+    catalog = pd.read_parquet(os.path.join(trans_path, "movie_catalog.parquet"), columns=["title"])
+    rng = np.random.default_rng(args.seed)
+    seed_sets = sample_seed_sets(catalog, 5, rng)
+    print(f"  Catalogo: {len(catalog):,} peliculas")
+
+    with tempfile.TemporaryDirectory(dir=args.store_root) as store_root:
+        # Se construye antes para medir solo workers que se adjuntan al almacen.
+        FeatureTransformer.load(trans_path, store_dir=store_root)
+        modes = [("solo imports", None, False), ("privado", None, True),
+                 ("almacen mmap", store_root, True)]
+        for label, store_dir, load in modes:
+            barrier, out = ctx.Barrier(args.workers), ctx.Queue()
+            procs = [ctx.Process(target=_memory_worker,
+                                 args=(args.artifacts_dir, store_dir, seed_sets, barrier, out, load))
+                     for _ in range(args.workers)]
+            for p in procs:
+                p.start()
+            stats = [out.get() for _ in procs]
+            for p in procs:
+                p.join()
+            rss = sum(s["rss"] for s in stats) / 1024
+            pss = sum(s["pss"] for s in stats) / 1024
+            uss = np.mean([s["uss"] for s in stats]) / 1024
+            print(f"  {label:<14} RSS total={rss:8.1f} MB  PSS total={pss:8.1f} MB  "
+                  f"privado/worker={uss:6.1f} MB")
+
+
+def bench_pages(args):
+    sec("GET /movies - sort_values + iterrows vs ordenes precalculados y cache")
+    from app.recommender import RecommenderEngine
+    from app.schemas import MovieListResponse
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir)
+    engine.load()
+    cat = engine.transformer.movie_catalog
+    print(f"  Catalogo: {len(cat):,} peliculas | page_size={args.page_size}")
+
+    def legacy(page):
+        ordered = cat.sort_values("log_popularity", ascending=False)
+        start = (page - 1) * args.page_size
+        rows = ordered.iloc[start:start + args.page_size]
+        movies = [engine._movie_dict(int(mid), row, include_popularity=True)
+                  for mid, row in rows.iterrows()]
+        MovieListResponse(movies=movies, total=len(ordered), page=page,
+                          page_size=args.page_size).model_dump_json()
+
+    def uncached(page=None, cursor=None):
+        engine.pager.cache.clear()
+        engine.list_movies_json(page=page or 1, page_size=args.page_size, cursor=cursor)
+
+    for page in [1, args.deep_page]:
+        print(f"\n  page={page}")
+        report("sort_values + iterrows", timeit(lambda: legacy(page), args.repeat))
+        report("precalculado (sin cache)", timeit(lambda: uncached(page), args.repeat))
+        engine.list_movies_json(page=page, page_size=args.page_size)
+        report("bytes en cache", timeit(
+            lambda: engine.list_movies_json(page=page, page_size=args.page_size), args.repeat))
+
+    _, cursor = engine.pager.positions("popularity", args.deep_page - 1, args.page_size)
+    print(f"\n  keyset tras page={args.deep_page - 1}")
+    report("cursor (sin cache)", timeit(lambda: uncached(cursor=cursor), args.repeat))
+
+
+def bench_export(args):
+    sec("EXPORTACION DEL CATALOGO - paginar /movies vs stream NDJSON/Arrow")
+    import tracemalloc
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir, page_cache_size=0)
+    engine.load()
+    total = len(engine.transformer.movie_catalog)
+    print(f"  Catalogo: {total:,} peliculas")
+
+    def paginate():
+        for page in range(1, -(-total // 100) + 1):
+            engine.list_movies_json(page=page, page_size=100)
+
+    def stream(fmt):
+        return sum(len(c) for c in engine.export_movies(fmt=fmt))
+
+    for name, fn in [("paginas de 100", paginate), ("stream ndjson", lambda: stream("ndjson")),
+                     ("stream arrow", lambda: stream("arrow"))]:
+        t0 = time.perf_counter()
+        size = fn()
+        elapsed = time.perf_counter() - t0
+        # Segunda pasada solo para el pico de memoria: tracemalloc distorsiona los tiempos.
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        size_txt = f"{size / 1e6:6.1f} MB" if size else "      -"
+        print(f"  {name:<18} {elapsed:7.2f} s  salida={size_txt}  pico={peak / 1e6:6.1f} MB")
+
+
+def bench_search(args):
+    sec("BUSQUEDA DE TITULOS - str.contains vs indice de n-gramas")
+    from app.search_index import TitleIndex
+
+    transformer = FeatureTransformer.load(os.path.join(args.artifacts_dir, "transformers"))
+    titles = transformer.movie_catalog["title"]
+    print(f"  Consultas: {', '.join(args.queries)}")
+    for size in args.sizes:
+        subset = titles.iloc[:size]
+        t0 = time.perf_counter()
+        index = TitleIndex(subset.to_numpy())
+        build = time.perf_counter() - t0
+        print(f"\n  {len(subset):,} titulos | construccion {build:.2f} s | "
+              f"{index.stats()['bytes'] / 1e6:.1f} MB")
+        report("str.contains", timeit(
+            lambda: [subset.str.contains(q, case=False, na=False) for q in args.queries],
+            args.repeat) / len(args.queries))
+        report("indice n-gramas", timeit(
+            lambda: [index.search(q) for q in args.queries], args.repeat) / len(args.queries))
+        report("difusa (erratas)", timeit(
+            lambda: [index.fuzzy_search(q) for q in args.queries], args.repeat) / len(args.queries))
+
+
+def bench_autocomplete(args):
+    sec("AUTOCOMPLETADO - /movies/search vs prefijos con bisect + top-K")
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir)
+    engine.load()
+    # Cada prefijo de cada consulta, como al teclear.
+    prefixes = [q[:i] for q in args.queries for i in range(1, len(q) + 1)]
+    print(f"  {len(prefixes)} prefijos de: {', '.join(args.queries)}")
+    for name, fn in [("search_movies (10)", lambda p: engine.search_movies(p, page_size=10)),
+                     ("autocomplete (10)", lambda p: engine.autocomplete(p, 10))]:
+        ms = np.concatenate([timeit(lambda: fn(p), args.repeat) for p in prefixes])
+        report(name, ms)
+
+
+def bench_search_pages(args):
+    sec("PAGINAS DE BUSQUEDA - recalcular la consulta vs cache de resultados + cursor")
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir)
+    engine.load()
+    for q in args.queries:
+        total = engine.search_movies(q, page_size=1)["total"]
+        pages = min(args.pages, -(-total // args.page_size))
+        print(f"\n  '{q}': {total:,} resultados, {pages} paginas de {args.page_size}")
+
+        def by_page():
+            for page in range(1, pages + 1):
+                engine.search_cache.clear()
+                engine.search_movies(q, page=page, page_size=args.page_size)
+
+        def by_cursor():
+            engine.search_cache.clear()
+            cursor = engine.search_movies(q, page_size=args.page_size)["next_cursor"]
+            for _ in range(pages - 1):
+                cursor = engine.search_movies(cursor=cursor, page_size=args.page_size)["next_cursor"]
+
+        report("sin cache (por pagina)", timeit(by_page, args.repeat) / pages)
+        report("cache + cursor (por pagina)", timeit(by_cursor, args.repeat) / pages)
+
+
+def bench_facets(args):
+    sec("FACETAS - cadena de mascaras pandas vs bitmaps precalculados")
+    from app.facets import FacetIndex
+    from app.recommender import RecommenderEngine
+
+    engine = RecommenderEngine(artifacts_dir=args.artifacts_dir)
+    engine.load()
+    cat = engine.transformer.movie_catalog
+    t0 = time.perf_counter()
+    index = FacetIndex(cat, cache_size=0)
+    stats = index.stats()
+    print(f"  Catalogo: {len(cat):,} peliculas | construccion {time.perf_counter() - t0:.2f} s | "
+          f"{stats['bitmaps']} bitmaps, {stats['bytes'] / 1e6:.1f} MB")
+    filters = {"genre": ["Action", "Drama"], "lang": ["en", "fr"], "year_min": 1990,
+               "year_max": 2010, "min_vote": 6.5, "exclude_cold": True}
+    print(f"  Filtros: {filters}")
+
+    def pandas_chain():
+        mask = (cat["genre_Action"] > 0) & (cat["genre_Drama"] > 0)
+        mask &= (cat["lang_en"] > 0) | (cat["lang_fr"] > 0)
+        mask &= cat["movie_year"].between(1990, 2010) & (cat["vote_average"] >= 6.5)
+        mask &= ~cat["is_cold"].astype(bool)
+        # Un conteo por valor de genero / idioma, como hace FacetIndex.
+        return {c: int((mask & (cat[c] > 0)).sum())
+                for c in cat.columns if c.startswith(("genre_", "lang_"))}
+
+    report("pandas (mascara + conteos)", timeit(pandas_chain, args.repeat))
+    report("bitmaps (mascara + conteos)", timeit(lambda: index.select(filters), args.repeat))
+    matches = engine.search_movies("the", page_size=1)
+    positions = engine.pager.orders["popularity"][0][engine.search_index.search("the")]
+    print(f"\n  Dentro de una busqueda ({matches['total']:,} resultados)")
+    report("bitmaps (within)", timeit(lambda: index.select(filters, within=positions), args.repeat))
+
+    def page():
+        engine.pager.cache.clear()
+        engine.facets.cache.clear()
+        engine.list_movies_json(page=1, filters=filters)
+
+    print("\n  GET /movies filtrado, sin caches")
+    report("pagina 1", timeit(page, args.repeat))
+
+
+def bench_text(args):
+    sec("BUSQUEDA DE TEXTO - str.contains vs BM25 mapeado en memoria")
+    import tempfile
+    from src.text_index import TextIndex, tokenize
+
+    # Corpus sintetico con frecuencias Zipf (los artefactos de prueba no traen overviews).
+    rng = np.random.default_rng(args.seed)
+    vocab = np.array([f"w{i}" for i in range(args.vocab)])
+    lengths = rng.integers(args.doc_len // 2, args.doc_len * 3 // 2, size=args.n_docs)
+    words = vocab[np.minimum(rng.zipf(1.1, size=lengths.sum()), args.vocab) - 1]
+    texts = [" ".join(ws) for ws in np.split(words, np.cumsum(lengths)[:-1])]
+    texts_s = pd.Series(texts)
+
+    t0 = time.perf_counter()
+    index = TextIndex.build(np.arange(args.n_docs), texts)
+    build = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        t0 = time.perf_counter()
+        mapped = TextIndex.load(tmp)
+        load_ms = (time.perf_counter() - t0) * 1000
+        stats = mapped.stats()
+        print(f"  {args.n_docs:,} docs x ~{args.doc_len} palabras | construccion {build:.1f} s | "
+              f"{stats['terms']:,} terminos, {stats['postings']:,} postings, "
+              f"{stats['bytes'] / 1e6:.1f} MB | mmap {load_ms:.1f} ms")
+        df = np.diff(mapped.offsets)
+        queries = {
+            "termino comun": "w1",
+            "2 comunes": "w1 w2",
+            "3 medios": "w50 w120 w300",
+            "raro": f"w{int(np.argmin(np.where(df > 0, df, df.max())))}",
+        }
+        for name, q in queries.items():
+            i = int(np.searchsorted(mapped.terms, tokenize(q)[0]))
+            print(f"\n  {name}: '{q}' ({int(df[i]):,} docs el primer termino)")
+            term = tokenize(q)[0]
+            report("str.contains (1er termino)", timeit(
+                lambda: texts_s.str.contains(rf"\b{term}\b", regex=True), max(1, args.repeat // 5)))
+            report("BM25 top-20", timeit(lambda: mapped.search(q, k=20), args.repeat))
+        del mapped
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmarks de inferencia de MovIA.")
+    p.add_argument("--artifacts-dir", default=os.getenv("ARTIFACTS_DIR", "artifacts"))
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=42)
+    sub = p.add_subparsers(dest="bench", required=True)
+
+    c = sub.add_parser("candidates", help="Generacion de candidatos por generos.")
+    c.add_argument("--n-sets", type=int, default=20)
+    c.add_argument("--n-candidates", type=int, default=500)
+    c.set_defaults(fn=bench_candidates)
+
+    t = sub.add_parser("transform", help="Construccion de la matriz de candidatos.")
+    t.add_argument("--n-sets", type=int, default=20)
+    t.add_argument("--n-candidates", type=int, default=500)
+    t.set_defaults(fn=bench_transform)
+
+    b = sub.add_parser("batch", help="Throughput del endpoint de recomendacion por lotes.")
+    b.add_argument("--n-sets", type=int, default=1000)
+    b.set_defaults(fn=bench_batch)
+
+    m = sub.add_parser("compiled", help="Latencia de prediccion nativa vs compilada.")
+    m.add_argument("--sizes", type=int, nargs="+", default=[1, 500, 50_000])
+    m.set_defaults(fn=bench_compiled)
+
+    a = sub.add_parser("ann", help="Latencia y recall del indice ANN.")
+    a.add_argument("--n-sets", type=int, default=50)
+    a.add_argument("--n-candidates", type=int, default=500)
+    a.set_defaults(fn=bench_ann)
+
+    b = sub.add_parser("budget", help="n_candidates elegido y latencia por presupuesto.")
+    b.add_argument("--n-sets", type=int, default=200)
+    b.add_argument("--n-candidates", type=int, default=500)
+    b.add_argument("--budgets-ms", type=float, nargs="+", default=[2.0, 5.0, 10.0, 20.0])
+    b.set_defaults(fn=bench_budget)
+
+    e = sub.add_parser("ensemble", help="Latencia del ensamble en serie vs en paralelo.")
+    e.add_argument("--sizes", type=int, nargs="+", default=[500, 5_000, 50_000])
+    e.set_defaults(fn=bench_ensemble)
+
+    mb = sub.add_parser("microbatch", help="Throughput y p99 por ventana de micro-batching.")
+    mb.add_argument("--n-requests", type=int, default=400)
+    mb.add_argument("--windows-ms", type=float, nargs="+", default=[0.0, 1.0, 2.0, 5.0])
+    mb.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    mb.add_argument("--max-batch", type=int, default=32)
+    mb.set_defaults(fn=bench_microbatch)
+
+    me = sub.add_parser("memory", help="Memoria total de N workers con y sin almacen mmap (Linux).")
+    me.add_argument("--workers", type=int, default=8)
+    me.add_argument("--store-root", default="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    me.set_defaults(fn=bench_memory)
+
+    pg = sub.add_parser("pages", help="Paginas de /movies: legado vs precalculado vs cache.")
+    pg.add_argument("--page-size", type=int, default=20)
+    pg.add_argument("--deep-page", type=int, default=5000)
+    pg.set_defaults(fn=bench_pages)
+
+    ex = sub.add_parser("export", help="Exportar el catalogo: paginas de 100 vs stream.")
+    ex.set_defaults(fn=bench_export)
+
+    se = sub.add_parser("search", help="Busqueda de titulos: str.contains vs indice de n-gramas (y difusa).")
+    se.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 110_000])
+    se.add_argument("--queries", nargs="+",
+                    default=["in", "the", "matrix", "the dark", "love story", "zzzqqq"])
+    se.set_defaults(fn=bench_search)
+
+    sp = sub.add_parser("search-pages", help="Paginar una busqueda: sin cache vs cache + cursor.")
+    sp.add_argument("--queries", nargs="+", default=["the", "love", "matrix"])
+    sp.add_argument("--pages", type=int, default=50)
+    sp.add_argument("--page-size", type=int, default=20)
+    sp.set_defaults(fn=bench_search_pages)
+
+    fa = sub.add_parser("facets", help="Filtros por faceta: pandas vs bitmaps.")
+    fa.set_defaults(fn=bench_facets)
+
+    tx = sub.add_parser("text", help="Busqueda de texto BM25 sobre un corpus sintetico.")
+    tx.add_argument("--n-docs", type=int, default=110_000)
+    tx.add_argument("--doc-len", type=int, default=60)
+    tx.add_argument("--vocab", type=int, default=50_000)
+    tx.set_defaults(fn=bench_text)
+
+    ac = sub.add_parser("autocomplete", help="Autocompletado por prefijo vs busqueda completa.")
+    ac.add_argument("--queries", nargs="+", default=["inception", "the dark knight", "love"])
+    ac.set_defaults(fn=bench_autocomplete)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.fn(args)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.feature_engineering import FeatureTransformer
+
+W = 70
+
+
+def sec(title, c="="):
+    print(f"\n{c * W}\n  {title}\n{c * W}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Construye el indice ANN de peliculas junto a movie_catalog.parquet."
+    )
+    p.add_argument("--artifacts-dir", default=os.getenv("ARTIFACTS_DIR", "artifacts"))
+    p.add_argument("--n-lists", type=int, default=None,
+                   help="Listas IVF (por defecto sqrt(n_peliculas)).")
+    p.add_argument("--n-iter", type=int, default=10)
+    p.add_argument("--n-probe", type=int, default=16,
+                   help="Listas visitadas por consulta (mas listas = mas recall, mas latencia).")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    trans_path = Path(args.artifacts_dir) / "transformers"
+
+    sec("MovIA - INDICE ANN DE CANDIDATOS")
+    transformer = FeatureTransformer.load(trans_path)
+    t0 = time.time()
+    index = transformer.build_ann_index(n_lists=args.n_lists, n_iter=args.n_iter,
+                                       n_probe=args.n_probe)
+    sizes = index.list_offsets[1:] - index.list_offsets[:-1]
+    print(f"  {len(index.vectors):,} vectores x {index.vectors.shape[1]} dims | "
+          f"{index.n_lists} listas (min={sizes.min()}, max={sizes.max()}) | {time.time() - t0:.1f}s")
+
+    index.save(trans_path)
+    print(f"  Guardado: {trans_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.feature_engineering import FeatureTransformer
+from src.text_index import TextIndex, movie_texts
+
+W = 70
+
+
+def sec(title, c="="):
+    print(f"\n{c * W}\n  {title}\n{c * W}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Construye el indice BM25 (overview + keywords) junto a movie_catalog.parquet."
+    )
+    p.add_argument("--artifacts-dir", default=os.getenv("ARTIFACTS_DIR", "artifacts"))
+    p.add_argument("--data", default=os.getenv("DATA_PATH", "Train_Data.csv"),
+                   help="Ruta al Train_Data.csv (el catalogo no guarda el texto).")
+    p.add_argument("--k1", type=float, default=1.2)
+    p.add_argument("--b", type=float, default=0.75)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    trans_path = Path(args.artifacts_dir) / "transformers"
+
+    sec("MovIA - INDICE BM25 DE TEXTO")
+    transformer = FeatureTransformer.load(trans_path)
+    movies = (
+        pd.read_csv(args.data, usecols=["movie_id", "overview", "keywords"])
+        .drop_duplicates(subset="movie_id")
+        .set_index("movie_id")
+        # Mismo orden que el catalogo: los documentos son sus filas.
+        .reindex(transformer.movie_catalog.index)
+    )
+    t0 = time.time()
+    index = TextIndex.build(movies.index.values, movie_texts(movies), k1=args.k1, b=args.b)
+    stats = index.stats()
+    print(f"  {index.n_docs:,} documentos | {stats['terms']:,} terminos | "
+          f"{stats['postings']:,} postings | {stats['bytes'] / 1e6:.1f} MB | {time.time() - t0:.1f}s")
+
+    index.save(trans_path)
+    print(f"  Guardado: {trans_path}")
+
+
+if __name__ == "__main__":
+    main()
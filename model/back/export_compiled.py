@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.compiled_model import PARITY_RTOL, from_lightgbm, from_xgboost
+
+W = 70
+
+
+def sec(title, c="="):
+    print(f"\n{c * W}\n  {title}\n{c * W}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Exporta el modelo servido a arrays de nodos para MODEL_TYPE=compiled."
+    )
+    p.add_argument("--source", choices=["xgboost", "lightgbm"], default="xgboost")
+    p.add_argument("--artifacts-dir", default=os.getenv("ARTIFACTS_DIR", "artifacts"))
+    p.add_argument("--check-rows", type=int, default=10_000,
+                   help="Filas aleatorias para verificar paridad con la libreria nativa.")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    model_dir = Path(args.artifacts_dir) / "model"
+
+    sec(f"MovIA - EXPORTACION DE ARBOLES ({args.source})")
+    if args.source == "xgboost":
+        native = xgb.XGBClassifier()
+        native.load_model(str(model_dir / "xgboost_recommender.ubj"))
+        compiled = from_xgboost(native.get_booster())
+        n_features = native.n_features_in_
+        predict = lambda X: native.predict_proba(X)[:, 1]
+    else:
+        import lightgbm as lgb
+        native = lgb.Booster(model_file=str(model_dir / "lightgbm_recommender.txt"))
+        compiled = from_lightgbm(native)
+        n_features = native.num_feature()
+        predict = native.predict
+
+    print(f"  Arboles: {compiled.n_trees} | Nodos: {len(compiled.feature):,} "
+          f"| Profundidad max: {compiled.max_depth}")
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(0, 50, size=(args.check_rows, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    native, ours = predict(X), compiled.predict_proba(X)
+    rtol = PARITY_RTOL[args.source]
+    mismatches = int((~np.isclose(ours, native, rtol=rtol, atol=0)).sum())
+    print(f"  Paridad: {mismatches} diferencias (rtol={rtol:g}) en {args.check_rows:,} filas | "
+          f"max rel {float(np.max(np.abs(ours - native) / np.maximum(np.abs(native), 1e-300))):.2e}")
+    if mismatches:
+        sys.exit("  ERROR: el modelo compilado no coincide con la libreria nativa.")
+
+    out = model_dir / "compiled_recommender.npz"
+    compiled.save(out)
+    print(f"  Guardado: {out}")
+
+
+if __name__ == "__main__":
+    main()
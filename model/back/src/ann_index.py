@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+ANN_FILENAME = "movie_ann.npz"
+
+# Peso (fraccion de la norma al cuadrado) de cada bloque del vector de pelicula.
+BLOCK_WEIGHTS = {"genre": 0.6, "numeric": 0.3, "lang": 0.1}
+NUMERIC_COLS = ["vote_average", "log_vote_count", "log_popularity", "runtime", "movie_year"]
+
+
+def _l2_normalize(M):
+    norms = np.linalg.norm(M, axis=-1, keepdims=True)
+    return M / np.where(norms > 0, norms, 1.0)
+
+
+def build_movie_vectors(catalog, genre_columns, lang_columns):
+    numeric = catalog[NUMERIC_COLS].to_numpy(dtype=np.float64)
+    numeric = np.where(np.isnan(numeric), np.nanmean(numeric, axis=0), numeric)
+    std = numeric.std(axis=0)
+    numeric = (numeric - numeric.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+    blocks = {
+        "genre": catalog[genre_columns].to_numpy(dtype=np.float64),
+        "numeric": numeric,
+        "lang": catalog[lang_columns].to_numpy(dtype=np.float64),
+    }
+    parts = [_l2_normalize(blocks[k]) * np.sqrt(w) for k, w in BLOCK_WEIGHTS.items()]
+    return np.ascontiguousarray(_l2_normalize(np.hstack(parts)), dtype=np.float32)
+
+
+class MovieANNIndex:
+    """Indice IVF (k-means esferico) sobre vectores de pelicula normalizados.
+
+    Las posiciones devueltas son filas de ``movie_catalog``; la similitud es el
+    producto punto (coseno, al estar todo normalizado).
+    """
+
+    def __init__(self, vectors, centroids, list_offsets, list_members, movie_ids, n_probe=16):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_members = list_members
+        self.movie_ids = movie_ids
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, vectors, movie_ids, n_lists=None, n_iter=10, n_probe=16, seed=42):
+        n = len(vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, size=min(n_lists, n), replace=False)].copy()
+
+        for _ in range(n_iter):
+            assign = cls._assign(vectors, centroids)
+            sums = np.column_stack([
+                np.bincount(assign, weights=vectors[:, d], minlength=len(centroids))
+                for d in range(vectors.shape[1])
+            ])
+            empty = np.bincount(assign, minlength=len(centroids)) == 0
+            sums[empty] = centroids[empty]
+            centroids = _l2_normalize(sums).astype(np.float32)
+
+        assign = cls._assign(vectors, centroids)
+        members = np.argsort(assign, kind="stable").astype(np.int32)
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=len(centroids)))
+        return cls(vectors, centroids, offsets, members, np.asarray(movie_ids), n_probe=n_probe)
+
+    @staticmethod
+    def _assign(vectors, centroids, chunk=16_384):
+        out = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            out[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    def query_vector(self, positions):
+        q = self.vectors[positions].mean(axis=0)
+        return _l2_normalize(q)
+
+    def search(self, query, k, exclude=()):
+        exclude = np.asarray(exclude, dtype=np.int64)
+        needed = k + len(exclude)
+        order = np.argsort(-(self.centroids @ query))
+        sizes = self.list_offsets[order + 1] - self.list_offsets[order]
+        n_probe = max(self.n_probe, int(np.searchsorted(np.cumsum(sizes), needed)) + 1)
+        probe = order[:n_probe]
+
+        cand = np.concatenate(
+            [self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe]
+        )
+        if len(exclude):
+            cand = cand[~np.isin(cand, exclude)]
+        scores = self.vectors[cand] @ query
+        if len(cand) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            cand, scores = cand[top], scores[top]
+        ranked = np.lexsort((cand, -scores))
+        return cand[ranked], scores[ranked]
+
+    def save(self, path):
+        path = Path(path)
+        with open(path / ANN_FILENAME, "wb") as f:
+            np.savez(
+                f,
+                vectors=self.vectors, centroids=self.centroids,
+                list_offsets=self.list_offsets, list_members=self.list_members,
+                movie_ids=self.movie_ids,
+                meta=np.array(json.dumps({"block_weights": BLOCK_WEIGHTS, "n_probe": self.n_probe})),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(Path(path) / ANN_FILENAME) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("block_weights") != BLOCK_WEIGHTS:
+                raise ValueError("Indice ANN construido con otros pesos; reconstruir.")
+            return cls(
+                data["vectors"], data["centroids"], data["list_offsets"],
+                data["list_members"], data["movie_ids"], n_probe=meta["n_probe"],
+            )
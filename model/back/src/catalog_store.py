@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.ann_index import ANN_FILENAME
+
+CATALOG_FILE = "catalog.arrow"
+STORE_META = "store_meta.json"
+# Ficheros de origen cuya huella identifica una version del almacen.
+SOURCE_FILES = ["movie_catalog.parquet", "transformer_meta.json", "genre_mlb.joblib"]
+# Tambien copiados al almacen, pero pueden no existir (el indice ANN es opcional).
+OPTIONAL_SOURCE_FILES = [ANN_FILENAME]
+# Solo se borran directorios con forma de version o temporales del almacen: el
+# directorio raiz puede ser compartido (/dev/shm, /tmp).
+_VERSION_DIR = re.compile(r"[0-9a-f]{12}")
+_TMP_DIR = re.compile(r"\.tmp-[0-9a-f]{32}")
+# Un temporal mas viejo que esto es de un worker que murio a medio escribir.
+ORPHAN_TMP_SECONDS = 3600
+
+
+def source_fingerprint(path) -> str:
+    h = hashlib.sha1()
+    for name in SOURCE_FILES:
+        st = (Path(path) / name).stat()
+        h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    for name in OPTIONAL_SOURCE_FILES:
+        file = Path(path) / name
+        if file.exists():
+            st = file.stat()
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        else:
+            h.update(f"{name}:-".encode())
+    return h.hexdigest()[:12]
+
+
+def _column_to_arrow(series):
+    if series.dtype.kind in "biuf":
+        # pa.array sobre el ndarray conserva NaN como valor (no lo convierte en null).
+        return pa.array(series.to_numpy())
+    if series.name == "_genres_list":
+        return pa.array([list(gl) for gl in series], type=pa.list_(pa.large_string()))
+    values = [None if pd.isna(v) else str(v) for v in series]
+    return pa.array(values, type=pa.large_string())
+
+
+def write_store(catalog, arrays: dict, meta: dict, store_root, fingerprint) -> Path:
+    """Escribe el catalogo (Arrow IPC sin comprimir) y los arrays (.npy) del almacen.
+
+    Se escribe en un directorio temporal y se publica con un rename, asi varios
+    workers arrancando a la vez no ven un almacen a medias.
+    """
+    root = Path(store_root)
+    final = root / fingerprint
+    if (final / STORE_META).exists():
+        return final
+
+    tmp = root / f".tmp-{uuid.uuid4().hex}"
+    tmp.mkdir(parents=True)
+    index_name = catalog.index.name or "movie_id"
+    columns = {index_name: pa.array(catalog.index.to_numpy())}
+    columns.update({c: _column_to_arrow(catalog[c]) for c in catalog.columns})
+    table = pa.table(columns)
+    with pa.OSFile(str(tmp / CATALOG_FILE), "wb") as f:
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+    with open(tmp / STORE_META, "w", encoding="utf-8") as f:
+        json.dump({**meta, "index_name": index_name, "arrays": sorted(arrays)}, f,
+                  ensure_ascii=False)
+
+    if final.exists() and not (final / STORE_META).exists():
+        shutil.rmtree(final, ignore_errors=True)
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # Otro worker publico la misma version primero.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    _remove_stale(root, fingerprint)
+    return final
+
+
+def _remove_stale(root: Path, fingerprint: str):
+    now = time.time()
+    for entry in root.iterdir():
+        if not entry.is_dir() or entry.is_symlink() or entry.name == fingerprint:
+            continue
+        if _VERSION_DIR.fullmatch(entry.name) and (entry / STORE_META).exists():
+            # Los procesos que aun mapean ficheros borrados siguen leyendolos sin problema.
+            shutil.rmtree(entry, ignore_errors=True)
+        elif _TMP_DIR.fullmatch(entry.name) and now - entry.stat().st_mtime > ORPHAN_TMP_SECONDS:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def _column_from_arrow(chunked):
+    is_numeric = pa.types.is_integer(chunked.type) or pa.types.is_floating(chunked.type)
+    if is_numeric and chunked.num_chunks == 1 and chunked.null_count == 0:
+        return chunked.chunk(0).to_numpy(zero_copy_only=True)
+    if is_numeric:
+        return chunked.to_numpy()
+    return pd.arrays.ArrowExtensionArray(chunked)
+
+
+def open_store(store_dir):
+    """Abre el almacen en modo solo lectura sin copiar los datos.
+
+    Las columnas numericas son vistas numpy sobre el fichero mapeado, las de
+    texto y listas quedan respaldadas por los buffers Arrow (offsets + blob
+    UTF-8) y los arrays precalculados se cargan con ``mmap_mode="r"``. Las
+    paginas las comparte el page cache entre todos los procesos.
+    """
+    store_dir = Path(store_dir)
+    with open(store_dir / STORE_META, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    source = pa.memory_map(str(store_dir / CATALOG_FILE), "r")
+    table = pa.ipc.open_file(source).read_all()
+    index_name = meta["index_name"]
+    index = pd.Index(_column_from_arrow(table.column(index_name)), name=index_name)
+    columns = {
+        name: _column_from_arrow(table.column(name))
+        for name in table.column_names if name != index_name
+    }
+    catalog = pd.DataFrame(columns, index=index, copy=False)
+    arrays = {name: np.load(store_dir / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+    return catalog, arrays, meta
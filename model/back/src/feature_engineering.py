@@ -3,8 +3,31 @@ import numpy as np
 from sklearn.preprocessing import MultiLabelBinarizer
 import joblib
 import json
+import threading
+import time
 from pathlib import Path
 
+from src.ann_index import ANN_FILENAME, MovieANNIndex, build_movie_vectors
+from src.catalog_store import open_store, source_fingerprint, write_store, STORE_META
+from src.text_index import TEXT_INDEX_DIR, TEXT_META, TextIndex, movie_texts
+
+RETRIEVERS = ("genre", "ann")
+
+
+class _Lap:
+    """Acumula en ``timings`` el tiempo transcurrido desde la marca anterior."""
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.t = time.perf_counter()
+
+    def __call__(self, stage):
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self.t
+        self.t = now
+
 
 def parse_genres(value):
     if pd.isna(value) or str(value).strip() == "":
@@ -21,6 +44,27 @@ def extract_year(date_str):
         return np.nan
 
 
+# Columnas que alimentan las interacciones; se guardan en float64 para que las
+# features derivadas coincidan exactamente con las del camino pandas.
+_EXACT_MOVIE_COLS = ["vote_average", "log_vote_count", "log_popularity", "runtime", "movie_year"]
+
+INTERACTION_FEATURES = [
+    "runtime_diff", "abs_runtime_diff", "popularity_diff", "vote_avg_diff",
+    "year_diff", "abs_year_diff", "genre_overlap_count", "genre_overlap_ratio",
+    "genre_jaccard", "genre_affinity", "genre_cosine", "in_vote_range",
+    "in_runtime_range", "vote_count_ratio", "lang_match",
+]
+
+_POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(arr):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(arr)
+    as_bytes = arr.view(np.uint8).reshape(arr.shape + (arr.dtype.itemsize,))
+    return _POPCOUNT_LUT[as_bytes].sum(axis=-1)
+
+
 class FeatureTransformer:
 
     def __init__(self):
@@ -31,6 +75,14 @@ class FeatureTransformer:
         self.median_runtime = None
         self.movie_catalog = None
         self.feature_names_ = None
+        self.genre_vocab_ = None
+        self.genre_postings_ = None
+        self._genre_bits = None
+        self._movie_matrix = None
+        self._movie_exact = None
+        self._ann_index = None
+        self._ann_lock = threading.Lock()
+        self.text_index = None
         self._fitted = False
 
     def fit(self, train_df, all_movies_df):
@@ -54,6 +106,11 @@ class FeatureTransformer:
         self.median_runtime = int(train_df["runtime"].median())
 
         self.movie_catalog = self._build_catalog(all_movies_df)
+        self._build_genre_index()
+        self._build_movie_matrix()
+        # El catalogo no guarda el texto: el indice BM25 se construye aqui, desde los datos crudos.
+        movies = all_movies_df.drop_duplicates(subset="movie_id").set_index("movie_id")
+        self.text_index = TextIndex.build(movies.index.values, movie_texts(movies))
         self._fitted = True
         return self
 
@@ -107,6 +164,87 @@ class FeatureTransformer:
 
         return cat
 
+    def _build_genre_index(self):
+        genre_lists = self.movie_catalog["_genres_list"]
+        lengths = genre_lists.apply(len).values
+        positions = np.repeat(np.arange(len(genre_lists)), lengths)
+        flat = [g for gl in genre_lists for g in gl]
+        codes, vocab = pd.factorize(pd.Series(flat, dtype=object), sort=True)
+
+        self.genre_vocab_ = {g: i for i, g in enumerate(vocab)}
+        n_words = max(1, (len(vocab) + 63) // 64)
+        bits = np.zeros((len(genre_lists), n_words), dtype=np.uint64)
+        for w in range(n_words):
+            in_word = (codes // 64) == w
+            np.bitwise_or.at(
+                bits[:, w], positions[in_word],
+                np.left_shift(np.uint64(1), (codes[in_word] % 64).astype(np.uint64)),
+            )
+        self._genre_bits = bits
+
+        order = np.argsort(codes, kind="stable")
+        splits = np.searchsorted(codes[order], np.arange(1, len(vocab)))
+        self.genre_postings_ = {
+            g: np.unique(p) for g, p in zip(vocab, np.split(positions[order], splits))
+        }
+
+    def _genre_mask(self, genres):
+        mask = np.zeros(self._genre_bits.shape[1], dtype=np.uint64)
+        for g in genres:
+            code = self.genre_vocab_.get(g)
+            if code is not None:
+                mask[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+        return mask
+
+    def genre_overlap_counts(self, genres):
+        hits = self._genre_bits & self._genre_mask(genres)
+        return _popcount(hits).sum(axis=1, dtype=np.int64)
+
+    def _genre_candidates(self, user_genres, exclude_ids, top_n):
+        scores = self.genre_overlap_counts(user_genres)
+        exclude_pos = self.movie_catalog.index.get_indexer(exclude_ids)
+        scores[exclude_pos[exclude_pos >= 0]] = 0
+
+        eligible = np.flatnonzero(scores > 0)
+        if len(eligible) > top_n:
+            s = scores[eligible]
+            kth = s[np.argpartition(-s, top_n - 1)[top_n - 1]]
+            above = eligible[s > kth]
+            ties = eligible[s == kth][: top_n - len(above)]
+            eligible = np.concatenate([above, ties])
+
+        # mismo orden que Series.nlargest: score descendente, empates por orden de catalogo
+        ranked = eligible[np.lexsort((eligible, -scores[eligible]))]
+        return self.movie_catalog.index.values[ranked].tolist()
+
+    def _build_movie_matrix(self):
+        feats = self.movie_catalog[self._movie_feature_cols()]
+        self._movie_matrix = np.ascontiguousarray(feats.fillna(0).to_numpy(dtype=np.float32))
+        self._movie_exact = np.ascontiguousarray(feats[_EXACT_MOVIE_COLS].to_numpy(dtype=np.float64))
+
+    def movie_positions(self, movie_ids):
+        return self.movie_catalog.index.get_indexer(movie_ids)
+
+    @property
+    def ann_index(self):
+        # Sin movie_ann.npz se construye una vez; los hilos que llegan a la vez esperan a ese.
+        if self._ann_index is None:
+            with self._ann_lock:
+                if self._ann_index is None:
+                    self._ann_index = self.build_ann_index()
+        return self._ann_index
+
+    def build_ann_index(self, **kwargs):
+        lang_cols = [f"lang_{l}" for l in self.top_languages]
+        vectors = build_movie_vectors(self.movie_catalog, self.genre_columns, lang_cols)
+        return MovieANNIndex.build(vectors, self.movie_catalog.index.values, **kwargs)
+
+    def _ann_candidates(self, seed_ids, top_n):
+        seed_pos = self.movie_positions(seed_ids)
+        index = self.ann_index
+        positions, _ = index.search(index.query_vector(seed_pos), top_n, exclude=seed_pos)
+        return self.movie_catalog.index.values[positions].tolist()
+
     def _movie_feature_cols(self):
         base = [
             "vote_average", "log_vote_count", "log_popularity",
@@ -178,9 +316,7 @@ class FeatureTransformer:
 
     def transform(self, df, user_profiles):
         sample_profile = next(iter(user_profiles.values()))
-        user_feat_keys = sorted(
-            [k for k in sample_profile if not k.startswith("_")]
-        )
+        user_feat_keys = self._user_feature_keys(sample_profile)
         internal_keys = ["_user_top_lang"]
 
         user_records = []
@@ -214,7 +350,17 @@ class FeatureTransformer:
         )
 
         user_feats = merged[user_feat_keys].reset_index(drop=True)
-        inter_feats = self._compute_interactions(merged, movie_feats, user_feats)
+        lang_cols = [f"lang_{l}" for l in self.top_languages]
+        user_pref_cols = [f"user_pref_{gc}" for gc in self.genre_columns]
+        inter = self._compute_interactions(
+            movie_feats[_EXACT_MOVIE_COLS].values,
+            movie_feats[self.genre_columns].values.astype(float),
+            movie_feats[lang_cols].values.astype(float),
+            {k: user_feats[k].values for k in user_feat_keys},
+            user_feats[user_pref_cols].values.astype(float),
+            self._lang_indices(merged["_user_top_lang"].values),
+        )
+        inter_feats = pd.DataFrame(inter, columns=INTERACTION_FEATURES)
 
         X = pd.concat([movie_feats, user_feats, inter_feats], axis=1)
         X = X.fillna(0)
@@ -223,17 +369,57 @@ class FeatureTransformer:
         meta = merged[keep].reset_index(drop=True)
         return X, meta
 
-    def _compute_interactions(self, merged, movie_feats, user_feats):
-        n = len(merged)
+    def transform_profile(self, movie_ids, user_profile):
+        movie_ids = np.asarray(movie_ids)
+        pos = self.movie_positions(movie_ids)
+        found = pos >= 0
+        movie_ids, pos = movie_ids[found], pos[found]
+
+        user_feat_keys = self._user_feature_keys(user_profile)
+        n_mf, n_uf = self._movie_matrix.shape[1], len(user_feat_keys)
+        n_lang = len(self.top_languages)
+        genre_slice = slice(n_mf - len(self.genre_columns), n_mf)
+        lang_slice = slice(genre_slice.start - n_lang, genre_slice.start)
+
+        X = np.empty((len(pos), n_mf + n_uf + len(INTERACTION_FEATURES)), dtype=np.float32)
+        np.take(self._movie_matrix, pos, axis=0, out=X[:, :n_mf], mode="clip")
+
+        user_vec = np.array([user_profile.get(k, 0.0) for k in user_feat_keys], dtype=np.float64)
+        X[:, n_mf:n_mf + n_uf] = user_vec
+        user_gp = np.array(
+            [user_profile.get(f"user_pref_{gc}", 0.0) for gc in self.genre_columns],
+            dtype=np.float64,
+        )
+        X[:, n_mf + n_uf:] = self._compute_interactions(
+            self._movie_exact[pos],
+            X[:, genre_slice].astype(np.float64),
+            X[:, lang_slice].astype(np.float64),
+            user_profile,
+            user_gp,
+            self._lang_indices([user_profile.get("_user_top_lang", "")])[0],
+        )
+        np.nan_to_num(X, copy=False, nan=0.0)
+        return X, movie_ids
+
+    @staticmethod
+    def _user_feature_keys(profile):
+        return sorted(k for k in profile if not k.startswith("_"))
 
-        runtime_diff = movie_feats["runtime"].values - user_feats["user_avg_runtime"].values
-        pop_diff = movie_feats["log_popularity"].values - user_feats["user_avg_log_popularity"].values
-        vote_diff = movie_feats["vote_average"].values - user_feats["user_avg_vote_average"].values
-        year_diff = movie_feats["movie_year"].values - user_feats["user_avg_movie_year"].values
+    def _lang_indices(self, user_top_langs):
+        col_to_idx = {f"lang_{l}": i for i, l in enumerate(self.top_languages)}
+        return np.array([col_to_idx.get(str(l), 0) for l in user_top_langs])
+
+    def _compute_interactions(self, movie_exact, movie_gm, movie_lang, user, user_gp, lang_idx):
+        # Los valores de usuario pueden ser escalares (un perfil) o arrays por fila;
+        # el broadcasting de NumPy cubre ambos casos con las mismas operaciones.
+        n = len(movie_exact)
+        m_va, m_lvc, m_pop, m_rt, m_year = movie_exact.T
+
+        runtime_diff = m_rt - user["user_avg_runtime"]
+        pop_diff = m_pop - user["user_avg_log_popularity"]
+        vote_diff = m_va - user["user_avg_vote_average"]
+        year_diff = m_year - user["user_avg_movie_year"]
 
-        movie_gm = movie_feats[self.genre_columns].values.astype(float)
-        user_pref_cols = [f"user_pref_{gc}" for gc in self.genre_columns]
-        user_gp = user_feats[user_pref_cols].values.astype(float)
         user_gb = (user_gp > 0).astype(float)
 
         overlap = (movie_gm * user_gb).sum(axis=1)
@@ -244,65 +430,49 @@ class FeatureTransformer:
 
         genre_affinity = (movie_gm * user_gp).sum(axis=1)
         norm_movie = np.sqrt((movie_gm ** 2).sum(axis=1) + 1e-10)
-        norm_user = np.sqrt((user_gp ** 2).sum(axis=1) + 1e-10)
+        norm_user = np.sqrt((user_gp ** 2).sum(axis=-1) + 1e-10)
         genre_cosine = genre_affinity / (norm_movie * norm_user + 1e-10)
 
-        u_max_va = user_feats["user_max_vote_average"].values
-        u_min_va = user_feats["user_min_vote_average"].values
-        u_max_rt = user_feats["user_max_runtime"].values
-        u_min_rt = user_feats["user_min_runtime"].values
-        m_va = movie_feats["vote_average"].values
-        m_rt = movie_feats["runtime"].values
-
-        in_vote_range = ((m_va >= u_min_va) & (m_va <= u_max_va)).astype(float)
-        in_runtime_range = ((m_rt >= u_min_rt) & (m_rt <= u_max_rt)).astype(float)
+        in_vote_range = (
+            (m_va >= user["user_min_vote_average"]) & (m_va <= user["user_max_vote_average"])
+        ).astype(float)
+        in_runtime_range = (
+            (m_rt >= user["user_min_runtime"]) & (m_rt <= user["user_max_runtime"])
+        ).astype(float)
 
-        u_avg_vc = user_feats["user_avg_log_vote_count"].values
-        vote_count_ratio = movie_feats["log_vote_count"].values / (u_avg_vc + 1e-6)
+        vote_count_ratio = m_lvc / (user["user_avg_log_vote_count"] + 1e-6)
+        lang_match = movie_lang[np.arange(n), lang_idx]
 
-        lang_cols = [f"lang_{l}" for l in self.top_languages]
-        lang_matrix = movie_feats[lang_cols].values.astype(float)
-        user_top_langs = merged["_user_top_lang"].values
-        col_to_idx = {c: i for i, c in enumerate(lang_cols)}
-        lang_indices = np.array([col_to_idx.get(str(l), 0) for l in user_top_langs])
-        lang_match = lang_matrix[np.arange(n), lang_indices]
-
-        return pd.DataFrame({
-            "runtime_diff": runtime_diff,
-            "abs_runtime_diff": np.abs(runtime_diff),
-            "popularity_diff": pop_diff,
-            "vote_avg_diff": vote_diff,
-            "year_diff": year_diff,
-            "abs_year_diff": np.abs(year_diff),
-            "genre_overlap_count": overlap,
-            "genre_overlap_ratio": overlap_ratio,
-            "genre_jaccard": jaccard,
-            "genre_affinity": genre_affinity,
-            "genre_cosine": genre_cosine,
-            "in_vote_range": in_vote_range,
-            "in_runtime_range": in_runtime_range,
-            "vote_count_ratio": vote_count_ratio,
-            "lang_match": lang_match,
-        })
+        return np.column_stack([
+            runtime_diff, np.abs(runtime_diff), pop_diff, vote_diff,
+            year_diff, np.abs(year_diff), overlap, overlap_ratio,
+            jaccard, genre_affinity, genre_cosine, in_vote_range,
+            in_runtime_range, vote_count_ratio, lang_match,
+        ])
 
     def prepare_inference(self, seed_movie_ids, candidate_movie_ids=None,
-                          top_n_candidates=500):
+                          top_n_candidates=500, retriever="genre", timings=None):
+        """``timings`` (dict opcional) recibe la duracion en segundos de cada etapa."""
+        if retriever not in RETRIEVERS:
+            raise ValueError(f"retriever invalido: {retriever}. Usa {' o '.join(RETRIEVERS)}.")
+        lap = _Lap(timings)
         valid_seeds = [m for m in seed_movie_ids if m in self.movie_catalog.index]
         if not valid_seeds:
             raise ValueError("Ninguno de los movie_ids proporcionados esta en el catalogo.")
 
         seed_movies = self.movie_catalog.loc[valid_seeds]
+        lap("seed_lookup")
         user_profile = self._aggregate_profile(seed_movies)
+        lap("aggregate_profile")
 
-        if candidate_movie_ids is None:
+        if candidate_movie_ids is None and retriever == "ann":
+            candidate_movie_ids = self._ann_candidates(valid_seeds, top_n_candidates)
+        elif candidate_movie_ids is None:
             user_genres = user_profile["_user_genre_set"]
             if user_genres:
-                scores = self.movie_catalog["_genres_list"].apply(
-                    lambda gl: len(set(gl) & user_genres)
+                candidate_movie_ids = self._genre_candidates(
+                    user_genres, valid_seeds, top_n_candidates
                 )
-                scores = scores.drop(valid_seeds, errors="ignore")
-                scores = scores[scores > 0]
-                candidate_movie_ids = scores.nlargest(top_n_candidates).index.tolist()
             else:
                 pool = self.movie_catalog.drop(valid_seeds, errors="ignore")
                 candidate_movie_ids = (
@@ -313,23 +483,20 @@ class FeatureTransformer:
                 m for m in candidate_movie_ids
                 if m in self.movie_catalog.index and m not in valid_seeds
             ]
+        lap("candidates")
 
-        if not candidate_movie_ids:
-            return pd.DataFrame(), pd.DataFrame()
-
-        fake_df = pd.DataFrame({
-            "user_id": ["__inference__"] * len(candidate_movie_ids),
-            "movie_id": candidate_movie_ids,
-        })
-        fake_profiles = {"__inference__": user_profile}
-        X, meta = self.transform(fake_df, fake_profiles)
-
-        surviving_ids = meta["movie_id"].values
+        if candidate_movie_ids:
+            X, surviving_ids = self.transform_profile(candidate_movie_ids, user_profile)
+        else:
+            # Mismos tipos que con candidatos: matriz (0, n_features) y ids vacios.
+            X = np.empty((0, len(self.feature_names_)), dtype=np.float32)
+            surviving_ids = np.empty(0, dtype=self.movie_catalog.index.dtype)
         info = (
             self.movie_catalog.loc[surviving_ids, ["title", "genres_raw"]]
             .reset_index()
         )
         info.columns = ["movie_id", "title", "genres"]
+        lap("transform")
 
         return X, info
 
@@ -356,20 +523,19 @@ class FeatureTransformer:
         with open(path / "transformer_meta.json", "w", encoding="utf-8") as f:
             json.dump(meta, f, indent=2, ensure_ascii=False)
 
+        self.ann_index.save(path)
+        if self.text_index is not None:
+            self.text_index.save(path)
+
     @classmethod
-    def load(cls, path):
+    def load(cls, path, store_dir=None):
+        """Carga los artefactos; con ``store_dir`` el catalogo se mapea en memoria
+        desde un almacen compartido entre procesos (se crea si falta)."""
         path = Path(path)
         t = cls()
 
         t.genre_mlb = joblib.load(path / "genre_mlb.joblib")
 
-        cat = pd.read_parquet(path / "movie_catalog.parquet")
-        cat["_genres_list"] = cat["_genres_list_str"].apply(
-            lambda x: x.split("|") if x else []
-        )
-        cat = cat.drop(columns=["_genres_list_str"])
-        t.movie_catalog = cat
-
         with open(path / "transformer_meta.json", "r", encoding="utf-8") as f:
             meta = json.load(f)
 
@@ -378,6 +544,81 @@ class FeatureTransformer:
         t.median_year = meta["median_year"]
         t.median_runtime = meta["median_runtime"]
         t.feature_names_ = meta["feature_names"]
+
+        if store_dir is not None:
+            fingerprint = source_fingerprint(path)
+            store = Path(store_dir) / fingerprint
+            if not (store / STORE_META).exists():
+                t._load_catalog(path)
+                write_store(t.movie_catalog, t._store_arrays(), t._store_meta(),
+                            store_dir, fingerprint)
+            t._attach_store(*open_store(store))
+        else:
+            t._load_catalog(path)
+        t._load_text_index(path)
         t._fitted = True
 
         return t
+
+    def _load_text_index(self, path):
+        # Opcional (build_text_index.py); mapeado en memoria y descartado si no cuadra con el catalogo.
+        if not (Path(path) / TEXT_INDEX_DIR / TEXT_META).exists():
+            return
+        index = TextIndex.load(path)
+        if np.array_equal(index.movie_ids, self.movie_catalog.index.values):
+            self.text_index = index
+
+    def _load_catalog(self, path):
+        cat = pd.read_parquet(path / "movie_catalog.parquet")
+        cat["_genres_list"] = cat["_genres_list_str"].apply(
+            lambda x: x.split("|") if x else []
+        )
+        cat = cat.drop(columns=["_genres_list_str"])
+        self.movie_catalog = cat
+        self._build_genre_index()
+        self._build_movie_matrix()
+        if (path / ANN_FILENAME).exists():
+            # Un indice desalineado con el catalogo se descarta y se reconstruye al usarlo.
+            try:
+                index = MovieANNIndex.load(path)
+            except (ValueError, KeyError):
+                index = None
+            if index is not None and np.array_equal(index.movie_ids, cat.index.values):
+                self._ann_index = index
+
+    def _store_arrays(self):
+        vocab = sorted(self.genre_vocab_, key=self.genre_vocab_.get)
+        postings = [self.genre_postings_[g] for g in vocab]
+        arrays = {
+            "movie_matrix": self._movie_matrix,
+            "movie_exact": self._movie_exact,
+            "genre_bits": self._genre_bits,
+            "genre_post_values": np.concatenate(postings) if postings else np.empty(0, np.int64),
+            "genre_post_offsets": np.cumsum([0] + [len(p) for p in postings]),
+        }
+        if self._ann_index is not None:
+            for name in ["vectors", "centroids", "list_offsets", "list_members"]:
+                arrays[f"ann_{name}"] = getattr(self._ann_index, name)
+        return arrays
+
+    def _store_meta(self):
+        return {
+            "genre_vocab": sorted(self.genre_vocab_, key=self.genre_vocab_.get),
+            "ann_n_probe": self._ann_index.n_probe if self._ann_index is not None else None,
+        }
+
+    def _attach_store(self, catalog, arrays, meta):
+        self.movie_catalog = catalog
+        self._movie_matrix = arrays["movie_matrix"]
+        self._movie_exact = arrays["movie_exact"]
+        self._genre_bits = arrays["genre_bits"]
+        vocab = meta["genre_vocab"]
+        offsets = arrays["genre_post_offsets"]
+        values = arrays["genre_post_values"]
+        self.genre_vocab_ = {g: i for i, g in enumerate(vocab)}
+        self.genre_postings_ = {g: values[offsets[i]:offsets[i + 1]] for i, g in enumerate(vocab)}
+        if "ann_vectors" in arrays:
+            self._ann_index = MovieANNIndex(
+                arrays["ann_vectors"], arrays["ann_centroids"], arrays["ann_list_offsets"],
+                arrays["ann_list_members"], catalog.index.values, n_probe=meta["ann_n_probe"],
+            )
@@ -0,0 +1,136 @@
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TEXT_INDEX_DIR = "movie_text_bm25"
+TEXT_META = "text_meta.json"
+TEXT_ARRAYS = ["terms", "offsets", "docs", "tf", "doc_len", "movie_ids"]
+
+_TOKEN = re.compile(r"\w+")
+# Palabras vacias (overviews en ingles): no aportan a BM25 y serian las posting lists mas largas.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in into is it its of on "
+    "or she that the their them they this to was were when where which who whose will with".split()
+)
+
+
+def tokenize(text) -> list[str]:
+    """Minusculas, sin acentos y sin palabras vacias ni de una letra."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [t for t in _TOKEN.findall(folded) if len(t) > 1 and t not in STOPWORDS]
+
+
+def movie_texts(movies) -> pd.Series:
+    """Overview + keywords de cada pelicula (vacio si faltan)."""
+    overview = movies["overview"].fillna("").astype(str)
+    keywords = movies["keywords"].fillna("").astype(str).str.replace(",", " ", regex=False)
+    return overview + " " + keywords
+
+
+class TextIndex:
+    """Indice invertido BM25 sobre overview + keywords.
+
+    Matriz termino-documento en CSR (``offsets`` por termino, ``docs`` y
+    ``tf`` por posting), vocabulario ordenado para ``searchsorted`` y
+    longitud de cada documento. Se guarda como .npy sueltos junto al
+    catalogo y se abre con ``mmap_mode="r"``: solo se leen las posting
+    lists de los terminos consultados. Los documentos son filas de
+    ``movie_catalog``.
+    """
+
+    def __init__(self, terms, offsets, docs, tf, doc_len, movie_ids, k1=1.2, b=0.75):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tf = tf
+        self.doc_len = doc_len
+        self.movie_ids = movie_ids
+        self.k1 = float(k1)
+        self.b = float(b)
+        n_docs = len(doc_len)
+        df = np.diff(offsets).astype(np.float64)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(np.mean(doc_len)) if n_docs else 0.0
+        # Denominador de BM25 sin el tf: depende solo del documento.
+        self._norm = (self.k1 * (1 - self.b + self.b * np.asarray(doc_len) / max(avgdl, 1e-9))
+                      ).astype(np.float32)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, movie_ids, texts, k1=1.2, b=0.75):
+        doc_terms = [tokenize(t) for t in texts]
+        n_docs = len(doc_terms)
+        lengths = np.fromiter((len(t) for t in doc_terms), dtype=np.int64, count=n_docs)
+        codes, vocab = pd.factorize(pd.Series([t for ts in doc_terms for t in ts], dtype=object),
+                                    sort=True)
+        doc_of = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        # Pares (termino, documento) unicos, ordenados por termino y luego por documento.
+        pairs, tf = np.unique(codes.astype(np.int64) * max(n_docs, 1) + doc_of, return_counts=True)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(pairs // max(n_docs, 1), minlength=len(vocab)))
+        return cls(
+            np.array(list(vocab), dtype=str), offsets, (pairs % max(n_docs, 1)).astype(np.int32),
+            np.minimum(tf, np.iinfo(np.uint16).max).astype(np.uint16),
+            lengths.astype(np.int32), np.asarray(movie_ids), k1=k1, b=b,
+        )
+
+    def search(self, query: str, k: int = 20):
+        """Top-``k`` (posiciones, puntuaciones) por BM25 y numero total de coincidencias."""
+        docs, scores = [], []
+        for term in set(tokenize(query)):
+            i = int(np.searchsorted(self.terms, term))
+            if i == len(self.terms) or self.terms[i] != term:
+                continue
+            lo, hi = self.offsets[i], self.offsets[i + 1]
+            term_docs = np.asarray(self.docs[lo:hi])
+            tf = self.tf[lo:hi].astype(np.float32)
+            docs.append(term_docs)
+            scores.append(self.idf[i] * tf * (self.k1 + 1) / (tf + self._norm[term_docs]))
+        if not docs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+        if len(docs) == 1:
+            hits, hit_scores = docs[0].astype(np.int64), scores[0]
+        else:
+            # Suma por documento de todas las posting lists de la consulta.
+            acc = np.bincount(np.concatenate(docs), weights=np.concatenate(scores),
+                              minlength=self.n_docs)
+            hits = np.flatnonzero(acc)
+            hit_scores = acc[hits].astype(np.float32)
+        total = len(hits)
+        if total > k:
+            # Se conservan todos los empatados con la k-esima: paginas estables entre distintos k.
+            kth = np.partition(hit_scores, total - k)[total - k]
+            keep = hit_scores >= kth
+            hits, hit_scores = hits[keep], hit_scores[keep]
+        ranked = np.lexsort((hits, -hit_scores))[:k]
+        return hits[ranked], hit_scores[ranked], total
+
+    def save(self, path):
+        out = Path(path) / TEXT_INDEX_DIR
+        out.mkdir(parents=True, exist_ok=True)
+        for name in TEXT_ARRAYS:
+            np.save(out / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        with open(out / TEXT_META, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "n_docs": self.n_docs,
+                       "n_terms": len(self.terms)}, f)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        src = Path(path) / TEXT_INDEX_DIR
+        with open(src / TEXT_META, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(src / f"{name}.npy", mmap_mode="r" if mmap else None)
+                  for name in TEXT_ARRAYS}
+        return cls(**arrays, k1=meta["k1"], b=meta["b"])
+
+    def stats(self) -> dict:
+        return {"terms": len(self.terms), "postings": len(self.docs),
+                "bytes": int(sum(getattr(self, n).nbytes for n in TEXT_ARRAYS))}
@@ -0,0 +1,20 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, engine
+
+# Semillas presentes en el catalogo real (artefactos de dvc pull).
+VALID_IDS = [27205, 603, 496243, 550, 335984]
+
+
+@pytest.fixture(scope="session")
+def loaded_engine():
+    """Motor global con los artefactos cargados; solo lo piden las pruebas que lo usan."""
+    if not engine.is_loaded:
+        engine.load()
+    return engine
+
+
+@pytest.fixture
+def client(loaded_engine):
+    return TestClient(app)
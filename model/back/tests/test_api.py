@@ -1,6 +1,16 @@
+import asyncio
+import gc
+import json
+import threading
+
+import pandas as pd
+import pyarrow as pa
 import pytest
 from fastapi.testclient import TestClient
+import app.main as main
 from app.main import app, engine
+from app.cache import TTLCache
+from app.search_index import FUZZY_CANDIDATES, encode_search_cursor, substring_distance
 
 client = TestClient(app)
 
@@ -76,6 +86,135 @@ class TestMoviesList:
         assert r.status_code == 200
         data = r.json()
         assert data["movies"] == []
+        assert data["next_cursor"] is None
+
+    def test_list_ordered_by_popularity(self):
+        cat = engine.transformer.movie_catalog
+        expected = cat.sort_values("log_popularity", ascending=False).index[:10].tolist()
+        data = client.get("/movies?page=1&page_size=10").json()
+        assert [m["movie_id"] for m in data["movies"]] == expected
+
+    def test_list_sort_by_year(self):
+        data = client.get("/movies?page=1&page_size=20&sort=year").json()
+        years = [m["year"] for m in data["movies"]]
+        assert years == sorted(years, reverse=True)
+
+    def test_list_invalid_sort(self):
+        assert client.get("/movies?sort=title").status_code == 422
+
+    def test_cursor_matches_offset_pages(self):
+        first = client.get("/movies?page=1&page_size=7&sort=vote_average").json()
+        cursor = first["next_cursor"]
+        assert cursor
+        by_cursor = client.get(f"/movies?page_size=7&sort=vote_average&cursor={cursor}").json()
+        by_offset = client.get("/movies?page=2&page_size=7&sort=vote_average").json()
+        assert by_cursor["movies"] == by_offset["movies"]
+
+    def test_invalid_cursor(self):
+        assert client.get("/movies?cursor=basura").status_code == 400
+        cursor = client.get("/movies?page_size=3").json()["next_cursor"]
+        assert client.get(f"/movies?sort=year&cursor={cursor}").status_code == 400
+
+    def test_page_served_from_cache(self):
+        engine.pager.cache.clear()
+        body = engine.list_movies_json(page=3, page_size=5)
+        assert engine.list_movies_json(page=3, page_size=5) is body
+        assert engine.pager.cache.hits >= 1
+
+
+class TestMoviesExport:
+    def test_export_ndjson_full_catalog(self):
+        r = client.get("/movies/export")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = r.text.splitlines()
+        assert len(lines) == len(engine.transformer.movie_catalog)
+        first = json.loads(lines[0])
+        assert list(first) == ["movie_id", "title", "genres", "year", "vote_average", "popularity"]
+        page = client.get("/movies?page=1&page_size=1").json()["movies"][0]
+        assert first["movie_id"] == page["movie_id"]
+
+    def test_export_projection_and_filters(self):
+        cat = engine.transformer.movie_catalog
+        r = client.get("/movies/export?fields=movie_id,is_cold,log_popularity"
+                       "&min_log_popularity=1.0&is_cold=false")
+        rows = [json.loads(line) for line in r.text.splitlines()]
+        expected = ((cat["log_popularity"] >= 1.0) & (cat["is_cold"] == 0)).sum()
+        assert len(rows) == expected
+        assert all(set(row) == {"movie_id", "is_cold", "log_popularity"} for row in rows)
+        assert all(row["log_popularity"] >= 1.0 and row["is_cold"] is False for row in rows)
+
+    def test_export_arrow(self):
+        r = client.get("/movies/export?format=arrow&fields=movie_id,title&max_log_popularity=0.5")
+        assert r.status_code == 200
+        table = pa.ipc.open_stream(r.content).read_all()
+        assert table.column_names == ["movie_id", "title"]
+        cat = engine.transformer.movie_catalog
+        assert table.num_rows == (cat["log_popularity"] <= 0.5).sum()
+
+    def test_export_unknown_field(self):
+        assert client.get("/movies/export?fields=movie_id,poster").status_code == 400
+
+    def test_export_has_own_slots(self, monkeypatch):
+        slots = threading.BoundedSemaphore(1)
+        monkeypatch.setattr(main, "export_slots", slots)
+        slots.acquire()
+        r = client.get("/movies/export?fields=movie_id")
+        assert r.status_code == 503 and r.headers["retry-after"] == "5"
+        slots.release()
+        # Cada exportacion, terminada o rechazada por campos, devuelve su cupo.
+        assert client.get("/movies/export?fields=movie_id").status_code == 200
+        assert client.get("/movies/export?fields=poster").status_code == 400
+        assert slots.acquire(blocking=False)
+        slots.release()
+
+    def test_export_slot_freed_without_iteration(self, monkeypatch):
+        slots = threading.BoundedSemaphore(1)
+        monkeypatch.setattr(main, "export_slots", slots)
+        args = dict(fields="movie_id", min_log_popularity=None, max_log_popularity=None,
+                    is_cold=None, format="ndjson")
+        # Respuesta construida pero nunca iterada (cliente que corta antes del primer byte).
+        r = main.export_movies(**args)
+        assert not slots.acquire(blocking=False)
+        asyncio.run(r.background())
+        assert slots.acquire(blocking=False)
+        slots.release()
+        # Sin tarea de fondo (la respuesta ni se envia): el cupo vuelve al descartar el cuerpo.
+        r = main.export_movies(**args)
+        del r
+        gc.collect()
+        assert slots.acquire(blocking=False)
+        slots.release()
+
+    def test_export_is_chunked(self):
+        order = engine.pager.orders["popularity"][0]
+        chunks = list(engine.export_movies(fields=["movie_id"]))
+        assert len(chunks) == -(-len(order) // 2000)
+
+
+class TestAutocomplete:
+    def test_prefix_ranked_by_popularity(self):
+        cat = engine.transformer.movie_catalog
+        starts = cat[cat["title"].str.lower().str.startswith("inc")]
+        expected = starts.sort_values("log_popularity", ascending=False).index[:10].tolist()
+        r = client.get("/movies/autocomplete?prefix=Inc")
+        assert r.status_code == 200
+        data = r.json()
+        assert data["prefix"] == "Inc"
+        assert [s["movie_id"] for s in data["suggestions"]] == expected
+
+    def test_short_and_long_prefixes(self):
+        for prefix in ["t", "th", "the d", "inception"]:
+            suggestions = engine.autocomplete(prefix, 20)
+            assert all(s["title"].lower().startswith(prefix) for s in suggestions)
+            pops = [s["popularity"] for s in suggestions]
+            assert pops == sorted(pops, reverse=True)
+
+    def test_limit_and_no_match(self):
+        assert len(client.get("/movies/autocomplete?prefix=t&limit=3").json()["suggestions"]) == 3
+        assert client.get("/movies/autocomplete?prefix=zzzqqq").json()["suggestions"] == []
+        assert client.get("/movies/autocomplete?prefix=t&limit=50").status_code == 422
+        assert client.get("/movies/autocomplete").status_code == 422
 
 
 class TestMoviesSearch:
@@ -108,6 +247,171 @@ class TestMoviesSearch:
         r = client.get("/movies/search")
         assert r.status_code == 422
 
+    def test_search_matches_substring_scan(self):
+        cat = engine.transformer.movie_catalog
+        for q in ["Inc", "the d", "x", "OF THE", "zzzqqq"]:
+            expected = set(cat.index[cat["title"].str.contains(q, case=False, regex=False)])
+            data = engine.search_movies(q, page_size=len(cat))
+            assert data["total"] == len(expected)
+            assert {m["movie_id"] for m in data["movies"]} == expected
+
+    def test_search_ranked_by_popularity(self):
+        data = client.get("/movies/search?q=the&page_size=50").json()
+        rest = [m for m in data["movies"] if not m["title"].lower().startswith("the")]
+        pops = [m["popularity"] for m in rest]
+        assert pops == sorted(pops, reverse=True)
+
+    def test_search_exact_title_first(self):
+        data = client.get("/movies/search?q=inception").json()
+        assert data["movies"][0]["title"] == "Inception"
+
+    def test_search_is_literal(self):
+        r = client.get("/movies/search", params={"q": "(["})
+        assert r.status_code == 200
+        assert r.json()["total"] == 0
+
+    def test_search_ignores_accents(self):
+        data = client.get("/movies/search", params={"q": "INCEPTIÓN"}).json()
+        assert data["movies"][0]["title"] == "Inception"
+
+    def test_fuzzy_tolerates_typos(self):
+        assert client.get("/movies/search?q=Incepton").json()["total"] == 0
+        for q, expected in [("Incepton", "Inception"), ("Matriz", "Matrix"),
+                            ("Interestelar", "Interstellar")]:
+            data = client.get("/movies/search", params={"q": q, "fuzzy": True}).json()
+            assert any(expected in m["title"] for m in data["movies"][:5])
+
+    def test_fuzzy_keeps_literal_matches_first(self):
+        literal = engine.search_movies("matrix", page_size=1000)
+        fuzzy = engine.search_movies("matrix", page_size=1000, fuzzy=True)
+        n = literal["total"]
+        assert fuzzy["total"] >= n
+        assert fuzzy["movies"][:n] == literal["movies"]
+
+    def test_fuzzy_is_bounded(self):
+        data = engine.search_movies("the lovely", page_size=1000, fuzzy=True)
+        literal = engine.search_movies("the lovely", page_size=1000)
+        assert data["total"] <= literal["total"] + FUZZY_CANDIDATES
+
+    def test_cursor_walks_all_results(self):
+        expected = engine.search_movies("the", page_size=100000)["movies"]
+        seen, cursor = [], None
+        data = client.get("/movies/search?q=the&page_size=100").json()
+        while True:
+            seen += [m["movie_id"] for m in data["movies"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+            # El cursor ya lleva la consulta.
+            data = client.get("/movies/search", params={"cursor": cursor, "page_size": 100}).json()
+        assert seen == [m["movie_id"] for m in expected]
+
+    def test_cursor_pages_come_from_cache(self):
+        engine.search_cache.clear()
+        first = client.get("/movies/search?q=the&page_size=5")
+        assert 'cache;desc="miss"' in first.headers["server-timing"]
+        r = client.get("/movies/search", params={"cursor": first.json()["next_cursor"]})
+        assert 'cache;desc="hit"' in r.headers["server-timing"]
+        assert "match;" not in r.headers["server-timing"]
+        assert r.json()["total"] == first.json()["total"]
+        # Misma consulta normalizada: misma entrada.
+        client.get("/movies/search?q=THÉ")
+        assert len(engine.search_cache) == 1
+
+    def test_cursor_rejected(self):
+        cursor = client.get("/movies/search?q=the&page_size=5").json()["next_cursor"]
+        r = client.get("/movies/search", params={"q": "matrix", "cursor": cursor})
+        assert r.status_code == 400
+        assert client.get("/movies/search?cursor=basura").status_code == 400
+        stale = encode_search_cursor("the", False, 5, "otra-version")
+        assert client.get("/movies/search", params={"cursor": stale}).status_code == 400
+
+    def test_substring_distance(self):
+        assert substring_distance("matrix", "the matrix reloaded") == 0
+        assert substring_distance("matriz", "the matrix") == 1
+        assert substring_distance("interestelar", "interstellar") == 2
+        assert substring_distance("abc", "") == 3
+
+
+class TestFacets:
+
+    @staticmethod
+    def _pandas_mask(genre=(), lang=(), year_min=None, year_max=None, min_vote=None,
+                     exclude_cold=False):
+        cat = engine.transformer.movie_catalog
+        mask = pd.Series(True, index=cat.index)
+        for g in genre:
+            mask &= cat[f"genre_{g}"] > 0
+        if lang:
+            mask &= cat[[f"lang_{x}" for x in lang]].sum(axis=1) > 0
+        if year_min is not None:
+            mask &= cat["movie_year"] >= year_min
+        if year_max is not None:
+            mask &= cat["movie_year"] <= year_max
+        if min_vote is not None:
+            mask &= cat["vote_average"] >= min_vote
+        if exclude_cold:
+            mask &= ~cat["is_cold"].astype(bool)
+        return mask
+
+    @pytest.mark.parametrize("filters", [
+        {"genre": ["Action"]},
+        {"genre": ["Action", "Drama"], "exclude_cold": True},
+        {"lang": ["en", "fr"], "year_min": 1990, "year_max": 1999},
+        {"min_vote": 7.5, "genre": ["Science Fiction"]},
+    ])
+    def test_matches_pandas(self, filters):
+        expected = self._pandas_mask(**filters)
+        data = engine.list_movies(page_size=200000, filters=filters)
+        assert data["total"] == int(expected.sum())
+        assert {m["movie_id"] for m in data["movies"]} == set(expected.index[expected])
+
+    def test_counts(self):
+        cat = engine.transformer.movie_catalog
+        data = client.get("/movies", params={"genre": "Drama", "lang": "en", "page_size": 1}).json()
+        facets = data["facets"]
+        assert facets["genre"]["Drama"] == data["total"]
+        # Idioma: cuenta sin su propio filtro.
+        drama = cat["genre_Drama"] > 0
+        assert facets["lang"]["fr"] == int((drama & (cat["lang_fr"] > 0)).sum())
+        assert sum(facets["is_cold"].values()) == data["total"]
+        assert facets["min_vote"]["7"] == int(((cat["vote_average"] >= 7) & drama
+                                               & (cat["lang_en"] > 0)).sum())
+
+    def test_sorted_and_cursor(self):
+        params = {"genre": "Horror", "exclude_cold": True, "sort": "vote_average", "page_size": 50}
+        first = client.get("/movies", params=params).json()
+        votes = [m["vote_average"] for m in first["movies"]]
+        assert votes == sorted(votes, reverse=True)
+        second = client.get("/movies", params={**params, "cursor": first["next_cursor"]}).json()
+        page2 = client.get("/movies", params={**params, "page": 2}).json()
+        assert second["movies"] == page2["movies"]
+        assert all("Horror" in m["genres"] for m in second["movies"])
+
+    def test_search_with_filters(self):
+        params = {"q": "the", "genre": "Comedy", "min_vote": 6, "page_size": 100}
+        data = client.get("/movies/search", params=params).json()
+        expected = engine.search_movies("the", page_size=200000)["movies"]
+        expected = [m["movie_id"] for m in expected
+                    if "Comedy" in m["genres"] and m["vote_average"] >= 6]
+        assert data["total"] == len(expected)
+        assert data["facets"]["genre"]["Comedy"] == len(expected)
+        seen = [m["movie_id"] for m in data["movies"]]
+        cursor = data["next_cursor"]
+        while cursor:
+            data = client.get("/movies/search", params={"cursor": cursor, "page_size": 100}).json()
+            seen += [m["movie_id"] for m in data["movies"]]
+            cursor = data["next_cursor"]
+        assert seen == expected
+
+    def test_invalid_filters(self):
+        assert client.get("/movies?genre=Nope").status_code == 400
+        assert client.get("/movies/search?q=the&lang=xx").status_code == 400
+        assert client.get("/movies?min_vote=11").status_code == 422
+        cursor = client.get("/movies/search?q=the&page_size=5").json()["next_cursor"]
+        r = client.get("/movies/search", params={"cursor": cursor, "genre": "Drama"})
+        assert r.status_code == 400
+
 
 class TestRecommend:
     def test_recommend_happy_path(self):
@@ -161,3 +465,113 @@ class TestRecommend:
     def test_recommend_invalid_body(self):
         r = client.post("/recommend", json={"movie_ids": "not_a_list"})
         assert r.status_code == 422
+
+    def test_recommend_ann_retriever(self):
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS, "retriever": "ann"})
+        assert r.status_code == 200
+        rec_ids = {rec["movie_id"] for rec in r.json()["recommendations"]}
+        assert len(rec_ids) == 3
+        assert rec_ids.isdisjoint(set(VALID_IDS))
+
+    def test_recommend_rejects_unknown_retriever(self):
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS, "retriever": "foo"})
+        assert r.status_code == 422
+
+
+class TestRecommendBatch:
+    SEED_SETS = [VALID_IDS, [238, 240, 424, 122, 497], [98, 122, 299536, 11324, 497]]
+
+    def test_batch_happy_path(self):
+        r = client.post("/recommend/batch", json={"seed_sets": self.SEED_SETS})
+        assert r.status_code == 200
+        results = r.json()["results"]
+        assert len(results) == len(self.SEED_SETS)
+        for res, seeds in zip(results, self.SEED_SETS):
+            assert len(res["recommendations"]) == 3
+            rec_ids = {rec["movie_id"] for rec in res["recommendations"]}
+            assert rec_ids.isdisjoint(set(seeds))
+
+    def test_batch_matches_single_endpoint(self):
+        r = client.post("/recommend/batch", json={"seed_sets": self.SEED_SETS})
+        for res, seeds in zip(r.json()["results"], self.SEED_SETS):
+            single = client.post("/recommend", json={"movie_ids": seeds}).json()
+            assert res == single
+
+    def test_batch_rejects_invalid_set(self):
+        r = client.post("/recommend/batch", json={"seed_sets": [VALID_IDS, [27205, 603]]})
+        assert r.status_code == 422
+
+    def test_batch_requires_seed_sets(self):
+        r = client.post("/recommend/batch", json={"seed_sets": []})
+        assert r.status_code == 422
+
+    def test_batch_unknown_seeds_returns_400(self):
+        r = client.post(
+            "/recommend/batch",
+            json={"seed_sets": [VALID_IDS, [-1, -2, -3, -4, -5]]},
+        )
+        assert r.status_code == 400
+        assert "seed_sets[1]" in r.json()["detail"]
+
+    def test_batch_chunks_by_candidate_rows(self, monkeypatch):
+        import app.recommender as recommender
+        monkeypatch.setattr(recommender, "BATCH_CHUNK_ROWS", 1000)
+        rows = []
+        predict = engine._predict_positive_proba
+        monkeypatch.setattr(engine, "batcher", None)
+        monkeypatch.setattr(engine, "_predict_positive_proba", lambda X: rows.append(len(X)) or predict(X))
+        engine.result_cache.clear()
+        results = engine.recommend_batch(self.SEED_SETS, n_candidates=500)
+        assert len(results) == 3
+        # 2 sets de 500 filas por llamada como mucho.
+        assert len(rows) == 2 and max(rows) <= 1000
+
+
+class TestConditionalGet:
+    def test_movies_etag_and_304(self):
+        r = client.get("/movies?page=1&page_size=5")
+        etag = r.headers["etag"]
+        assert etag.startswith('W/"')
+        assert "max-age" in r.headers["cache-control"]
+        r2 = client.get("/movies?page=1&page_size=5", headers={"If-None-Match": etag})
+        assert r2.status_code == 304
+        assert r2.content == b""
+        assert r2.headers["etag"] == etag
+
+    def test_stale_etag_returns_200(self):
+        r = client.get("/movies/search?q=the", headers={"If-None-Match": 'W/"viejo"'})
+        assert r.status_code == 200
+        assert r.headers["etag"] != 'W/"viejo"'
+
+    def test_model_info_not_conditional(self):
+        # Lleva contadores en vivo: un 304 dejaria al cliente con datos viejos.
+        r = client.get("/model/info")
+        assert "etag" not in r.headers
+        r2 = client.get("/model/info", headers={"If-None-Match": '*'})
+        assert r2.status_code == 200
+
+    def test_304_skips_engine(self, monkeypatch):
+        etag = client.get("/movies").headers["etag"]
+
+        def boom(*args, **kwargs):
+            raise AssertionError("no deberia llamarse")
+
+        monkeypatch.setattr(engine, "list_movies_json", boom)
+        assert client.get("/movies", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_recommend_etag_ignores_seed_order(self):
+        ids = [27205, 603, 496243, 550, 335984]
+        r1 = client.post("/recommend", json={"movie_ids": ids})
+        r2 = client.post("/recommend", json={"movie_ids": ids[::-1]})
+        assert r1.headers["etag"] == r2.headers["etag"]
+        assert "etag" not in client.get("/health").headers
+
+    def test_recommend_no_etag_when_candidates_trimmed(self, monkeypatch):
+        # Con el presupuesto recortando candidatos la respuesta no es la canonica.
+        monkeypatch.setattr(engine.candidate_budget, "choose", lambda n, remaining: 50)
+        monkeypatch.setattr(engine, "result_cache", TTLCache(maxsize=8, ttl=0))
+        r = client.post("/recommend", json={"movie_ids": [27205, 603, 496243, 550, 335984],
+                                              "n_candidates": 200})
+        assert r.status_code == 200
+        assert r.json()["n_candidates"] == 50
+        assert "etag" not in r.headers
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.batcher import MicroBatcher
+from app.main import ARTIFACTS_DIR, engine
+from app.recommender import RecommenderEngine
+from tests.conftest import VALID_IDS
+
+
+class TestMicroBatcher:
+
+    def test_coalesces_concurrent_calls(self):
+        calls = []
+
+        def predict(X):
+            calls.append(len(X))
+            return X[:, 0] * 2
+
+        batcher = MicroBatcher(predict, window_ms=50, max_batch=8)
+        inputs = [np.full((i + 1, 3), float(i)) for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher.predict, inputs))
+
+        for i, r in enumerate(results):
+            np.testing.assert_array_equal(r, np.full(i + 1, 2.0 * i))
+        assert len(calls) < 8
+        assert sum(calls) == sum(len(X) for X in inputs)
+        assert batcher.stats()["requests"] == 8
+
+    def test_max_batch_limits_size(self):
+        sizes = []
+        batcher = MicroBatcher(lambda X: (sizes.append(len(X)), X[:, 0])[1],
+                               window_ms=50, max_batch=2)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(batcher.predict, [np.ones((1, 2))] * 6))
+        assert max(sizes) <= 2
+
+    def test_propagates_errors(self):
+        def fail(X):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(fail, window_ms=1)
+        with pytest.raises(ValueError, match="boom"):
+            batcher.predict(np.ones((2, 2)))
+
+    def test_dispatcher_exits_when_idle(self):
+        batcher = MicroBatcher(lambda X: X[:, 0], window_ms=1, idle_s=0.05)
+        batcher.predict(np.ones((1, 1)))
+        thread = batcher._thread
+        time.sleep(0.2)
+        assert batcher._thread is None and not thread.is_alive()
+        np.testing.assert_array_equal(batcher.predict(np.ones((1, 1))), [1.0])
+
+    def test_close_stops_dispatcher(self):
+        batcher = MicroBatcher(lambda X: X[:, 0], window_ms=1, idle_s=30)
+        batcher.predict(np.ones((1, 1)))
+        thread = batcher._thread
+        batcher.close()
+        thread.join(timeout=2)
+        assert not thread.is_alive() and batcher._thread is None
+        # Las peticiones que llegan despues predicen sin agrupar.
+        np.testing.assert_array_equal(batcher.predict(np.full((2, 1), 3.0)), [3.0, 3.0])
+        assert batcher._thread is None
+
+
+@pytest.mark.usefixtures("loaded_engine")
+class TestEngineMicroBatching:
+
+    def test_matches_unbatched(self):
+        batched = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, cache_size=0,
+                                    micro_batch_window_ms=20)
+        batched.load()
+        seed_sets = [VALID_IDS, [238, 240, 424, 122, 497], [98, 122, 299536, 11324, 497]]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(batched.recommend, seed_sets))
+        for seeds, res in zip(seed_sets, results):
+            assert res == engine.recommend(seeds)
+        assert batched.batcher.stats()["requests"] == 3
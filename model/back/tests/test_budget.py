@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from app.budget import CandidateBudget
+from app.main import engine
+from tests.conftest import VALID_IDS
+
+
+class TestCandidateBudget:
+
+    def _trained(self):
+        budget = CandidateBudget(min_candidates=50)
+        # 2 ms fijos + 10 us por candidato
+        for n in [100, 200, 300, 400, 500]:
+            budget.observe(n, 0.002 + n * 1e-5)
+        return budget
+
+    def test_fits_linear_cost(self):
+        fixed, per_candidate = self._trained().cost_model()
+        assert fixed == pytest.approx(0.002)
+        assert per_candidate == pytest.approx(1e-5)
+
+    def test_no_budget_keeps_request(self):
+        assert self._trained().choose(500, None) == 500
+
+    def test_untrained_keeps_request(self):
+        assert CandidateBudget().choose(500, 0.001) == 500
+
+    def test_shrinks_to_fit(self):
+        # (5 ms * 0.8 - 2 ms) / 10 us = 200
+        assert self._trained().choose(500, 0.005) in (199, 200)
+
+    def test_grows_back_to_requested(self):
+        assert self._trained().choose(500, 1.0) == 500
+
+    def test_old_samples_expire(self):
+        now = [0.0]
+        budget = CandidateBudget(max_age=60, clock=lambda: now[0])
+        budget.observe(500, 0.030)
+        now[0] = 61.0
+        assert budget.cost_model() == (0.0, 0.0)
+        assert budget.choose(500, 0.020) == 500
+
+    def test_recovers_after_fallbacks(self):
+        now = [0.0]
+        budget = CandidateBudget(min_candidates=50, max_age=60, probe_every=16,
+                                 clock=lambda: now[0])
+        # Fase lenta: 20 ms fijos (+20 us por candidato) con un presupuesto de 20 ms.
+        for n in [100, 200, 300, 400, 500]:
+            budget.observe(n, 0.020 + n * 2e-5)
+        assert budget.choose(500, 0.020) == 0
+        # El coste baja a 2 us por candidato: solo las sondas lo pueden descubrir.
+        chosen = []
+        for _ in range(200):
+            now[0] += 1.0
+            n = budget.choose(500, 0.020)
+            chosen.append(n)
+            if n:
+                budget.observe(n, n * 2e-6)
+        assert 50 in chosen
+        assert chosen[-1] == 500
+
+    def test_spent_budget_returns_zero(self):
+        budget = self._trained()
+        assert budget.choose(500, 0.0) == 0
+        assert budget.choose(500, 0.002) == 0
+
+
+class TestRecommendBudget:
+
+    def test_top_n_and_candidates(self, client):
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS, "top_n": 5, "n_candidates": 100})
+        assert r.status_code == 200
+        data = r.json()
+        assert len(data["recommendations"]) == 5
+        assert data["n_candidates"] == 100
+        assert data["fallback"] is False
+
+    def test_default_reports_candidates(self, client):
+        data = client.post("/recommend", json={"movie_ids": VALID_IDS}).json()
+        assert data["n_candidates"] == 500
+
+    def test_tiny_budget_falls_back_to_popularity(self, client):
+        client.post("/recommend", json={"movie_ids": VALID_IDS, "n_candidates": 400})
+        r = client.post(
+            "/recommend",
+            json={"movie_ids": VALID_IDS, "n_candidates": 300, "latency_budget_ms": 0.001},
+        )
+        assert r.status_code == 200
+        data = r.json()
+        assert data["fallback"] is True
+        assert data["n_candidates"] == 0
+        rec_ids = [rec["movie_id"] for rec in data["recommendations"]]
+        popular = [int(m) for m in engine._popular_ids if m not in VALID_IDS]
+        assert rec_ids == popular[:3]
+
+    def test_rejects_invalid_fields(self, client):
+        for body in [{"top_n": 0}, {"n_candidates": 0}, {"latency_budget_ms": -1}]:
+            r = client.post("/recommend", json={"movie_ids": VALID_IDS, **body})
+            assert r.status_code == 422
+
+    def test_model_info_reports_budget(self, client):
+        data = client.get("/model/info").json()
+        assert "per_candidate_us" in data["latency_budget"]
+
+    def test_observe_excludes_enrichment(self, loaded_engine, monkeypatch):
+        observed = []
+        build = loaded_engine._build_recommendation
+
+        def slow_build(*args):
+            time.sleep(0.2)
+            return build(*args)
+
+        monkeypatch.setattr(loaded_engine, "_build_recommendation", slow_build)
+        monkeypatch.setattr(loaded_engine.candidate_budget, "observe",
+                            lambda n, seconds: observed.append(seconds))
+        loaded_engine.recommend(VALID_IDS, top_n=3, n_candidates=137, latency_budget_ms=0)
+        assert len(observed) == 1 and observed[0] < 0.2
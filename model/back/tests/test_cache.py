@@ -0,0 +1,67 @@
+import time
+
+from app.cache import TTLCache
+from app.main import engine
+from tests.conftest import VALID_IDS
+
+
+class TestTTLCache:
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_counters(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.get("a")
+        cache.put("a", 1)
+        cache.get("a")
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_ratio"] == 0.5
+
+    def test_disabled_with_zero_size(self):
+        cache = TTLCache(maxsize=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+
+class TestRecommendCache:
+
+    def test_repeated_seed_set_hits_cache(self, client):
+        engine.result_cache.clear()
+        first = client.post("/recommend", json={"movie_ids": VALID_IDS}).json()
+        hits = engine.result_cache.hits
+        second = client.post("/recommend", json={"movie_ids": VALID_IDS}).json()
+        assert engine.result_cache.hits == hits + 1
+        assert first == second
+
+    def test_seed_order_preserved_on_hit(self, client):
+        client.post("/recommend", json={"movie_ids": VALID_IDS})
+        reordered = list(reversed(VALID_IDS))
+        data = client.post("/recommend", json={"movie_ids": reordered}).json()
+        assert [s["movie_id"] for s in data["seed_movies"]] == reordered
+
+    def test_model_info_reports_cache(self, client):
+        data = client.get("/model/info").json()
+        assert data["model_version"]
+        assert {"hits", "misses", "size"} <= set(data["recommend_cache"])
+
+    def test_reload_invalidates(self, client):
+        client.post("/recommend", json={"movie_ids": VALID_IDS})
+        assert len(engine.result_cache) > 0
+        engine.load()
+        assert len(engine.result_cache) == 0
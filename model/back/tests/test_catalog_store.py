@@ -0,0 +1,103 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.main import ARTIFACTS_DIR
+from src.ann_index import ANN_FILENAME
+from src.catalog_store import ORPHAN_TMP_SECONDS, STORE_META, source_fingerprint
+from src.feature_engineering import FeatureTransformer
+from tests.conftest import VALID_IDS
+
+TRANS_PATH = f"{ARTIFACTS_DIR}/transformers"
+
+
+@pytest.fixture(scope="module")
+def store_root(tmp_path_factory):
+    return tmp_path_factory.mktemp("catalog_store")
+
+
+@pytest.fixture(scope="module")
+def private():
+    return FeatureTransformer.load(TRANS_PATH)
+
+
+@pytest.fixture(scope="module")
+def mapped(store_root):
+    return FeatureTransformer.load(TRANS_PATH, store_dir=store_root)
+
+
+class TestCatalogStore:
+
+    def test_store_written_by_fingerprint(self, mapped, store_root):
+        assert (store_root / source_fingerprint(TRANS_PATH) / STORE_META).exists()
+
+    def test_catalog_values_match(self, private, mapped):
+        a, b = private.movie_catalog, mapped.movie_catalog
+        assert a.index.equals(b.index)
+        assert a.columns.tolist() == b.columns.tolist()
+        for col in a.columns:
+            if a[col].dtype.kind in "biuf":
+                np.testing.assert_array_equal(a[col].to_numpy(), b[col].to_numpy())
+            else:
+                assert a[col].tolist() == b[col].tolist(), col
+
+    def test_arrays_are_read_only_views(self, mapped):
+        assert isinstance(mapped._movie_matrix, np.memmap)
+        assert not mapped._movie_matrix.flags.writeable
+        col = mapped.movie_catalog["log_popularity"].to_numpy()
+        assert not col.flags.writeable
+        assert isinstance(mapped.movie_catalog["title"].dtype, pd.ArrowDtype)
+
+    def test_precomputed_arrays_match(self, private, mapped):
+        np.testing.assert_array_equal(private._movie_matrix, mapped._movie_matrix)
+        np.testing.assert_array_equal(private._movie_exact, mapped._movie_exact)
+        np.testing.assert_array_equal(private._genre_bits, mapped._genre_bits)
+        assert private.genre_vocab_ == mapped.genre_vocab_
+        for g, p in private.genre_postings_.items():
+            np.testing.assert_array_equal(p, mapped.genre_postings_[g])
+
+    @pytest.mark.parametrize("retriever", ["genre", "ann"])
+    def test_prepare_inference_matches(self, private, mapped, retriever):
+        X_a, info_a = private.prepare_inference(VALID_IDS, retriever=retriever)
+        X_b, info_b = mapped.prepare_inference(VALID_IDS, retriever=retriever)
+        np.testing.assert_array_equal(X_a, X_b)
+        assert info_a["movie_id"].tolist() == info_b["movie_id"].tolist()
+
+    def test_second_load_reuses_store(self, mapped, store_root):
+        meta = store_root / source_fingerprint(TRANS_PATH) / STORE_META
+        mtime = meta.stat().st_mtime_ns
+        FeatureTransformer.load(TRANS_PATH, store_dir=store_root)
+        assert meta.stat().st_mtime_ns == mtime
+
+    def test_stale_versions_removed(self, mapped, store_root):
+        stale = store_root / "000000000000"
+        stale.mkdir()
+        (stale / STORE_META).write_text("{}")
+        orphan, writing = store_root / f".tmp-{'a' * 32}", store_root / f".tmp-{'b' * 32}"
+        orphan.mkdir()
+        writing.mkdir()
+        old = time.time() - ORPHAN_TMP_SECONDS - 60
+        os.utime(orphan, (old, old))
+        # Nada que no sea una version del almacen: la raiz puede ser compartida.
+        unrelated = [store_root / "otra-app", store_root / "ffffffffffff", store_root / "notas.txt"]
+        unrelated[0].mkdir()
+        unrelated[1].mkdir()
+        unrelated[2].write_text("x")
+
+        (store_root / source_fingerprint(TRANS_PATH) / STORE_META).unlink()
+        FeatureTransformer.load(TRANS_PATH, store_dir=store_root)
+        assert not stale.exists() and not orphan.exists()
+        assert writing.exists() and all(p.exists() for p in unrelated)
+        assert (store_root / source_fingerprint(TRANS_PATH) / STORE_META).exists()
+
+    def test_fingerprint_tracks_ann_index(self, tmp_path):
+        # Un movie_ann.npz nuevo (o borrado) cambia los arrays ann_* del almacen.
+        for name in os.listdir(TRANS_PATH):
+            if name != ANN_FILENAME:
+                os.symlink(os.path.abspath(os.path.join(TRANS_PATH, name)), tmp_path / name)
+        without = source_fingerprint(tmp_path)
+        os.symlink(os.path.abspath(os.path.join(TRANS_PATH, ANN_FILENAME)), tmp_path / ANN_FILENAME)
+        assert source_fingerprint(tmp_path) != without
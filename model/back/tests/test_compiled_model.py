@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from app.compiled_model import PARITY_RTOL, CompiledEnsemble, from_lightgbm, from_xgboost
+from app.main import ARTIFACTS_DIR, engine
+from app.recommender import RecommenderEngine, lgb
+
+SEED_SETS = [
+    [27205, 603, 496243, 550, 335984],
+    [238, 240, 424, 122, 497],
+    [98, 122, 299536, 11324, 497],
+]
+
+
+@pytest.fixture(scope="module")
+def X(loaded_engine):
+    blocks = [loaded_engine.transformer.prepare_inference(s)[0] for s in SEED_SETS]
+    return np.concatenate(blocks)
+
+
+@pytest.fixture(scope="module")
+def X_missing(X):
+    rng = np.random.default_rng(0)
+    Xm = X.copy()
+    Xm[rng.random(Xm.shape) < 0.1] = np.nan
+    Xm[rng.random(Xm.shape) < 0.1] = 0.0
+    return Xm
+
+
+@pytest.fixture(scope="module")
+def native_xgb():
+    model = xgb.XGBClassifier()
+    model.load_model(f"{ARTIFACTS_DIR}/model/xgboost_recommender.ubj")
+    return model
+
+
+class TestXGBoostParity:
+
+    def test_margins_bit_identical(self, native_xgb, X, X_missing):
+        compiled = from_xgboost(native_xgb.get_booster())
+        for data in (X, X_missing):
+            native = native_xgb.predict(data, output_margin=True)
+            np.testing.assert_array_equal(compiled.predict_margin(data), native)
+
+    def test_probabilities_within_tolerance(self, native_xgb, X, X_missing):
+        compiled = from_xgboost(native_xgb.get_booster())
+        for data in (X, X_missing):
+            np.testing.assert_allclose(compiled.predict_proba(data),
+                                       native_xgb.predict_proba(data)[:, 1],
+                                       rtol=PARITY_RTOL["xgboost"], atol=0)
+
+    def test_save_load_roundtrip(self, native_xgb, X, tmp_path):
+        compiled = from_xgboost(native_xgb.get_booster())
+        compiled.save(tmp_path / "compiled.npz")
+        loaded = CompiledEnsemble.load(tmp_path / "compiled.npz")
+        assert loaded.source == "xgboost"
+        np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+
+
+@pytest.mark.skipif(lgb is None, reason="lightgbm no instalado")
+class TestLightGBMParity:
+
+    @pytest.fixture(scope="class")
+    def native_lgb(self):
+        return lgb.Booster(model_file=f"{ARTIFACTS_DIR}/model/lightgbm_recommender.txt")
+
+    def test_margins_bit_identical(self, native_lgb, X, X_missing):
+        compiled = from_lightgbm(native_lgb)
+        for data in (X, X_missing):
+            np.testing.assert_array_equal(compiled.predict_margin(data),
+                                          native_lgb.predict(data, raw_score=True))
+
+    def test_probabilities_within_tolerance(self, native_lgb, X, X_missing):
+        compiled = from_lightgbm(native_lgb)
+        for data in (X, X_missing):
+            np.testing.assert_allclose(compiled.predict_proba(data), native_lgb.predict(data),
+                                       rtol=PARITY_RTOL["lightgbm"], atol=0)
+
+
+class TestCompiledEngine:
+
+    def test_engine_matches_xgboost(self, X):
+        if engine.model_type != "xgboost":
+            pytest.skip("el motor principal no sirve xgboost")
+        compiled_engine = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, model_type="compiled")
+        compiled_engine.load()
+        assert compiled_engine.model.source == "xgboost"
+        assert compiled_engine.metadata["n_features"] == X.shape[1]
+        np.testing.assert_allclose(
+            compiled_engine._predict_positive_proba(X),
+            engine._predict_positive_proba(X), rtol=PARITY_RTOL["xgboost"], atol=0,
+        )
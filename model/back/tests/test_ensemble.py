@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from app.main import ARTIFACTS_DIR, _parse_weights
+from app.recommender import RecommenderEngine, lgb
+from tests.conftest import VALID_IDS
+
+
+@pytest.fixture(scope="module")
+def ensemble():
+    eng = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, model_type="ensemble",
+                            ensemble_weights={"xgboost": 3, "lightgbm": 1, "random_forest": 1})
+    eng.load()
+    return eng
+
+
+@pytest.fixture(scope="module")
+def X(loaded_engine):
+    return loaded_engine.transformer.prepare_inference(VALID_IDS)[0]
+
+
+class TestEnsemble:
+
+    def test_loads_available_backends(self, ensemble):
+        assert "xgboost" in ensemble.members
+        assert ("lightgbm" in ensemble.members) == (lgb is not None)
+        assert ensemble.metadata["model_type"] == "ensemble"
+
+    def test_blend_is_weighted_mean(self, ensemble, X):
+        weights = {b: ensemble.ensemble_weights[b] for b in ensemble.members}
+        total = sum(weights.values())
+        expected = sum(
+            weights[b] / total * ensemble._predict_backend(b, m, X).astype(np.float64)
+            for b, m in ensemble.members.items()
+        )
+        np.testing.assert_allclose(ensemble._predict_positive_proba(X), expected, rtol=1e-6)
+
+    def test_zero_weight_skips_backend(self):
+        eng = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, model_type="ensemble",
+                                ensemble_weights={"xgboost": 1})
+        eng.load()
+        assert list(eng.members) == ["xgboost"]
+
+    def test_reports_member_latency(self, ensemble, X):
+        ensemble._predict_positive_proba(X)
+        stats = ensemble.ensemble_stats()
+        assert set(stats) == set(ensemble.members)
+        assert sum(s["weight"] for s in stats.values()) == pytest.approx(1.0, abs=1e-3)
+        assert all(s["calls"] >= 1 and s["last_ms"] > 0 for s in stats.values())
+
+    def test_predicts_after_close(self, X):
+        eng = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR, model_type="ensemble")
+        eng.load()
+        expected = eng._predict_positive_proba(X)
+        eng.close()
+        assert eng._pool._shutdown
+        np.testing.assert_allclose(eng._predict_positive_proba(X), expected, rtol=1e-6)
+
+    def test_recommend(self, ensemble):
+        result = ensemble.recommend(VALID_IDS)
+        assert len(result["recommendations"]) == 3
+
+    def test_missing_models_raise(self, tmp_path):
+        eng = RecommenderEngine(artifacts_dir=str(tmp_path), model_type="ensemble")
+        with pytest.raises(FileNotFoundError):
+            eng.load()
+
+    def test_parse_weights(self):
+        assert _parse_weights("xgboost=0.5, LightGBM=0.3,random_forest") == {
+            "xgboost": 0.5, "lightgbm": 0.3, "random_forest": 1.0,
+        }
+        assert _parse_weights("") == {}
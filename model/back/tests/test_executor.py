@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+import app.main as main
+from app.executor import ExecutorSaturated, InferenceExecutor
+from tests.conftest import VALID_IDS
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+    executor.submit(lambda: (started.set(), release.wait()))
+    started.wait()
+    executor.submit(release.wait)
+    monkeypatch.setattr(main, "executor", executor)
+    yield executor
+    release.set()
+    executor.shutdown()
+
+
+class TestInferenceExecutor:
+
+    def test_runs_and_returns(self):
+        executor = InferenceExecutor(max_workers=2, max_queue=4)
+        assert asyncio.run(executor.run(lambda a, b=0: a + b, 1, b=2)) == 3
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["queued"] == 0 and stats["running"] == 0
+        executor.shutdown()
+
+    def test_propagates_exceptions(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=1)
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            asyncio.run(executor.run(fail))
+        executor.shutdown()
+
+    def test_rejects_when_queue_full(self, saturated):
+        assert saturated.queue_depth == 1
+        with pytest.raises(ExecutorSaturated) as exc:
+            saturated.submit(lambda: None)
+        assert exc.value.retry_after >= 1
+        assert saturated.stats()["rejected"] == 1
+
+    def test_records_wait_time(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=8)
+        futures = [executor.submit(lambda: sum(range(10_000))) for _ in range(5)]
+        [f.result() for f in futures]
+        stats = executor.stats()
+        assert stats["completed"] == 5
+        assert stats["wait_ms"]["p99"] >= stats["wait_ms"]["p50"] >= 0
+        executor.shutdown()
+
+
+class TestBackpressure:
+
+    def test_recommend_returns_503_with_retry_after(self, client, saturated):
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS})
+        assert r.status_code == 503
+        assert int(r.headers["Retry-After"]) >= 1
+
+    def test_movies_returns_503(self, client, saturated):
+        assert client.get("/movies").status_code == 503
+        assert client.get("/movies/search", params={"q": "matrix"}).status_code == 503
+
+    def test_model_info_reports_executor(self, client):
+        client.get("/movies")
+        stats = client.get("/model/info").json()["executor"]
+        assert stats["completed"] >= 1
+        assert {"queued", "running", "rejected", "wait_ms"} <= set(stats)
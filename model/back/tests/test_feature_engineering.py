@@ -0,0 +1,162 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.main import engine
+from src.feature_engineering import FeatureTransformer
+from tests.conftest import VALID_IDS
+
+
+@pytest.fixture(scope="module")
+def transformer(loaded_engine):
+    return loaded_engine.transformer
+
+
+class TestGenreIndex:
+
+    def test_bits_match_genre_lists(self, transformer):
+        cat = transformer.movie_catalog
+        for pos in [0, len(cat) // 2, len(cat) - 1]:
+            genres = set(cat["_genres_list"].iloc[pos])
+            for g, code in transformer.genre_vocab_.items():
+                bit = int(transformer._genre_bits[pos, code // 64]) >> (code % 64) & 1
+                assert bit == (g in genres)
+
+    def test_postings_cover_each_genre(self, transformer):
+        cat = transformer.movie_catalog
+        for g, postings in transformer.genre_postings_.items():
+            expected = np.flatnonzero(cat["_genres_list"].apply(lambda gl: g in gl).values)
+            np.testing.assert_array_equal(postings, expected)
+
+    def test_overlap_counts_match_sets(self, transformer):
+        cat = transformer.movie_catalog
+        user_genres = {"Action", "Drama", "Science Fiction"}
+        expected = cat["_genres_list"].apply(lambda gl: len(set(gl) & user_genres)).values
+        np.testing.assert_array_equal(transformer.genre_overlap_counts(user_genres), expected)
+
+    def test_candidates_match_nlargest(self, transformer):
+        cat = transformer.movie_catalog
+        seeds = VALID_IDS
+        user_genres = transformer._aggregate_profile(cat.loc[seeds])["_user_genre_set"]
+
+        scores = cat["_genres_list"].apply(lambda gl: len(set(gl) & user_genres))
+        scores = scores.drop(seeds, errors="ignore")
+        scores = scores[scores > 0]
+        expected = scores.nlargest(500).index.tolist()
+
+        assert transformer._genre_candidates(user_genres, seeds, 500) == expected
+
+
+class TestDenseFeatures:
+
+    def _inference_frames(self, transformer, seeds):
+        cat = transformer.movie_catalog
+        profile = transformer._aggregate_profile(cat.loc[seeds])
+        candidates = transformer._genre_candidates(profile["_user_genre_set"], seeds, 500)
+        df = pd.DataFrame({"user_id": "__inference__", "movie_id": candidates})
+        return df, {"__inference__": profile}
+
+    def test_movie_matrix_matches_catalog(self, transformer):
+        cat = transformer.movie_catalog
+        expected = cat[transformer._movie_feature_cols()].fillna(0).values.astype(np.float32)
+        assert transformer._movie_matrix.dtype == np.float32
+        assert transformer._movie_matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(transformer._movie_matrix, expected)
+
+    @pytest.mark.parametrize("seeds", [VALID_IDS, [238, 240, 424, 122, 497]])
+    def test_transform_profile_matches_transform(self, transformer, seeds):
+        df, profiles = self._inference_frames(transformer, seeds)
+        X_pd, meta_pd = transformer.transform(df, profiles)
+        X_fast, movie_ids = transformer.transform_profile(
+            df["movie_id"].values, profiles["__inference__"]
+        )
+
+        # transform() reescribe feature_names_: se compara con las columnas del entrenamiento.
+        with open(engine.artifacts_dir / "transformers" / "transformer_meta.json") as f:
+            trained = json.load(f)["feature_names"]
+        assert X_pd.columns.tolist() == trained
+        assert transformer.feature_names_ == trained
+        expected = np.nan_to_num(X_pd.values.astype(np.float32), nan=0.0)
+        assert X_fast.dtype == np.float32
+        np.testing.assert_array_equal(X_fast, expected)
+        assert movie_ids.tolist() == meta_pd["movie_id"].tolist()
+
+    def test_transform_profile_drops_unknown_ids(self, transformer):
+        _, profiles = self._inference_frames(transformer, VALID_IDS)
+        X, movie_ids = transformer.transform_profile([603, -1, 550], profiles["__inference__"])
+        assert movie_ids.tolist() == [603, 550]
+        assert X.shape == (2, len(transformer.feature_names_))
+
+    def test_prepare_inference_is_dense(self, transformer):
+        X, info = transformer.prepare_inference(VALID_IDS)
+        assert isinstance(X, np.ndarray)
+        assert X.shape == (len(info), len(transformer.feature_names_))
+        assert not np.isnan(X).any()
+
+    def test_prepare_inference_without_candidates(self, transformer):
+        X, info = transformer.prepare_inference(VALID_IDS, candidate_movie_ids=VALID_IDS)
+        assert X.dtype == np.float32
+        assert X.shape == (0, len(transformer.feature_names_))
+        assert info.columns.tolist() == ["movie_id", "title", "genres"]
+        assert len(info) == 0
+
+
+class TestANNIndex:
+
+    def test_vectors_are_normalized(self, transformer):
+        index = transformer.ann_index
+        assert index.vectors.dtype == np.float32
+        assert len(index.vectors) == len(transformer.movie_catalog)
+        np.testing.assert_allclose(np.linalg.norm(index.vectors, axis=1), 1.0, atol=1e-5)
+
+    def test_lists_partition_catalog(self, transformer):
+        index = transformer.ann_index
+        assert index.list_offsets[-1] == len(index.vectors)
+        assert np.array_equal(np.sort(index.list_members), np.arange(len(index.vectors)))
+
+    def test_search_excludes_seeds(self, transformer):
+        index = transformer.ann_index
+        pos = transformer.movie_positions(VALID_IDS)
+        cand, scores = index.search(index.query_vector(pos), 500, exclude=pos)
+        assert len(cand) == 500
+        assert not np.isin(cand, pos).any()
+        assert np.all(np.diff(scores) <= 0)
+
+    def test_search_recall_vs_exact(self, transformer):
+        index = transformer.ann_index
+        pos = transformer.movie_positions(VALID_IDS)
+        q = index.query_vector(pos)
+        cand, _ = index.search(q, 500, exclude=pos)
+        exact = index.vectors @ q
+        exact[pos] = -np.inf
+        top = np.argpartition(-exact, 499)[:500]
+        assert len(np.intersect1d(cand, top)) / 500 >= 0.5
+
+    def test_built_once_under_concurrency(self, transformer, monkeypatch):
+        fresh = FeatureTransformer()
+        fresh.movie_catalog = transformer.movie_catalog
+        builds = []
+
+        def build(**kwargs):
+            builds.append(1)
+            time.sleep(0.05)
+            return transformer.ann_index
+
+        monkeypatch.setattr(fresh, "build_ann_index", build)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            indexes = list(pool.map(lambda _: fresh.ann_index, range(8)))
+        assert len(builds) == 1
+        assert all(i is transformer.ann_index for i in indexes)
+
+    def test_prepare_inference_ann(self, transformer):
+        X, info = transformer.prepare_inference(VALID_IDS, retriever="ann")
+        assert len(info) == 500
+        assert not info["movie_id"].isin(VALID_IDS).any()
+        assert X.shape == (500, len(transformer.feature_names_))
+
+    def test_prepare_inference_rejects_unknown_retriever(self, transformer):
+        with pytest.raises(ValueError):
+            transformer.prepare_inference(VALID_IDS, retriever="foo")
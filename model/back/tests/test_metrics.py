@@ -0,0 +1,71 @@
+from app.main import engine
+from app.metrics import RECOMMENDATIONS, STAGE_SECONDS, Registry
+from tests.conftest import VALID_IDS
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestRegistry:
+
+    def test_counter_and_histogram_format(self):
+        reg = Registry()
+        c = reg.counter("x_total", "ayuda", ["kind"])
+        h = reg.histogram("x_seconds", "ayuda", buckets=(0.1, 1.0))
+        c.inc(kind="a")
+        c.inc(2, kind="a")
+        h.observe(0.05)
+        h.observe(0.5)
+        h.observe(5)
+        text = reg.render()
+        assert "# TYPE x_total counter" in text
+        assert 'x_total{kind="a"} 3.0' in text
+        assert 'x_seconds_bucket{le="0.1"} 1' in text
+        assert 'x_seconds_bucket{le="1.0"} 2' in text
+        assert 'x_seconds_bucket{le="+Inf"} 3' in text
+        assert "x_seconds_count 3" in text
+
+    def test_collector(self):
+        reg = Registry()
+        reg.collector(lambda: [("g", "gauge", "ayuda", [({"m": 'a"b'}, 1.5)])])
+        assert 'g{m="a\\"b"} 1.5' in reg.render()
+
+
+class TestMetricsEndpoint:
+
+    def test_metrics_exposes_stages(self, client):
+        engine.result_cache.clear()
+        before = STAGE_SECONDS.count(stage="predict")
+        model_before = RECOMMENDATIONS.value(source="model")
+        client.post("/recommend", json={"movie_ids": VALID_IDS, "top_n": 3})
+        assert STAGE_SECONDS.count(stage="predict") == before + 1
+        assert RECOMMENDATIONS.value(source="model") == model_before + 1
+
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        text = resp.text
+        for stage in ["seed_lookup", "aggregate_profile", "candidates", "transform",
+                      "predict", "enrich", "flush_cache"]:
+            assert f'movia_recommend_stage_seconds_count{{stage="{stage}"}}' in text
+        assert _sample(text, "movia_model_loaded") == 1
+        assert _sample(text, "movia_catalog_size") == len(engine.transformer.movie_catalog)
+        assert "movia_model_info{" in text
+
+    def test_cache_hit_counted(self, client):
+        engine.result_cache.clear()
+        payload = {"movie_ids": VALID_IDS[::-1], "top_n": 3}
+        client.post("/recommend", json=payload)
+        hits = RECOMMENDATIONS.value(source="cache")
+        client.post("/recommend", json=payload)
+        assert RECOMMENDATIONS.value(source="cache") == hits + 1
+
+    def test_http_metrics_use_route_template(self, client):
+        client.get("/movies/search", params={"q": "dark"})
+        text = client.get("/metrics").text
+        assert 'movia_http_requests_total{method="GET",path="/movies/search",status="200"}' in text
+        assert "?q=" not in text
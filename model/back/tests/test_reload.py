@@ -0,0 +1,175 @@
+import threading
+import time
+
+import pytest
+
+import app.main as main
+from app.recommender import RecommenderEngine
+from app.reloader import EngineReloader
+from tests.conftest import VALID_IDS
+
+TOKEN = "test-token"
+HEADERS = {"X-Admin-Token": TOKEN}
+
+
+@pytest.fixture(scope="module")
+def restore_engine(loaded_engine):
+    # Las recargas reemplazan main.engine: se devuelve el original al terminar.
+    original = main.engine
+    yield
+    main.engine = original
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", TOKEN)
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(main.startup, "_ready", ready)
+
+
+class FakeEngine:
+
+    def __init__(self, version, artifacts, fail=False):
+        self.model_version = None
+        self._artifacts = artifacts
+        self._target = version
+        self._fail = fail
+        self.tmdb = self
+        self.warmed = False
+        self.closed = False
+
+    def load(self):
+        if self._fail:
+            raise FileNotFoundError("artefacto ausente")
+        self.model_version = self._target
+
+    def warmup(self, n_sets):
+        self.warmed = True
+
+    def artifact_version(self):
+        return self._artifacts["version"]
+
+    def flush_cache(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class TestEngineReloader:
+
+    def _reloader(self, artifacts, fail=False, ready=None):
+        holder = {"engine": FakeEngine("v1", artifacts)}
+        holder["engine"].load()
+
+        def swap(new):
+            old, holder["engine"] = holder["engine"], new
+            return old
+
+        reloader = EngineReloader(
+            lambda: FakeEngine(artifacts["version"], artifacts, fail=fail),
+            lambda: holder["engine"], swap, ready=ready,
+        )
+        return reloader, holder
+
+    def test_swap_after_warmup(self):
+        artifacts = {"version": "v2"}
+        reloader, holder = self._reloader(artifacts)
+        old = holder["engine"]
+        assert reloader.trigger("test")
+        reloader.wait()
+        assert holder["engine"] is not old
+        assert holder["engine"].model_version == "v2"
+        assert holder["engine"].warmed
+        assert old.closed and not holder["engine"].closed
+        assert reloader.status()["previous_version"] == "v1"
+        assert reloader.status()["reloads"] == 1
+
+    def test_failed_load_keeps_current(self):
+        artifacts = {"version": "v2"}
+        reloader, holder = self._reloader(artifacts, fail=True)
+        old = holder["engine"]
+        reloader.trigger("test")
+        reloader.wait()
+        assert holder["engine"] is old
+        assert reloader.state == "failed"
+        assert "artefacto ausente" in reloader.last_error
+
+    def test_waits_for_startup(self):
+        ready = threading.Event()
+        reloader, holder = self._reloader({"version": "v2"}, ready=ready.is_set)
+        assert not reloader.trigger("test")
+        assert holder["engine"].model_version == "v1" and reloader.state == "idle"
+        ready.set()
+        assert reloader.trigger("test")
+        reloader.wait()
+        assert holder["engine"].model_version == "v2"
+
+    def test_watch_reloads_on_change(self):
+        artifacts = {"version": "v1"}
+        reloader, holder = self._reloader(artifacts)
+        reloader.start_watch(0.01)
+        try:
+            time.sleep(0.05)
+            assert reloader.reloads == 0
+            artifacts["version"] = "v2"
+            deadline = time.time() + 2
+            while holder["engine"].model_version != "v2" and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            reloader.stop_watch()
+        assert holder["engine"].model_version == "v2"
+        assert reloader.last_reason == "watch"
+
+
+@pytest.mark.usefixtures("restore_engine")
+class TestAdminReload:
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+        assert client.post("/admin/reload").status_code == 403
+
+    def test_rejects_wrong_token(self, client, admin):
+        r = client.post("/admin/reload", headers={"X-Admin-Token": "otro"})
+        assert r.status_code == 403
+        r = client.post("/admin/reload", headers={"X-Admin-Token": TOKEN[:-1]})
+        assert r.status_code == 403
+
+    def test_rejected_before_startup_ready(self, client, admin, monkeypatch):
+        monkeypatch.setattr(main.startup, "_ready", threading.Event())
+        old = main.engine
+        r = client.post("/admin/reload", headers=HEADERS)
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "5"
+        assert not main.reloader.is_reloading and main.engine is old
+
+    def test_reload_swaps_engine(self, client, admin):
+        old = main.engine
+        r = client.post("/admin/reload", headers=HEADERS)
+        assert r.status_code == 202
+        assert r.json()["state"] == "loading"
+        main.reloader.wait()
+
+        assert main.engine is not old
+        assert main.engine.is_loaded
+        assert main.engine.tmdb is old.tmdb
+        # Una peticion que aun tenga el motor viejo puede terminar con el.
+        assert len(old.recommend(VALID_IDS)["recommendations"]) == 3
+
+        info = client.get("/model/info").json()
+        assert info["model_version"] == main.engine.model_version
+        assert info["reload"]["previous_version"] == old.model_version
+        assert info["reload"]["state"] == "idle"
+        assert client.post("/recommend", json={"movie_ids": VALID_IDS}).status_code == 200
+
+    def test_failed_reload_keeps_serving(self, client, admin, monkeypatch, tmp_path):
+        current = main.engine
+        monkeypatch.setattr(main.reloader, "_build",
+                            lambda: RecommenderEngine(artifacts_dir=str(tmp_path)))
+        client.post("/admin/reload", headers=HEADERS)
+        main.reloader.wait()
+        assert main.engine is current
+        status = client.get("/admin/reload", headers=HEADERS).json()
+        assert status["state"] == "failed"
+        assert status["model_version"] == current.model_version
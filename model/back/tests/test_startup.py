@@ -0,0 +1,87 @@
+import app.main as main
+from app.main import ARTIFACTS_DIR
+from app.metrics import RECOMMENDATIONS, STAGE_SECONDS
+from app.recommender import RecommenderEngine
+from app.startup import EngineStartup
+from tests.conftest import VALID_IDS
+
+
+class TestEngineStartup:
+
+    def test_phases_and_timings(self):
+        fresh = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR)
+        called = []
+        startup = EngineStartup(lambda: fresh, warmup_sets=2, on_ready=lambda: called.append(1))
+        assert startup.phase == "idle"
+        startup.start()
+        assert startup.wait(60)
+        assert startup.phase == "ready"
+        assert called == [1]
+        assert set(startup.timings["load"]) == {"model", "catalog", "indexes"}
+        assert set(startup.timings["warmup"]) == {"recommend", "search", "list"}
+        # El calentamiento deja paginas y recomendaciones en cache.
+        assert len(fresh.pager.cache) > 0
+        assert len(fresh.result_cache) > 0
+        assert fresh.transformer._ann_index is not None
+
+    def test_warmup_not_counted(self):
+        fresh = RecommenderEngine(artifacts_dir=ARTIFACTS_DIR)
+        fresh.load()
+        before = (RECOMMENDATIONS.value(source="model"), STAGE_SECONDS.count(stage="total"))
+        fresh.warmup(2)
+        assert (RECOMMENDATIONS.value(source="model"), STAGE_SECONDS.count(stage="total")) == before
+        assert len(fresh.result_cache) == 2
+        assert fresh.result_cache.stats()["misses"] == 0
+        # Las peticiones reales si cuentan y aprovechan lo calentado.
+        hits = RECOMMENDATIONS.value(source="cache")
+        fresh.recommend([int(m) for m in fresh._popular_ids[:5]])
+        assert fresh.result_cache.stats()["hits"] == 1
+        assert RECOMMENDATIONS.value(source="cache") == hits + 1
+
+    def test_failure_is_reported(self, tmp_path):
+        broken = RecommenderEngine(artifacts_dir=str(tmp_path))
+        startup = EngineStartup(lambda: broken)
+        startup.start()
+        assert not startup.wait(30)
+        assert startup.phase == "failed"
+        assert "FileNotFoundError" in startup.error
+
+
+class TestReadiness:
+
+    def test_ready_after_startup(self, client, monkeypatch):
+        startup = EngineStartup(lambda: main.engine, warmup_sets=1)
+        monkeypatch.setattr(main, "startup", startup)
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert r.json()["phase"] == "idle"
+
+        startup.start()
+        startup.wait(60)
+        r = client.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["ready"] is True
+        assert client.get("/health").json()["ready"] is True
+
+    def test_health_reports_failed_startup(self, client, monkeypatch, tmp_path):
+        broken = RecommenderEngine(artifacts_dir=str(tmp_path))
+        startup = EngineStartup(lambda: broken)
+        monkeypatch.setattr(main, "engine", broken)
+        monkeypatch.setattr(main, "startup", startup)
+        startup.start()
+        startup.wait(30)
+        health = client.get("/health")
+        assert health.status_code == 503
+        assert health.json()["status"] == "failed"
+        assert health.json()["model_loaded"] is False
+        assert client.get("/ready").status_code == 503
+
+    def test_requests_gated_while_loading(self, client, monkeypatch):
+        monkeypatch.setattr(main, "engine", RecommenderEngine(artifacts_dir=ARTIFACTS_DIR))
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS})
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "5"
+        assert client.get("/movies").status_code == 503
+        health = client.get("/health")
+        assert health.status_code == 200
+        assert health.json()["status"] == "loading"
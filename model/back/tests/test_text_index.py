@@ -0,0 +1,131 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.main import ARTIFACTS_DIR, engine
+from src.feature_engineering import FeatureTransformer
+from src.text_index import TEXT_INDEX_DIR, TextIndex, movie_texts, tokenize
+
+TRANS_PATH = f"{ARTIFACTS_DIR}/transformers"
+TEXTS = [
+    "A thief who steals corporate secrets through the use of dream-sharing technology.",
+    "Dream within a dream; heist, subconscious",
+    "",
+    "A hacker learns that reality is a simulation. hacker, simulation, reality",
+    "Explorers travel through a wormhole in space.",
+    "space travel, wormhole, black hole, time dilation, space station",
+    "Crème brûlée chef in Paris",
+]
+
+
+def _bm25(query, k1=1.2, b=0.75):
+    docs = [tokenize(t) for t in TEXTS]
+    avgdl = sum(map(len, docs)) / len(docs)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(term in d for d in docs)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = d.count(term)
+            if tf:
+                norm = k1 * (1 - b + b * len(d) / avgdl)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TextIndex.build(np.arange(100, 100 + len(TEXTS)), TEXTS)
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory, loaded_engine):
+    # Mismos artefactos (enlazados) mas un indice de texto alineado con el catalogo.
+    path = tmp_path_factory.mktemp("transformers")
+    for name in os.listdir(TRANS_PATH):
+        os.symlink(os.path.abspath(os.path.join(TRANS_PATH, name)), path / name)
+    ids = engine.transformer.movie_catalog.index.values
+    TextIndex.build(ids, [TEXTS[i % len(TEXTS)] for i in range(len(ids))]).save(path)
+    return path
+
+
+class TestTextIndex:
+
+    @pytest.mark.parametrize("query", ["dream", "wormhole space", "HACKER reality", "creme brulee"])
+    def test_scores_match_bm25(self, index, query):
+        expected = _bm25(query)
+        positions, scores, total = index.search(query, k=10)
+        assert total == len(expected)
+        assert positions.tolist() == sorted(expected, key=lambda d: (-expected[d], d))
+        np.testing.assert_allclose(scores, [expected[p] for p in positions], rtol=1e-5)
+
+    def test_top_k_and_empty(self, index):
+        positions, _, total = index.search("space wormhole dream", k=2)
+        assert len(positions) == 2 and total == 4
+        # Con empates en el corte, el top-k es prefijo del ranking completo.
+        tied = TextIndex.build(np.arange(50), ["dream"] * 50)
+        assert tied.search("dream", k=7)[0].tolist() == list(range(7))
+        assert index.search("the of and", k=5)[2] == 0
+        assert index.search("zzzqqq", k=5)[2] == 0
+
+    def test_saved_index_is_memory_mapped(self, index, tmp_path):
+        index.save(tmp_path)
+        loaded = TextIndex.load(tmp_path)
+        assert isinstance(loaded.docs, np.memmap)
+        for query in ["dream", "space travel"]:
+            a, b = index.search(query), loaded.search(query)
+            np.testing.assert_array_equal(a[0], b[0])
+            np.testing.assert_allclose(a[1], b[1])
+
+    def test_movie_texts(self):
+        movies = pd.DataFrame({"overview": ["Uno", None], "keywords": ["a,b", None]})
+        assert tokenize(movie_texts(movies).iloc[0]) == ["uno"]
+        assert movie_texts(movies).iloc[1].strip() == ""
+
+
+class TestTransformerTextIndex:
+
+    def test_loaded_with_catalog(self, artifacts):
+        t = FeatureTransformer.load(artifacts)
+        assert isinstance(t.text_index.docs, np.memmap)
+        assert t.text_index.n_docs == len(t.movie_catalog)
+
+    def test_misaligned_index_ignored(self, artifacts, tmp_path):
+        for name in os.listdir(artifacts):
+            if name != TEXT_INDEX_DIR:
+                os.symlink(artifacts / name, tmp_path / name)
+        TextIndex.build([1, 2], ["dream", "space"]).save(tmp_path)
+        assert FeatureTransformer.load(tmp_path).text_index is None
+
+
+class TestTextSearchEndpoint:
+
+    @pytest.fixture
+    def with_index(self, monkeypatch, loaded_engine):
+        ids = engine.transformer.movie_catalog.index.values
+        texts = [TEXTS[i % len(TEXTS)] if i < 700 else "" for i in range(len(ids))]
+        monkeypatch.setattr(engine.transformer, "text_index", TextIndex.build(ids, texts))
+        return ids
+
+    def test_unavailable_without_index(self, client, monkeypatch):
+        monkeypatch.setattr(engine.transformer, "text_index", None)
+        assert client.get("/movies/text-search?q=dream").status_code == 503
+
+    def test_ranked_pages(self, client, with_index):
+        data = client.get("/movies/text-search", params={"q": "wormhole space", "page_size": 50}).json()
+        assert data["total"] == 200
+        page2 = client.get("/movies/text-search",
+                           params={"q": "wormhole space", "page_size": 50, "page": 2}).json()
+        ids = [m["movie_id"] for m in data["movies"] + page2["movies"]]
+        assert len(set(ids)) == 100
+        positions, _, _ = engine.transformer.text_index.search("wormhole space", k=100)
+        assert ids == with_index[positions].tolist()
+
+    def test_no_matches(self, client, with_index):
+        assert client.get("/movies/text-search?q=zzzqqq").json()["total"] == 0
+        assert client.get("/movies/text-search").status_code == 422
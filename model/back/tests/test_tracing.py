@@ -0,0 +1,96 @@
+import json
+
+import app.main as main
+from app.main import engine
+from app.tracing import Trace, TraceLog
+from tests.conftest import VALID_IDS
+
+
+def _timing(header):
+    out = {}
+    for part in header.split(","):
+        name, _, param = part.strip().partition(";")
+        out[name] = param
+    return out
+
+
+class TestTrace:
+
+    def test_stage_accumulates(self):
+        trace = Trace()
+        with trace.stage("a"):
+            pass
+        with trace.stage("a"):
+            pass
+        trace.info["n_candidates"] = 500
+        assert list(trace.stages) == ["a"]
+        header = trace.server_timing(0.01)
+        assert header.startswith("a;dur=")
+        assert 'n_candidates;desc="500"' in header
+        assert "app;dur=10.000" in header
+
+    def test_log_only_slow_requests(self, tmp_path):
+        log = TraceLog(str(tmp_path / "slow.jsonl"), slow_ms=100)
+        assert not log.record(5, {"path": "/rapida"})
+        assert log.record(150, {"path": "/lenta"})
+        log.close()
+        lines = (tmp_path / "slow.jsonl").read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["path"] == "/lenta"
+
+    def test_log_rotates(self, tmp_path):
+        log = TraceLog(str(tmp_path / "slow.jsonl"), slow_ms=0, max_bytes=500, backups=2)
+        for i in range(50):
+            log.record(1, {"i": i, "relleno": "x" * 50})
+        log.close()
+        assert (tmp_path / "slow.jsonl.1").exists()
+        assert not (tmp_path / "slow.jsonl.3").exists()
+
+    def test_full_queue_drops(self, tmp_path):
+        log = TraceLog(str(tmp_path / "slow.jsonl"), slow_ms=0, max_queue=1)
+        log._listener.stop()
+        assert log.record(1, {"i": 1})
+        assert not log.record(1, {"i": 2})
+        assert log.dropped == 1
+        log._handler.close()
+
+
+class TestServerTiming:
+
+    def test_recommend_breakdown(self, client):
+        engine.result_cache.clear()
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS})
+        timing = _timing(r.headers["server-timing"])
+        for stage in ["cache_lookup", "seed_lookup", "candidates", "transform", "predict",
+                      "enrich", "total", "app"]:
+            assert timing[stage].startswith("dur=")
+        assert timing["cache"] == 'desc="miss"'
+        assert timing["tmdb_misses"].startswith("desc=")
+        assert timing["n_candidates"] == 'desc="500"'
+
+        r = client.post("/recommend", json={"movie_ids": VALID_IDS})
+        timing = _timing(r.headers["server-timing"])
+        assert timing["cache"] == 'desc="hit"'
+        assert "predict" not in timing
+
+    def test_movies_and_search(self, client):
+        engine.pager.cache.clear()
+        engine.search_cache.clear()
+        timing = _timing(client.get("/movies?page=2").headers["server-timing"])
+        assert {"positions", "enrich", "serialize"} <= set(timing)
+        timing = _timing(client.get("/movies?page=2").headers["server-timing"])
+        assert timing["cache"] == 'desc="hit"'
+        timing = _timing(client.get("/movies/search?q=the").headers["server-timing"])
+        assert {"match", "enrich", "matches"} <= set(timing)
+
+    def test_slow_requests_logged(self, client, tmp_path, monkeypatch):
+        log = TraceLog(str(tmp_path / "slow.jsonl"), slow_ms=0)
+        monkeypatch.setattr(main, "trace_log", log)
+        engine.search_cache.clear()
+        client.get("/movies/search?q=matrix")
+        client.get("/health")
+        log.close()
+        [entry] = [json.loads(line) for line in (tmp_path / "slow.jsonl").read_text().splitlines()]
+        assert entry["path"] == "/movies/search"
+        assert entry["query"] == "q=matrix"
+        assert "match" in entry["stages_ms"]
@@ -14,6 +14,7 @@ from sklearn.metrics import (
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.compiled_model import from_xgboost
 from src.feature_engineering import FeatureTransformer
 from src.config import *
 
@@ -291,6 +292,10 @@ def main():
         mp = md / "xgboost_recommender.ubj"
         final_model.save_model(str(mp))
         print(f"  Modelo:      {mp}")
+        # MODEL_TYPE=compiled: se genera aqui, no se versiona (export_compiled.py lo rehace).
+        cp = md / "compiled_recommender.npz"
+        from_xgboost(final_model.get_booster()).save(cp)
+        print(f"  Compilado:   {cp}")
 
         td = art / "transformers"
         transformer.save(td)
@@ -337,8 +342,7 @@ def main():
     
         Xc, ci = transformer.prepare_inference(seeds, top_n_candidates=500)
         if len(Xc) > 0:
-            Xcn = np.nan_to_num(Xc.values.astype(np.float32), nan=0.0)
-            probs = final_model.predict_proba(Xcn)[:, 1]
+            probs = final_model.predict_proba(Xc)[:, 1]
             ci["probability"] = probs
             top3 = ci.nlargest(3, "probability")
             print(f"\n  TOP 3 RECOMENDACIONES:")
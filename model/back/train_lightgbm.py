@@ -478,8 +478,7 @@ def main():
 
     Xc, ci = transformer.prepare_inference(seeds, top_n_candidates=500)
     if len(Xc) > 0:
-        Xcn = np.nan_to_num(Xc.values.astype(np.float32), nan=0.0)
-        probs = final_model.predict_proba(Xcn)[:, 1]
+        probs = final_model.predict_proba(Xc)[:, 1]
         ci["probability"] = probs
         top3 = ci.nlargest(3, "probability")
         print("\n  TOP 3 RECOMENDACIONES:")